@@ -1,7 +1,298 @@
+# backend/AI/LLM/intent.py
+
+"""
+Intent detection: decide how the orchestrator should handle a message.
+
+Obvious messages are settled locally, in-process and without a network call:
+  1) a keyword/regex rule set (greetings, "what can you do", schema columns, ...)
+  2) a small multinomial naive-Bayes model trained on the labelled examples below
+
+Only when neither is confident do we fall back to the OpenAI classifier.
+Set RAG_INTENT_LOCAL=0 to always use the LLM.
+
+Labels: 'smalltalk', 'help', 'data', 'forecast', 'offtopic', 'unknown'
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .schema import ALLOWED_VIEWS
+
+
+# -------------------------
+# Tokenization
+# -------------------------
+
+_TOKEN_RE = re.compile(r"[a-zăâîșşțţ0-9_]+")
+
+
+def _stem(token: str) -> str:
+    """Crude plural folding so 'policies'/'policy' and 'claims'/'claim' match."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _tokens(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+# -------------------------
+# Rules
+# -------------------------
+
+# Column/view name fragments too generic to signal a data question on their own
+_GENERIC_PARTS = {
+    "id", "as", "of", "by", "vs", "to", "gt", "day", "days", "month", "start", "end",
+    "date", "count", "total", "sum", "rate", "ratio", "share", "simple", "still",
+    "name", "code", "key", "band", "bucket", "plus", "pct", "avg", "p50", "p90",
+    "0", "7", "8", "30", "31", "60d", "30d", "90", "up", "for", "all", "in",
+    "type", "full", "open", "opened", "close", "closed", "report", "reported", "force",
+    "cross", "sell", "mix", "cat", "calendar", "distribution", "histogram", "earned", "gross",
+}
+
+# Domain words that are not column names but clearly mean "query the data"
+_DOMAIN_TERMS = {
+    "claim", "policy", "customer", "premium", "gwp", "loss", "payout", "reserve",
+    "peril", "county", "region", "fnol", "settlement", "renewal", "retention",
+    "backlog", "severity", "kpi", "underwriting", "insured", "exposure", "churn",
+}
+
+
+def _schema_terms() -> Set[str]:
+    """Every view/column name in the allowlist, whole and split on '_', stemmed."""
+    terms: Set[str] = set()
+    for view, spec in ALLOWED_VIEWS.items():
+        for name in [view, *spec["columns"]]:  # type: ignore[index]
+            terms.add(_stem(name))
+            terms.update(_stem(p) for p in name.split("_") if p not in _GENERIC_PARTS)
+    terms.update(_stem(t) for t in _DOMAIN_TERMS)
+    return {t for t in terms if t and t not in _GENERIC_PARTS}
+
+
+SCHEMA_TERMS: Set[str] = _schema_terms()
+
+_SMALLTALK_RE = re.compile(
+    r"^\W*(hi|hello|hey|hiya|yo|salut|buna( ziua)?|good (morning|afternoon|evening)|"
+    r"thanks?( you)?( so much| a lot)?|thx|ty|cheers|bye|goodbye|see you|ok(ay)?|cool|great|"
+    r"how are you( doing)?( today)?|how('s| is) it going|what'?s up|nice to meet you)"
+    r"([\s,]+(there|bot|assistant|again|mate|friend))?\W*$",
+    re.IGNORECASE,
+)
+
+_HELP_RE = re.compile(
+    r"\b(what can (you|i) (do|ask)|what do you do|how (do|can) i use|how does this work|"
+    r"what (kind of|sort of|type of)? ?questions|help me|^\W*help\W*$|what are you|who are you|"
+    r"what should i ask|give me (some )?examples|show me examples)\b",
+    re.IGNORECASE,
+)
+
+# Forecast verbs: enough on their own to call a data question a forecast
+_FORECAST_RE = re.compile(
+    r"\b(forecast\w*|predict\w*|projection|projected|extrapolat\w*)\b",
+    re.IGNORECASE,
+)
+
+# Future periods and future tense ("next month", "upcoming", "what will the loss
+# ratio be"); a forecast unless they qualify a date the tables already store
+_FUTURE_RE = re.compile(
+    r"\b(future|upcoming|next (week|month|quarter|year|\d+ (weeks|months|quarters|years))|"
+    r"will (\w+ ){0,4}?(be|look|grow|rise|fall|increase|decrease|change))\b",
+    re.IGNORECASE,
+)
+
+# Stored future-dated facts: "policies expiring in 2027", "renewals next month"
+# and "end_date in 2027" are lookups, not predictions
+_STORED_DATE_RE = re.compile(r"\b(end_date|expir\w*|renew\w*|matur\w*|due)\b", re.IGNORECASE)
+
+# "trend", "estimated", ... also describe history ("claims trend for 2023",
+# "total reserve estimated per peril"), so without a future marker they are
+# left to the naive-Bayes model / LLM
+_WEAK_FORECAST_RE = re.compile(r"\b(trend\w*|estimat\w*|project)\b", re.IGNORECASE)
+
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+
+_OFFTOPIC_RE = re.compile(
+    r"\b(joke|recipe|football|soccer|movie|film|song|lyrics|poem|capital of|"
+    r"president|bitcoin|stock price|horoscope|translate)\b",
+    re.IGNORECASE,
+)
+
+# Off-topic on its own, but also a peril/risk word ("weather-related claims")
+_AMBIGUOUS_OFFTOPIC_RE = re.compile(r"\b(weather)\b", re.IGNORECASE)
+
+
+def _mentions_future(question: str) -> bool:
+    this_year = date.today().year
+    return bool(_FUTURE_RE.search(question)) or any(
+        int(m.group(0)) > this_year for m in _YEAR_RE.finditer(question)
+    )
+
+
+def _rule_intent(question: str, tokens: Iterable[str]) -> Optional[str]:
+    """Deterministic rules; returns None when the message is not obvious."""
+    if _OFFTOPIC_RE.search(question):
+        # "tell me a joke about claims" is still a joke
+        return "offtopic"
+    has_schema = any(t in SCHEMA_TERMS for t in tokens)
+    if has_schema:
+        if _FORECAST_RE.search(question):
+            return "forecast"
+        if _mentions_future(question):
+            return None if _STORED_DATE_RE.search(question) else "forecast"
+        if _WEAK_FORECAST_RE.search(question) or _AMBIGUOUS_OFFTOPIC_RE.search(question):
+            return None
+        return "data"
+    if _SMALLTALK_RE.match(question):
+        return "smalltalk"
+    if _HELP_RE.search(question):
+        return "help"
+    if _AMBIGUOUS_OFFTOPIC_RE.search(question):
+        return "offtopic"
+    return None
+
+
+# -------------------------
+# Naive Bayes
+# -------------------------
+
+# Small labelled set; extend it from the RAG logs when the LLM fallback fires too often.
+TRAINING_EXAMPLES: List[Tuple[str, str]] = [
+    ("hi", "smalltalk"),
+    ("hello there", "smalltalk"),
+    ("hey how are you", "smalltalk"),
+    ("good morning", "smalltalk"),
+    ("thank you very much", "smalltalk"),
+    ("thanks that was helpful", "smalltalk"),
+    ("nice work appreciate it", "smalltalk"),
+    ("how is your day going", "smalltalk"),
+    ("you are awesome", "smalltalk"),
+    ("see you later bye", "smalltalk"),
+    ("what can you do", "help"),
+    ("how do i use this assistant", "help"),
+    ("what questions can i ask you", "help"),
+    ("can you help me get started", "help"),
+    ("show me some example questions", "help"),
+    ("what kind of insights do you provide", "help"),
+    ("how does this dashboard work", "help"),
+    ("i need help what are my options", "help"),
+    ("what information do you have access to", "help"),
+    ("tell me a joke", "offtopic"),
+    ("what is the weather like tomorrow", "offtopic"),
+    ("who won the football match yesterday", "offtopic"),
+    ("write me a poem about the sea", "offtopic"),
+    ("what is the capital of france", "offtopic"),
+    ("recommend a good movie to watch", "offtopic"),
+    ("how do i cook pasta", "offtopic"),
+    ("what is the price of bitcoin today", "offtopic"),
+    ("who is the president of the united states", "offtopic"),
+    ("how many claims were paid in 2024", "data"),
+    ("total gross premium by product type", "data"),
+    ("list active policies in cluj", "data"),
+    ("average settlement days per month", "data"),
+    ("which county has the most claims", "data"),
+    ("show open claims older than 90 days", "data"),
+    ("how many customers do we have", "data"),
+    ("loss ratio by month for 2023", "data"),
+    ("top 10 customers by premium", "data"),
+    ("breakdown of policies by channel", "data"),
+    ("how much did we pay out last quarter", "data"),
+    ("what was the retention rate in march", "data"),
+    ("how did claims trend over the last year", "data"),
+    ("estimated reserve by product type", "data"),
+    ("forecast claims for next month", "forecast"),
+    ("predict the loss ratio next year", "forecast"),
+    ("what will premiums look like next quarter", "forecast"),
+    ("estimate future claim volume", "forecast"),
+    ("project gwp growth for the next 6 months", "forecast"),
+    ("how will the claims frequency trend in the coming months", "forecast"),
+    ("will there be more flood claims next year", "forecast"),
+    ("expected number of policies in 2026", "forecast"),
+]
+
+# Minimum posterior probability for a naive-Bayes answer to be trusted
+NB_MIN_CONFIDENCE = 0.85
+
+
+class NaiveBayesIntent:
+    """Multinomial naive Bayes over stemmed unigrams with Laplace smoothing."""
+
+    def __init__(self, examples: Iterable[Tuple[str, str]], alpha: float = 1.0) -> None:
+        self.alpha = alpha
+        self.word_counts: Dict[str, Counter] = {}
+        self.label_counts: Counter = Counter()
+        for text, label in examples:
+            self.label_counts[label] += 1
+            self.word_counts.setdefault(label, Counter()).update(_tokens(text))
+        self.vocab: Set[str] = set().union(*self.word_counts.values()) if self.word_counts else set()
+        self.totals = {label: sum(c.values()) for label, c in self.word_counts.items()}
+        n = sum(self.label_counts.values())
+        self.log_prior = {label: math.log(c / n) for label, c in self.label_counts.items()}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Posterior per label; words never seen in training are ignored."""
+        tokens = [t for t in _tokens(text) if t in self.vocab]
+        v = len(self.vocab)
+        scores = {}
+        for label, prior in self.log_prior.items():
+            counts, denom = self.word_counts[label], self.totals[label] + self.alpha * v
+            scores[label] = prior + sum(math.log((counts[t] + self.alpha) / denom) for t in tokens)
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        z = sum(exp.values())
+        return {label: e / z for label, e in exp.items()}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        proba = self.predict_proba(text)
+        label = max(proba, key=proba.get)  # type: ignore[arg-type]
+        return label, proba[label]
+
+
+_MODEL = NaiveBayesIntent(TRAINING_EXAMPLES)
+
+
+# -------------------------
+# Public API
+# -------------------------
+
+def classify_local(question: str) -> Tuple[Optional[str], str]:
+    """
+    Classify without any network call.
+
+    Returns (intent, source) where source is 'rules' or 'nb'; intent is None
+    when the local classifier is not confident and the LLM should decide.
+    """
+    tokens = _tokens(question)
+    if not tokens:
+        return "unknown", "rules"
+    intent = _rule_intent(question, tokens)
+    if intent:
+        return intent, "rules"
+    if not any(t in _MODEL.vocab for t in tokens):
+        return None, "nb"
+    label, p = _MODEL.predict(question)
+    return (label if p >= NB_MIN_CONFIDENCE else None), "nb"
+
+
 def detect_intent(question: str) -> str:
-    """Returns 'smalltalk', 'data', 'help', 'offtopic', or 'unknown'"""
+    """Returns 'smalltalk', 'data', 'help', 'forecast', 'offtopic', or 'unknown'"""
+    if os.getenv("RAG_INTENT_LOCAL", "1") != "0":
+        intent, _source = classify_local(question)
+        if intent:
+            return intent
+    return _detect_intent_llm(question)
+
+
+def _detect_intent_llm(question: str) -> str:
     from openai import OpenAI  # type: ignore
-    import os
 
     client = OpenAI(api_key=(os.getenv("OPENAI_API_KEY") or "").strip())
     resp = client.chat.completions.create(
@@ -14,7 +305,7 @@ def detect_intent(question: str) -> str:
                     "Return ONLY ONE of the following labels:\n"
                     "- 'smalltalk': If it's a greeting or friendly message directed at the assistant.\n"
                     "- 'help': If it's asking what the assistant can do, how to use it, or general assistance.\n"
-                    "- 'data': If it's asking for insurance-related info (claims, policies, customers, metrics).\n"
+                    "- 'data': If it's asking for insurance-related info (claims, policies, customers, metrics), including already-scheduled future dates such as policies expiring or renewing next month.\n"
                     "- 'forecast': If the user is asking for a prediction, trend, or future estimate (e.g., 'predict', 'forecast', 'trend', 'estimate', 'project').\n"
                     "- 'offtopic': If it’s asking about unrelated things like weather, jokes, general trivia, etc.\n"
                     "- 'unknown': If unclear."
@@ -0,0 +1,359 @@
+# backend/AI/LLM/plan_cache.py
+
+"""
+Persistent Question → Plan cache in front of the LLM planner.
+
+Questions are normalized before lookup: case-folded, whitespace-collapsed and
+with literals (quoted names, ISO dates, numbers) lifted into slots, so
+"Total claims paid in 2024?" and "total claims paid in 2023" share one entry.
+
+On a store the validated plan is turned into a template by replacing each
+slot's value with a placeholder; a hit re-fills the template with the new
+question's literals and re-validates it as a `dsl.Plan`. Only filter values
+and the limit are templated. Plans are never cached when they leave a literal
+of the question unused or use it in several places (a changed literal would
+be silently ignored or applied twice), or when their filters hold dates or
+numbers the question didn't spell out ("last month" resolved to fixed dates
+would go stale).
+
+Entries live in SQLite (RAG_PLAN_CACHE_PATH) with a TTL (RAG_PLAN_CACHE_TTL_S)
+and an LRU size bound (RAG_PLAN_CACHE_SIZE, 0 disables the cache).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .dsl import Plan
+
+PLAN_CACHE_PATH = os.getenv(
+    "RAG_PLAN_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "plan_cache.sqlite3")
+)
+PLAN_CACHE_TTL_S = int(os.getenv("RAG_PLAN_CACHE_TTL_S", str(7 * 24 * 3600)))
+PLAN_CACHE_SIZE = int(os.getenv("RAG_PLAN_CACHE_SIZE", "5000"))
+
+Slot = Tuple[str, str]  # (kind, raw value); kind is 's' (quoted), 'd' (date) or 'n' (number)
+
+
+# -------------------------
+# Normalization
+# -------------------------
+
+_LITERAL_RE = re.compile(
+    r"(?<!\w)[\"“„']([^\"“”„']+)[\"”“'](?!\w)"   # quoted name
+    r"|(?<![\w-])(\d{4}-\d{2}-\d{2})(?![\w-])"   # ISO date
+    r"|(?<![\w.])(\d+(?:\.\d+)?)(?!\w|\.\d)"     # number
+)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> Tuple[str, List[Slot]]:
+    """
+    Returns (normalized text, slots), e.g.
+      'Claims for "Ion Popescu" in 2024?' → ('claims for <s0> in <n1>', [('s', 'Ion Popescu'), ('n', '2024')])
+    """
+    slots: List[Slot] = []
+
+    def _lift(m: "re.Match[str]") -> str:
+        kind, raw = next((k, v) for k, v in zip("sdn", m.groups()) if v is not None)
+        slots.append((kind, raw))
+        return f" <{kind}{len(slots) - 1}> "
+
+    text = _LITERAL_RE.sub(_lift, question)
+    text = _SPACE_RE.sub(" ", text.casefold()).strip(" ?!.")
+    return text, slots
+
+
+# -------------------------
+# Plan templates
+# -------------------------
+
+_NUM_MARKER_RE = re.compile(r"^\{\{#(\d+)\}\}$")
+_STR_MARKER_RE = re.compile(r"\{\{(\d+)\}\}")
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _as_number(raw: str) -> float | int:
+    return float(raw) if "." in raw else int(raw)
+
+
+def _slot_pattern(slots: List[Slot]) -> "re.Pattern[str]":
+    # One alternation, longest values first, so a single pass never rewrites a placeholder
+    parts = []
+    for i in sorted(range(len(slots)), key=lambda i: -len(slots[i][1])):
+        kind, raw = slots[i]
+        body = re.escape(raw) if kind == "s" else rf"(?<!\d){re.escape(raw)}(?!\d)"
+        parts.append(f"(?P<s{i}>{body})")
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+
+def _templatize(value: Any, slots: List[Slot], pattern: "re.Pattern[str]", used: Set[int]) -> Any:
+    if isinstance(value, dict):
+        return {k: _templatize(v, slots, pattern, used) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_templatize(v, slots, pattern, used) for v in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        for i, (kind, raw) in enumerate(slots):
+            if kind == "n" and _as_number(raw) == value:
+                used.add(i)
+                return f"{{{{#{i}}}}}"
+        return value
+    if isinstance(value, str) and slots:
+        def _mark(m: "re.Match[str]") -> str:
+            i = int(m.lastgroup[1:])  # type: ignore[index]
+            used.add(i)
+            return f"{{{{{i}}}}}"
+        return pattern.sub(_mark, value)
+    return value
+
+
+def _fill(value: Any, slots: List[Slot]) -> Any:
+    if isinstance(value, dict):
+        return {k: _fill(v, slots) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, slots) for v in value]
+    if isinstance(value, str):
+        m = _NUM_MARKER_RE.match(value)
+        if m:
+            return _as_number(slots[int(m.group(1))][1])
+        return _STR_MARKER_RE.sub(lambda m: slots[int(m.group(1))][1], value)
+    return value
+
+
+def _has_free_literal(value: Any) -> bool:
+    """True if a templated value still holds a number/date that no slot produced."""
+    if isinstance(value, dict):
+        return any(_has_free_literal(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_free_literal(v) for v in value)
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if isinstance(value, str):
+        return any(ch.isdigit() for ch in value) and not _STR_MARKER_RE.search(value) \
+            and not _NUM_MARKER_RE.match(value)
+    return False
+
+
+def make_template(plan_dict: Dict[str, Any], slots: List[Slot]) -> Optional[Dict[str, Any]]:
+    """
+    Replace slot values in a plan with placeholders. Only filter values and
+    the limit are templated. Returns None when the plan can't be re-used safely:
+      - a literal is repeated in the question, unused, or used in more than
+        one spot (two filters, or a filter and the limit)
+      - a slot value also shows up outside filter values/limit
+      - a filter value holds a number or date no slot produced, e.g. the
+        planner resolved "last month" to fixed dates
+      - the template does not reproduce the original plan
+    """
+    if len({raw.casefold() for _, raw in slots}) != len(slots):
+        return None
+    pattern = _slot_pattern(slots) if slots else re.compile(r"(?!)")
+    spots: Dict[int, Set[str]] = {}
+    template = dict(plan_dict)
+    rest: List[Any] = [{k: v for k, v in plan_dict.items() if k not in ("filters", "limit")}]
+
+    filters = []
+    for j, f in enumerate(plan_dict.get("filters") or []):
+        if not isinstance(f, dict):
+            return None
+        used: Set[int] = set()
+        val = _templatize(f.get("val"), slots, pattern, used)
+        if _has_free_literal(val):
+            return None
+        for i in used:
+            spots.setdefault(i, set()).add(f"filters[{j}]")
+        rest.append({k: v for k, v in f.items() if k != "val"})
+        filters.append({**f, "val": val})
+    if "filters" in plan_dict:
+        template["filters"] = filters
+
+    if "limit" in plan_dict:
+        used = set()
+        template["limit"] = _templatize(plan_dict["limit"], slots, pattern, used)
+        for i in used:
+            spots.setdefault(i, set()).add("limit")
+
+    if len(spots) != len(slots) or any(len(where) > 1 for where in spots.values()):
+        return None
+    rest_txt = json.dumps(rest, ensure_ascii=False)
+    if pattern.search(rest_txt) or _ISO_DATE_RE.search(rest_txt):
+        return None
+    if json.dumps(_fill(template, slots), sort_keys=True) != json.dumps(plan_dict, sort_keys=True):
+        # e.g. a quoted name the planner rewrote in a different case
+        return None
+    return template
+
+
+_DATE_SHAPE_RE = re.compile(r"\d+-\d+-\d+")
+
+
+def _valid_dates(template: Any, filled: Any) -> bool:
+    """
+    A re-filled slot can produce impossible dates: 2023-02-29 from a year, or
+    12-01-01 from a number slot in a '{{1}}-01-01' template. Every filled string
+    shaped like a date must be a real ISO date.
+    """
+    if isinstance(template, dict):
+        return all(_valid_dates(v, filled[k]) for k, v in template.items())
+    if isinstance(template, list):
+        return all(_valid_dates(t, f) for t, f in zip(template, filled))
+    if isinstance(filled, str) and _DATE_SHAPE_RE.fullmatch(filled):
+        if not _ISO_DATE_RE.fullmatch(filled):
+            return False
+        try:
+            date.fromisoformat(filled)
+        except ValueError:
+            return False
+    return True
+
+
+# -------------------------
+# SQLite store
+# -------------------------
+
+class PlanCache:
+    """SQLite-backed map of normalized question -> plan template, with TTL and LRU bound."""
+
+    def __init__(self, path: str, ttl_s: int, maxsize: int):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS plans (
+                    key        TEXT PRIMARY KEY,
+                    question   TEXT NOT NULL,
+                    template   TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used  REAL NOT NULL,
+                    hits       INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS plans_last_used ON plans (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(normalized: str, namespace: str) -> str:
+        return hashlib.sha256(f"{namespace}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, question: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        """Return a validated, re-filled plan dict for `question`, or None on a miss."""
+        if self.maxsize <= 0:
+            return None
+        normalized, slots = normalize_question(question)
+        key = self._key(normalized, namespace)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT template, created_at FROM plans WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_s:
+                db.execute("DELETE FROM plans WHERE key = ?", (key,))
+                db.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            template = json.loads(row[0])
+            plan_dict = _fill(template, slots)
+            try:
+                if not _valid_dates(template, plan_dict):
+                    raise ValueError("invalid date after re-filling slots")
+                Plan(**plan_dict)
+            except Exception:
+                self.misses += 1
+                return None
+            db.execute("UPDATE plans SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            db.commit()
+            self.hits += 1
+            return plan_dict
+
+    def put(self, question: str, plan_dict: Dict[str, Any], namespace: str = "") -> bool:
+        """Store a plan if it validates and templates cleanly; returns True when stored."""
+        if self.maxsize <= 0:
+            return False
+        try:
+            Plan(**plan_dict)
+        except Exception:
+            return False
+        normalized, slots = normalize_question(question)
+        template = make_template(plan_dict, slots)
+        if template is None:
+            return False
+        key = self._key(normalized, namespace)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO plans (key, question, template, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                (key, normalized, json.dumps(template, ensure_ascii=False), now, now),
+            )
+            self.expired += db.execute("DELETE FROM plans WHERE created_at < ?", (now - self.ttl_s,)).rowcount
+            overflow = db.execute("SELECT COUNT(*) FROM plans").fetchone()[0] - self.maxsize
+            if overflow > 0:
+                db.execute(
+                    "DELETE FROM plans WHERE key IN (SELECT key FROM plans ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            db.commit()
+            self.stores += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM plans")
+            db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size, lifetime_hits = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM plans"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "stored_entry_hits": lifetime_hits,
+            }
+
+
+plan_cache = PlanCache(PLAN_CACHE_PATH, PLAN_CACHE_TTL_S, PLAN_CACHE_SIZE)
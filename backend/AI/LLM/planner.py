@@ -7,11 +7,14 @@ This module turns a user's natural-language question into a STRICT JSON Plan
 that matches `dsl.Plan`. It *does not* execute SQL and contains no secrets
 beyond reading OPENAI_API_KEY from env via the OpenAI SDK.
 
-Returns: (plan_dict, {"llm_latency_ms": int, "token_usage": {...}})
+Repeat questions are answered from `plan_cache` without calling the LLM.
+
+Returns: (plan_dict, {"llm_latency_ms": int, "token_usage": {...}, "plan_cache": "hit"|"store"|"miss"})
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import time
@@ -21,6 +24,7 @@ from openai import OpenAI # type: ignore
 
 from .schema import ALLOWED_VIEWS, JOIN_RULES, ALLOWED_OPERATORS, DEFAULT_LIMIT, MAX_LIMIT
 from .example_plans import EXAMPLE_PLAN
+from .plan_cache import plan_cache
 
 
 # -------------------------
@@ -104,6 +108,16 @@ Return ONLY a JSON object with keys:
 Return ONLY the JSON. No prose, no markdown, no extra keys.
 """
 
+# Plans cached under one prompt/schema/model must not be served after any of them changes.
+_PROMPT_FINGERPRINT = hashlib.sha256(
+    "\n".join([SYSTEM_PROMPT, _schema_summary(), json.dumps(EXAMPLE_PLAN, sort_keys=True)]).encode("utf-8")
+).hexdigest()[:16]
+
+
+def _cache_namespace() -> str:
+    return f"{_PROMPT_FINGERPRINT}:{os.environ.get('RAG_PLANNER_MODEL', 'gpt-4o-mini')}"
+
+
 # -------------------------
 # Public API
 # -------------------------
@@ -115,6 +129,16 @@ def build_plan_from_nl(question: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     Raises:
         Exception if the model output is not valid JSON or fails to parse.
     """
+    namespace = _cache_namespace()
+    cached = plan_cache.get(question, namespace)
+    if cached is not None:
+        return cached, {
+            "llm_latency_ms": 0,
+            "token_usage": {},
+            "model": os.environ.get("RAG_PLANNER_MODEL"),
+            "plan_cache": "hit",
+        }
+
     client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
     t0 = time.time()
 
@@ -159,5 +183,6 @@ def build_plan_from_nl(question: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         "llm_latency_ms": round((time.time() - t0) * 1000),
         "token_usage": token_usage,
         "model": os.environ.get("RAG_PLANNER_MODEL"),
+        "plan_cache": "store" if plan_cache.put(question, plan_dict, namespace) else "miss",
     }
     return plan_dict, meta
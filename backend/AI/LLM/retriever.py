@@ -145,7 +145,8 @@ def answer_question(
             "contains_pii": plan.contains_pii,
             "user_id": user_id,
             "total_latency_ms": total_ms,
-            "model": llm_meta.get("model")
+            "model": llm_meta.get("model"),
+            "plan_cache": llm_meta.get("plan_cache"),
         }
         summary_text = summary_result.get("summary", "[no summary]")
         rag_logger.info(
@@ -203,7 +204,8 @@ def answer_question(
         "contains_pii": plan.contains_pii,
         "user_id": user_id,
         "total_latency_ms": total_ms,
-        "model": llm_meta.get("model")
+        "model": llm_meta.get("model"),
+        "plan_cache": llm_meta.get("plan_cache"),
 
     }
     summary_text = summary_result.get("summary", "[no summary]")
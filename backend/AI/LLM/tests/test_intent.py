@@ -0,0 +1,82 @@
+from backend.AI.LLM import intent
+from backend.AI.LLM.intent import NaiveBayesIntent, classify_local, detect_intent
+
+
+def _no_llm(_q):
+    raise AssertionError("LLM fallback should not be called")
+
+
+def test_obvious_messages_are_settled_locally(monkeypatch):
+    monkeypatch.setattr(intent, "_detect_intent_llm", _no_llm)
+    assert detect_intent("Hi there!") == "smalltalk"
+    assert detect_intent("thanks a lot") == "smalltalk"
+    assert detect_intent("What can you do?") == "help"
+    assert detect_intent("What type of questions can I ask?") == "help"
+    assert detect_intent("tell me a joke") == "offtopic"
+    assert detect_intent("How many active policies by product type?") == "data"
+    assert detect_intent("gross_premium by channel for 2024") == "data"
+    assert detect_intent("forecast claims for next quarter") == "forecast"
+
+
+def test_schema_columns_win_over_smalltalk_and_help():
+    assert classify_local("hello, show me open claims by county") == ("data", "rules")
+    assert classify_local("what can you tell me about loss_ratio?") == ("data", "rules")
+
+
+def test_ambiguous_message_falls_back_to_llm(monkeypatch):
+    calls = []
+    monkeypatch.setattr(intent, "_detect_intent_llm", lambda q: calls.append(q) or "unknown")
+    assert classify_local("how was your weekend")[0] is None
+    assert detect_intent("how was your weekend") == "unknown"
+    assert calls == ["how was your weekend"]
+
+
+def test_local_path_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("RAG_INTENT_LOCAL", "0")
+    monkeypatch.setattr(intent, "_detect_intent_llm", lambda _q: "data")
+    assert detect_intent("hi") == "data"
+
+
+def test_naive_bayes_posteriors():
+    model = NaiveBayesIntent([
+        ("hello friend", "smalltalk"),
+        ("good morning friend", "smalltalk"),
+        ("tell me a joke", "offtopic"),
+        ("weather tomorrow", "offtopic"),
+    ])
+    proba = model.predict_proba("morning friend")
+    assert abs(sum(proba.values()) - 1.0) < 1e-9
+    label, p = model.predict("morning friend")
+    assert label == "smalltalk" and p > 0.8
+
+
+def test_historical_trend_and_estimate_questions_are_not_forecasts(monkeypatch):
+    monkeypatch.setattr(intent, "_detect_intent_llm", lambda _q: "data")
+    for q in ("show me the monthly claims trend for 2023", "total reserve estimated per peril"):
+        assert classify_local(q)[0] != "forecast"
+        assert detect_intent(q) == "data"
+
+
+def test_future_markers_make_a_forecast():
+    assert classify_local("estimate claims for next year") == ("forecast", "rules")
+    assert classify_local("how many policies will there be in 2999") == ("forecast", "rules")
+
+
+def test_offtopic_words_win_over_schema_terms():
+    assert classify_local("tell me a joke about claims") == ("offtopic", "rules")
+
+
+def test_stored_future_dates_are_not_forecasts(monkeypatch):
+    monkeypatch.setattr(intent, "_detect_intent_llm", lambda _q: "data")
+    for q in (
+        "policies expiring in 2027",
+        "list policies with end_date in 2027",
+        "policies renewing next month",
+    ):
+        assert classify_local(q)[0] != "forecast"
+        assert detect_intent(q) == "data"
+
+
+def test_future_tense_makes_a_forecast():
+    assert classify_local("what will the loss ratio be") == ("forecast", "rules")
+    assert classify_local("forecast renewals next month") == ("forecast", "rules")
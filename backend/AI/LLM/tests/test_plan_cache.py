@@ -0,0 +1,107 @@
+from backend.AI.LLM.plan_cache import PlanCache, make_template, normalize_question
+
+
+def _paid_in_year(year):
+    return {
+        "view": "claims",
+        "select": [],
+        "filters": [{"col": "claims.loss_date", "op": "BETWEEN", "val": [f"{year}-01-01", f"{year}-12-31"]}],
+        "joins": [],
+        "group_by": [],
+        "aggregations": ["sum(claims.paid) as total_paid"],
+        "order_by": [],
+        "limit": 1,
+    }
+
+
+def test_normalize_lifts_literals_and_folds_case():
+    text, slots = normalize_question('  Total claims   paid for "Ion Popescu" in 2024? ')
+    assert text == "total claims paid for <s0> in <n1>"
+    assert slots == [("s", "Ion Popescu"), ("n", "2024")]
+    assert normalize_question("Claims since 2024-03-01.")[1] == [("d", "2024-03-01")]
+    assert normalize_question("what's the customer's premium")[1] == []
+
+
+def test_hit_refills_slots(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite3"), ttl_s=3600, maxsize=10)
+    assert cache.get("total claims paid in 2024") is None
+    assert cache.put("total claims paid in 2024", _paid_in_year(2024))
+
+    assert cache.get("Total claims paid in 2024?") == _paid_in_year(2024)
+    assert cache.get("total  claims paid in 2023") == _paid_in_year(2023)
+    assert cache.get("total claims paid in 2023", namespace="other-model") is None
+
+    stats = cache.stats()
+    assert stats["size"] == 1 and stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_refilled_non_iso_date_is_a_miss(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite3"), ttl_s=3600, maxsize=10)
+    assert cache.put("total claims paid in 2024", _paid_in_year(2024))
+    # '{{1}}-01-01' filled with 12 gives '12-01-01', which the executor can't use
+    assert cache.get("total claims paid in 12") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_numeric_slot_keeps_its_type(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite3"), ttl_s=3600, maxsize=10)
+    plan = {"view": "customers", "select": ["customers.full_name"], "limit": 10}
+    assert cache.put("top 10 customers", plan)
+    assert cache.get("top 25 customers")["limit"] == 25
+
+
+def test_unused_or_repeated_literals_are_not_cached():
+    plan = _paid_in_year(2024)
+    # 30 does not appear in the plan, so a different number would be silently ignored
+    assert make_template(plan, normalize_question("claims paid in 2024 older than 30 days")[1]) is None
+    assert make_template(plan, normalize_question("claims paid in 2024 vs 2024")[1]) is None
+
+
+def test_ttl_and_size_bound(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite3"), ttl_s=3600, maxsize=2)
+    for view in ("claims", "policies", "customers"):
+        assert cache.put(f"list {view}", {"view": view, "limit": 5})
+    assert cache.stats()["size"] == 2 and cache.evictions == 1
+    assert cache.get("list claims") is None  # least recently used went first
+
+    cache.ttl_s = -1
+    assert cache.get("list customers") is None
+    assert cache.expired == 1
+
+
+def test_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / "plans.sqlite3")
+    PlanCache(path, ttl_s=3600, maxsize=10).put("list policies", {"view": "policies", "limit": 5})
+    assert PlanCache(path, ttl_s=3600, maxsize=10).get("List policies") is not None
+
+
+def test_relative_dates_resolved_by_the_planner_are_not_cached(tmp_path, monkeypatch):
+    cache = PlanCache(str(tmp_path / "plans.sqlite3"), ttl_s=30 * 86400, maxsize=10)
+    last_month = {
+        "view": "claims",
+        "filters": [{"col": "claims.loss_date", "op": "BETWEEN", "val": ["2026-09-01", "2026-09-30"]}],
+        "aggregations": ["count(*) as claims"],
+        "limit": 1,
+    }
+    monkeypatch.setattr("backend.AI.LLM.plan_cache.time.time", lambda: 1_791_000_000.0)  # 2026-10-03
+    assert not cache.put("claims last month", last_month)
+    monkeypatch.setattr("backend.AI.LLM.plan_cache.time.time", lambda: 1_794_000_000.0)  # 2026-11-07
+    assert cache.get("claims last month") is None
+
+
+def test_slot_matching_limit_and_filter_is_not_cached():
+    plan = {
+        "view": "claims",
+        "filters": [{"col": "claims.paid", "op": ">", "val": 100}],
+        "limit": 100,
+    }
+    assert make_template(plan, normalize_question("claims paid over 100")[1]) is None
+    plan["limit"] = 50
+    template = make_template(plan, normalize_question("claims paid over 100")[1])
+    assert template["filters"][0]["val"] == "{{#0}}" and template["limit"] == 50
+
+
+def test_slot_value_outside_filters_is_not_cached():
+    plan = {"view": "backlog_by_age_bucket", "select": ["region_key", "bucket_90_plus"], "limit": 50}
+    assert make_template(plan, normalize_question("open claims older than 90 days")[1]) is None
@@ -0,0 +1,346 @@
+# backend/app/cache.py
+"""
+In-process response cache for the mart-backed dashboard routers.
+
+Every entry remembers the "mart generation" it was computed under. A refresh
+through /api/admin/refresh_marts bumps the generation right away; changes made
+outside this process (scripts/refresh_marts.py, the blue/green swap in
+scripts/rebuild_analytics.py, other API workers) are picked up by a background
+watcher that polls a cheap database version every MART_VERSION_POLL_S seconds.
+Older entries are dropped the next time they are read, and RESPONSE_CACHE_TTL_S
+bounds how long any entry is served if the database can't be polled.
+ETags for conditional GETs hash the same database version, so they agree across
+API workers and restarts and change with out-of-process refreshes too.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response # type: ignore
+from sqlalchemy import text
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "600"))
+MART_VERSION_POLL_S = float(os.getenv("MART_VERSION_POLL_S", "5"))
+# SINGLE_FLIGHT=0 sends every fetch_all to the database (benchmarks, debugging).
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "1").strip().lower() not in ("0", "false", "no")
+
+_MISSING = object()
+
+# -------------------------
+# Mart generation
+# -------------------------
+
+# Changes whenever any mart is refreshed (marts.refresh_fingerprint, written by
+# app.refresh from any process) or the marts schema is swapped (new namespace oid).
+MART_VERSION_SQL = """
+SELECT to_regnamespace('marts')::oid::text || '/' ||
+       COALESCE((SELECT max(refreshed_at)::text FROM marts.refresh_fingerprint), '')
+"""
+
+# Generations restart at 0 with the process, so the fallback ETag token also
+# carries a per-process epoch; it can never match one issued after a restart.
+_EPOCH = uuid.uuid4().hex[:8]
+
+_generation = 0
+_db_version: Optional[str] = None
+_generation_lock = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+
+
+def read_mart_version() -> Optional[str]:
+    """Database-derived marts version, or None if it can't be read right now."""
+    from .db import engine  # app.db imports this module
+
+    try:
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass('marts.refresh_fingerprint')")).scalar() is None:
+                return str(conn.execute(text("SELECT to_regnamespace('marts')::oid")).scalar())
+            return conn.execute(text(MART_VERSION_SQL)).scalar()
+    except Exception:
+        return None
+
+
+def sync_mart_generation() -> int:
+    """Bump the generation if the marts changed outside this process."""
+    global _generation, _db_version
+    version = read_mart_version()
+    with _generation_lock:
+        if version is not None and version != _db_version:
+            if _db_version is not None:
+                _generation += 1
+            _db_version = version
+        return _generation
+
+
+def _watch() -> None:
+    while True:
+        sync_mart_generation()
+        time.sleep(MART_VERSION_POLL_S)
+
+
+def _ensure_watcher() -> None:
+    global _watcher
+    if _watcher is not None or MART_VERSION_POLL_S <= 0:
+        return
+    with _generation_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name="mart-version", daemon=True)
+            _watcher.start()
+
+
+def mart_generation() -> int:
+    _ensure_watcher()
+    return _generation
+
+
+def mart_version() -> str:
+    """
+    Freshness token for ETags: the database-derived version, identical across
+    API workers and restarts; the process-local generation until it is known.
+    """
+    generation = mart_generation()
+    return _db_version if _db_version is not None else f"{_EPOCH}:{generation}"
+
+
+def bump_mart_generation() -> int:
+    """Called after the marts were refreshed; invalidates every cached response."""
+    global _generation, _db_version
+    # adopt the refresh's own database version so the watcher doesn't bump again
+    version = read_mart_version()
+    with _generation_lock:
+        _generation += 1
+        if version is not None:
+            _db_version = version
+        return _generation
+
+
+# -------------------------
+# LRU cache
+# -------------------------
+
+class ResponseCache:
+    """Size-bounded LRU map of (route, params) -> (generation, stored_at, response)."""
+
+    def __init__(self, maxsize: int, ttl_s: float = RESPONSE_CACHE_TTL_S):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, generation: int) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            # the TTL is a backstop for changes the version watcher can't see
+            if entry is None or entry[0] != generation or time.monotonic() - entry[1] > self.ttl_s:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "mart_generation": mart_generation(),
+                "mart_version": _db_version,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+
+# -------------------------
+# Route decorator
+# -------------------------
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def cached(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Cache a router endpoint's return value keyed by (route, normalized params).
+    Put it *below* @router.get so FastAPI still sees the original signature.
+    """
+    route = f"{fn.__module__}.{fn.__name__}"
+    sig = inspect.signature(fn)
+
+    def _key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (route, tuple(sorted((k, _normalize(v)) for k, v in bound.arguments.items())))
+
+    # Capture the generation *before* querying so a refresh that lands
+    # mid-request leaves the entry stale instead of mislabelled.
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = _key(args, kwargs)
+            generation = mart_generation()
+            hit = response_cache.get(key, generation)
+            if hit is not _MISSING:
+                return hit
+            value = await fn(*args, **kwargs)
+            response_cache.put(key, generation, value)
+            return value
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        key = _key(args, kwargs)
+        generation = mart_generation()
+        hit = response_cache.get(key, generation)
+        if hit is not _MISSING:
+            return hit
+        value = fn(*args, **kwargs)
+        response_cache.put(key, generation, value)
+        return value
+
+    return wrapper
+
+
+# -------------------------
+# Single-flight query coalescing
+# -------------------------
+
+class SingleFlight:
+    """
+    Collapse concurrent identical queries into one in-flight execution.
+
+    The first caller for a key starts the query as its own task; everyone who
+    asks for the same key before it finishes awaits that task instead. The task
+    is shielded, so a leader whose client disconnects does not cancel the query
+    for the followers. Nothing is kept after completion (that is the response
+    cache's job), so this only bounds concurrency during a thundering herd.
+    With enabled=False every call simply runs `fn`.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            self.executions += 1
+            return await fn()
+        # tasks are bound to their event loop, so the loop is part of the key
+        key = (asyncio.get_running_loop(), key)
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.executions + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / requests, 4) if requests else None,
+        }
+
+
+single_flight = SingleFlight(SINGLE_FLIGHT)
+
+
+def query_key(sql: Any, params: Dict[str, Any]) -> Hashable:
+    return (str(sql), tuple(sorted((k, _normalize(v)) for k, v in params.items())))
+
+
+# -------------------------
+# Conditional GET (ETag / 304)
+# -------------------------
+
+# Prefixes served straight from the marts; everything else passes through.
+MART_ROUTE_PREFIXES = (
+    "/api/overview/",
+    "/api/claims/",
+    "/api/risk/",
+    "/api/ops/",
+    "/api/c360/",
+    "/api/marts/",
+)
+
+def etag_for(path: str, query_items: Iterable[Tuple[str, str]]) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(query_items))
+    raw = f"{mart_version()}:{path}?{query}"
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def conditional_get(request: Request, call_next):
+    """
+    Middleware: tag mart-backed GETs and answer a matching If-None-Match with
+    304 before the endpoint runs (no DB query, no response serialization).
+    """
+    if request.method != "GET" or not request.url.path.startswith(MART_ROUTE_PREFIXES):
+        return await call_next(request)
+
+    etag = etag_for(request.url.path, request.query_params.multi_items())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
@@ -1,5 +1,99 @@
 import os
+from typing import Any, AsyncIterator, Dict, Iterator, List, Sequence, Tuple
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import RowMapping, make_url
+from sqlalchemy.sql.elements import TextClause
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from .cache import query_key, single_flight
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+)
+
+# DB_ASYNC=1 serves the dashboard routers through SQLAlchemy asyncio (asyncpg)
+# instead of parking a threadpool worker on every round trip. Scripts, admin
+# and the RAG pipeline keep using the sync `engine` either way.
+DB_ASYNC = os.getenv("DB_ASYNC", "0").strip().lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or (
+    make_url(DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+)
+
+async_engine = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+
+def _fetch_all_sync(sql: TextClause, params: Dict[str, Any]) -> List[RowMapping]:
+    with engine.connect() as conn:
+        return conn.execute(sql, params).mappings().all()
+
+
+async def _fetch_all(sql: TextClause, params: Dict[str, Any]) -> List[RowMapping]:
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            result = await conn.execute(sql, params)
+            return result.mappings().all()
+    return await run_in_threadpool(_fetch_all_sync, sql, params)
+
+
+async def fetch_all(sql: TextClause, params: Dict[str, Any] | None = None) -> List[RowMapping]:
+    """
+    Run a read-only query on whichever engine is configured and return row mappings.
+    Concurrent calls with the same SQL and params share a single execution.
+    """
+    params = params or {}
+    return await single_flight.do(query_key(sql, params), lambda: _fetch_all(sql, params))
+
+
+def _stream_batches_sync(
+    sql: TextClause, params: Dict[str, Any], batch_size: int
+) -> Iterator[Tuple[List[str], Sequence[Any]]]:
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(sql, params)
+        columns = list(result.keys())
+        yield columns, []
+        for batch in result.partitions(batch_size):
+            yield columns, batch
+
+
+async def stream_batches(
+    sql: TextClause, params: Dict[str, Any] | None = None, batch_size: int = 5000
+) -> AsyncIterator[Tuple[List[str], Sequence[Any]]]:
+    """
+    Stream a query through a server-side cursor as (columns, rows) batches.
+    The first item always has an empty batch so callers can emit headers even
+    for empty results. Memory stays bounded by `batch_size` rows.
+    """
+    params = params or {}
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            result = await conn.stream(sql, params)
+            columns = list(result.keys())
+            yield columns, []
+            async for batch in result.partitions(batch_size):
+                yield columns, batch
+        return
+
+    batches = _stream_batches_sync(sql, params, batch_size)
+    try:
+        async for item in iterate_in_threadpool(batches):
+            yield item
+    finally:
+        # release the connection even if the client went away mid-stream
+        await run_in_threadpool(batches.close)
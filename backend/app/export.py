@@ -0,0 +1,107 @@
+# backend/app/export.py
+"""
+Streaming encoders for bulk mart exports (CSV, NDJSON, Arrow IPC).
+
+Each encoder consumes the (columns, rows) batches produced by db.stream_batches
+and yields bytes per batch, so an export never holds more than one batch.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Sequence, Set, Tuple
+
+import orjson
+
+Batches = AsyncIterator[Tuple[List[str], Sequence[Any]]]
+
+MEDIA_TYPES: Dict[str, str] = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+EXTENSIONS: Dict[str, str] = {"csv": "csv", "ndjson": "ndjson", "arrow": "arrows"}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+async def encode_csv(batches: Batches) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    header_sent = False
+    async for columns, rows in batches:
+        if not header_sent:
+            writer.writerow(columns)
+            header_sent = True
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+
+
+async def encode_ndjson(batches: Batches) -> AsyncIterator[bytes]:
+    async for columns, rows in batches:
+        if rows:
+            yield b"".join(
+                orjson.dumps(dict(zip(columns, row)), default=_json_default) + b"\n" for row in rows
+            )
+
+
+def _arrow_value(value: Any) -> Any:
+    # Decimal precision varies row to row; ship numerics as float64 like the JSON API
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+async def encode_arrow(batches: Batches) -> AsyncIterator[bytes]:
+    """
+    Arrow IPC stream; the schema is inferred from the first non-empty batch.
+    A column that is all NULL there has no type to infer, so it is shipped as
+    strings for the whole stream.
+    """
+    import pyarrow as pa  # type: ignore
+
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+    as_text: Set[str] = set()
+    columns: List[str] = []
+    async for columns, rows in batches:
+        if not rows:
+            continue
+        data = {col: [_arrow_value(row[i]) for row in rows] for i, col in enumerate(columns)}
+        if writer is None:
+            inferred = pa.RecordBatch.from_pydict(data).schema
+            as_text = {f.name for f in inferred if pa.types.is_null(f.type)}
+            schema = pa.schema([(f.name, pa.string()) if f.name in as_text else f for f in inferred])
+            writer = pa.ipc.new_stream(sink, schema)
+        for col in as_text:
+            data[col] = [None if v is None else str(v) for v in data[col]]
+        writer.write_batch(pa.RecordBatch.from_pydict(data, schema=schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+
+    if writer is None:
+        # empty view: still emit a valid stream with string-typed columns
+        writer = pa.ipc.new_stream(sink, pa.schema([(c, pa.string()) for c in columns]))
+    writer.close()
+    yield sink.getvalue()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "arrow": encode_arrow}
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -1,9 +1,14 @@
 from fastapi import FastAPI #type:ignore
 from fastapi.middleware.cors import CORSMiddleware #type:ignore
+from starlette.middleware.base import BaseHTTPMiddleware #type:ignore
+from .cache import conditional_get
 from .routers import marts,overview, claims, risk, ops, c360, admin, rag
 
 app = FastAPI(title="AI Insurance Dashboard", version="0.1.0")
 
+# ETag / 304 for mart-backed GETs; added before CORS so CORS stays outermost
+# and 304s still carry the CORS headers.
+app.add_middleware(BaseHTTPMiddleware, dispatch=conditional_get)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # tighten in prod
@@ -33,3 +33,31 @@ class SLAItem(BaseModel):
     breaches_gt_60d: int
     still_open: int
     total_reported: int
+
+# ---------- Per-tab bootstrap bundles (one round trip per screen) ----------
+
+class OverviewBundle(BaseModel):
+    gwp: list[TimeSeriesPoint]
+    loss_ratio: list[RatioSeriesPoint]
+    claims_frequency: list[RatioSeriesPoint]
+    avg_settlement_days: list[TimeSeriesPoint]
+
+class ClaimsBundle(BaseModel):
+    paid_vs_reserve: list[TwoSeriesPoint]
+    severity_histogram: list[BreakdownItem]
+    open_vs_closed_ratio: list[RatioSeriesPoint]
+
+class RiskBundle(BaseModel):
+    claims_by_peril: list[BreakdownItem]
+    cat_exposure: list[BreakdownItem]
+
+class OpsBundle(BaseModel):
+    fnol: list[TimeSeriesPoint]
+    sla_breaches: list[SLAItem]
+    backlog_by_age_bucket: list[BreakdownItem]
+
+class Customer360Bundle(BaseModel):
+    retention: list[TimeSeriesPoint]
+    cross_sell_distribution: list[BreakdownItem]
+    channel_mix: list[BreakdownItem]
+    demographics: list[DemographicItem]
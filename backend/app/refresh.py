@@ -0,0 +1,772 @@
+# backend/app/refresh.py
+"""
+Dependency-ordered, parallel materialized view refresh.
+
+Marts form a small DAG (e.g. calendar_months → policies_in_force_by_month →
+claims_frequency_by_month). Each mart is refreshed on its own pooled connection
+in its own transaction as soon as everything it reads from is done, so wall
+time tracks the critical path instead of the sum of all refreshes, and no
+single transaction holds locks/snapshots for the whole run.
+
+Marts converted to plain tables by scripts/build_marts_incremental.sql are
+maintained incrementally: only the period buckets touched since the last
+refresh (per marts.change_log) are deleted and recomputed.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from app.cache import bump_mart_generation, mart_generation
+from app.db import engine
+
+MART_REFRESH_PARALLELISM = int(os.getenv("MART_REFRESH_PARALLELISM", "4"))
+
+# Registry of refreshable marts (see marts_schema.sql)
+MARTS = [
+  "marts.calendar_months",
+  "marts.policies_in_force_by_month",
+  "marts.earned_premium_by_month",
+  "marts.gwp_by_month",
+  "marts.claims_paid_by_month",
+  "marts.loss_ratio_by_month",
+  "marts.claims_count_by_month",
+  "marts.claims_frequency_by_month",
+  "marts.avg_settlement_days_by_month",
+  "marts.claims_paid_vs_reserve_by_month",
+  "marts.claim_severity_histogram",
+  "marts.open_vs_closed_ratio_by_month",
+  "marts.claims_by_peril_month",
+  "marts.cat_exposure_by_region",
+  "marts.fnol_by_day",
+  "marts.sla_breaches_simple",
+  "marts.backlog_by_age_bucket",
+  "marts.retention_by_month",
+  "marts.cross_sell_distribution",
+  "marts.channel_mix_by_month",
+  "marts.customer_demographics",
+  "marts.claims_by_month",
+  "marts.claims_by_county",
+]
+
+# mart -> marts it selects from. Marts not listed only read core.* tables.
+MART_DEPENDENCIES: Dict[str, Set[str]] = {
+    "marts.policies_in_force_by_month": {"marts.calendar_months"},
+    "marts.earned_premium_by_month": {"marts.calendar_months"},
+    "marts.claims_frequency_by_month": {
+        "marts.calendar_months",
+        "marts.claims_count_by_month",
+        "marts.policies_in_force_by_month",
+    },
+    "marts.loss_ratio_by_month": {
+        "marts.calendar_months",
+        "marts.claims_paid_by_month",
+        "marts.earned_premium_by_month",
+    },
+}
+
+
+def dependencies(view: str) -> Set[str]:
+    return MART_DEPENDENCIES.get(view, set())
+
+
+# mart -> core tables it reads, for the skip-unchanged fingerprint
+# (upstream marts are covered through their refreshed_at, see source_fingerprint)
+MART_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "marts.calendar_months": ("core.claims", "core.policies"),
+    "marts.policies_in_force_by_month": ("core.policies",),
+    "marts.earned_premium_by_month": ("core.policies",),
+    "marts.gwp_by_month": ("core.policies",),
+    "marts.claims_paid_by_month": ("core.claims",),
+    "marts.loss_ratio_by_month": (),
+    "marts.claims_count_by_month": ("core.claims",),
+    "marts.claims_frequency_by_month": (),
+    "marts.avg_settlement_days_by_month": ("core.claims",),
+    "marts.claims_paid_vs_reserve_by_month": ("core.claims",),
+    "marts.claim_severity_histogram": ("core.claims",),
+    "marts.open_vs_closed_ratio_by_month": ("core.claims",),
+    "marts.claims_by_peril_month": ("core.claims",),
+    "marts.cat_exposure_by_region": ("core.claims", "core.customers", "core.policies"),
+    "marts.fnol_by_day": ("core.claims",),
+    "marts.sla_breaches_simple": ("core.claims",),
+    "marts.backlog_by_age_bucket": ("core.claims", "core.customers", "core.policies"),
+    "marts.retention_by_month": ("core.policies",),
+    "marts.cross_sell_distribution": ("core.policies",),
+    "marts.channel_mix_by_month": ("core.policies",),
+    "marts.customer_demographics": ("core.customers",),
+    "marts.claims_by_month": ("core.claims",),
+    "marts.claims_by_county": ("core.claims", "core.customers", "core.policies"),
+}
+
+# marts whose contents move with CURRENT_DATE even when no source row changes
+DATE_DEPENDENT_MARTS = {
+    "marts.calendar_months",
+    "marts.backlog_by_age_bucket",
+    "marts.customer_demographics",
+}
+
+
+@lru_cache(maxsize=None)
+def _depth(view: str) -> int:
+    """Length of the longest chain of marts that depend on `view`."""
+    dependents = [v for v, deps in MART_DEPENDENCIES.items() if view in deps]
+    return 1 + max((_depth(d) for d in dependents), default=0)
+
+
+def _matview_state(conn, view: str):
+    """(oid, ispopulated, has_unique) of a materialized view, or None."""
+    schema, name = view.split(".", 1)
+    return conn.execute(text("""
+        SELECT c.oid, m.ispopulated,
+               EXISTS (SELECT 1 FROM pg_index i WHERE i.indrelid = c.oid AND i.indisunique) AS has_unique
+        FROM pg_matviews m
+        JOIN pg_namespace n ON n.nspname = m.schemaname
+        JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = m.matviewname
+        WHERE m.schemaname = :schema AND m.matviewname = :name
+    """), {"schema": schema, "name": name}).first()
+
+
+def _refresh_statement(view: str, state) -> str:
+    # CONCURRENTLY needs a populated view with a unique index; otherwise fall
+    # back to a plain REFRESH (which is fine here: one short transaction per view).
+    if state is not None and state.ispopulated and state.has_unique:
+        return f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};"
+    return f"REFRESH MATERIALIZED VIEW {view};"
+
+
+# -------------------------
+# Incremental marts
+# -------------------------
+
+class IncrementalMart(NamedTuple):
+    key: str                              # period column the table is keyed by
+    grain: str                            # 'month' | 'day'
+    sources: Tuple[Tuple[str, str], ...]  # (core table, date column) feeding the buckets
+    select: str                           # recompute query, restricted with _dirty()
+
+
+def _dirty(col: str, grain: str = "month") -> str:
+    """Predicate limiting `col` to the dirty buckets (:buckets NULL = full rebuild)."""
+    return (
+        f"({col} >= :lo AND {col} < :hi AND (CAST(:buckets AS date[]) IS NULL"
+        f" OR date_trunc('{grain}', {col})::date = ANY(CAST(:buckets AS date[]))))"
+    )
+
+
+# Same definitions as marts_schema.sql, minus the NULL-period bucket
+INCREMENTAL_MARTS: Dict[str, IncrementalMart] = {
+    "marts.claims_by_month": IncrementalMart("month", "month", (("core.claims", "loss_date"),), f"""
+        SELECT date_trunc('month', c.loss_date)::date, COUNT(*), COALESCE(SUM(c.paid), 0)::numeric
+        FROM core.claims c
+        WHERE {_dirty("c.loss_date")}
+        GROUP BY 1
+    """),
+    "marts.claims_count_by_month": IncrementalMart("month_start", "month", (("core.claims", "report_date"),), f"""
+        SELECT date_trunc('month', c.report_date)::date, count(*)
+        FROM core.claims c
+        WHERE {_dirty("c.report_date")}
+        GROUP BY 1
+    """),
+    "marts.claims_paid_by_month": IncrementalMart("month_start", "month", (("core.claims", "close_date"),), f"""
+        SELECT date_trunc('month', c.close_date)::date, sum(COALESCE(c.paid, 0))
+        FROM core.claims c
+        WHERE {_dirty("c.close_date")}
+        GROUP BY 1
+    """),
+    "marts.claims_by_peril_month": IncrementalMart("month_start", "month", (("core.claims", "report_date"),), f"""
+        SELECT date_trunc('month', c.report_date)::date,
+               COALESCE(NULLIF(TRIM(c.peril), ''), 'UNKNOWN'),
+               count(*),
+               sum(COALESCE(c.paid, 0)),
+               avg(NULLIF(c.paid, 0))
+        FROM core.claims c
+        WHERE {_dirty("c.report_date")}
+        GROUP BY 1, 2
+    """),
+    "marts.fnol_by_day": IncrementalMart("day", "day", (("core.claims", "report_date"),), f"""
+        SELECT c.report_date, count(*)
+        FROM core.claims c
+        WHERE {_dirty("c.report_date", "day")}
+        GROUP BY 1
+    """),
+    "marts.gwp_by_month": IncrementalMart("month_start", "month", (("core.policies", "start_date"),), f"""
+        SELECT date_trunc('month', p.start_date)::date, sum(p.gross_premium)
+        FROM core.policies p
+        WHERE {_dirty("p.start_date")}
+        GROUP BY 1
+    """),
+    "marts.channel_mix_by_month": IncrementalMart("month_start", "month", (("core.policies", "start_date"),), f"""
+        SELECT date_trunc('month', p.start_date)::date,
+               COALESCE(NULLIF(TRIM(p.channel), ''), 'UNKNOWN'),
+               sum(COALESCE(p.gross_premium, 0)),
+               count(*)
+        FROM core.policies p
+        WHERE {_dirty("p.start_date")}
+        GROUP BY 1, 2
+    """),
+    "marts.avg_settlement_days_by_month": IncrementalMart("month_start", "month", (("core.claims", "close_date"),), f"""
+        SELECT date_trunc('month', c.close_date)::date,
+               count(*),
+               avg(c.close_date - c.report_date),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY (c.close_date - c.report_date)::double precision),
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY (c.close_date - c.report_date)::double precision)
+        FROM core.claims c
+        WHERE c.report_date IS NOT NULL AND {_dirty("c.close_date")}
+        GROUP BY 1
+    """),
+    "marts.claims_paid_vs_reserve_by_month": IncrementalMart(
+        "month_start", "month", (("core.claims", "close_date"), ("core.claims", "report_date")), f"""
+        WITH paid_m AS (
+          SELECT date_trunc('month', c.close_date)::date AS month_start, sum(COALESCE(c.paid, 0)) AS paid_total
+          FROM core.claims c
+          WHERE {_dirty("c.close_date")}
+          GROUP BY 1
+        ), reserve_m AS (
+          SELECT date_trunc('month', c.report_date)::date AS month_start, sum(COALESCE(c.reserve, 0)) AS reserve_total
+          FROM core.claims c
+          WHERE {_dirty("c.report_date")}
+          GROUP BY 1
+        )
+        SELECT month_start, COALESCE(p.paid_total, 0), COALESCE(r.reserve_total, 0)
+        FROM paid_m p FULL JOIN reserve_m r USING (month_start)
+    """),
+    "marts.open_vs_closed_ratio_by_month": IncrementalMart(
+        "month_start", "month", (("core.claims", "report_date"), ("core.claims", "close_date")), f"""
+        WITH opened AS (
+          SELECT date_trunc('month', c.report_date)::date AS month_start, count(*) AS opened_count
+          FROM core.claims c
+          WHERE {_dirty("c.report_date")}
+          GROUP BY 1
+        ), closed AS (
+          SELECT date_trunc('month', c.close_date)::date AS month_start, count(*) AS closed_count
+          FROM core.claims c
+          WHERE {_dirty("c.close_date")}
+          GROUP BY 1
+        )
+        SELECT month_start,
+               COALESCE(o.opened_count, 0),
+               COALESCE(c.closed_count, 0),
+               CASE WHEN COALESCE(o.opened_count, 0) = 0 THEN NULL
+                    ELSE COALESCE(c.closed_count, 0)::numeric / o.opened_count END
+        FROM opened o FULL JOIN closed c USING (month_start)
+    """),
+}
+
+
+def _relkind(conn, view: str) -> Optional[str]:
+    schema, name = view.split(".", 1)
+    return conn.execute(text("""
+        SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = :schema AND c.relname = :name
+    """), {"schema": schema, "name": name}).scalar()
+
+
+def _change_log_high_water() -> Optional[int]:
+    # SHARE conflicts with the writers' ROW EXCLUSIVE, so this waits for
+    # in-flight core writes: every id up to the returned value is committed
+    # (or rolled back) and no smaller id can show up afterwards. The sequence
+    # is read rather than max(id), so the value never goes back when consumed
+    # entries are deleted. None until build_marts_incremental.sql has run.
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regclass('marts.change_log')")).scalar() is None:
+            return None
+        conn.execute(text("LOCK TABLE marts.change_log IN SHARE MODE"))
+        return conn.execute(text(
+            "SELECT COALESCE(pg_sequence_last_value(pg_get_serial_sequence('marts.change_log', 'id')), 0)"
+        )).scalar_one()
+
+
+def _bucket_end(bucket: date, grain: str) -> date:
+    if grain == "day":
+        return bucket + timedelta(days=1)
+    return (bucket.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _refresh_incremental(view: str, spec: IncrementalMart, full: bool) -> Dict[str, Any]:
+    upto = _change_log_high_water()
+    with engine.begin() as conn:
+        since = conn.execute(
+            text("SELECT last_change_id FROM marts.incremental_state WHERE view_name = :view FOR UPDATE"),
+            {"view": view},
+        ).scalar()
+
+        buckets: List[date] = []
+        if full or since is None:
+            mode = "full"
+            params: Dict[str, Any] = {"lo": date.min, "hi": date.max, "buckets": None}
+        else:
+            mode = "incremental"
+            sources = ", ".join(f"('{table}', '{column}')" for table, column in spec.sources)
+            buckets = conn.execute(text(f"""
+                SELECT DISTINCT date_trunc('{spec.grain}', day)::date
+                FROM marts.change_log
+                WHERE id > :since AND id <= :upto AND (source, column_name) IN ({sources})
+            """), {"since": since, "upto": upto}).scalars().all()
+            if buckets:
+                params = {"lo": min(buckets), "hi": _bucket_end(max(buckets), spec.grain), "buckets": list(buckets)}
+
+        if mode == "full" or buckets:
+            conn.execute(text(f"DELETE FROM {view} WHERE {_dirty(spec.key, spec.grain)}"), params)
+            conn.execute(text(f"INSERT INTO {view} {spec.select}"), params)
+            # only actual rewrites count as a change for downstream fingerprints
+            _record_refresh(conn, view, f"change_id:{upto}")
+
+        conn.execute(text("""
+            INSERT INTO marts.incremental_state (view_name, last_change_id, refreshed_at)
+            VALUES (:view, :upto, now())
+            ON CONFLICT (view_name) DO UPDATE
+              SET last_change_id = EXCLUDED.last_change_id, refreshed_at = EXCLUDED.refreshed_at
+        """), {"view": view, "upto": upto})
+        # change_log rows every incremental mart has consumed are no longer needed
+        conn.execute(text("""
+            DELETE FROM marts.change_log
+            WHERE id <= (SELECT min(last_change_id) FROM marts.incremental_state)
+        """))
+        row_count = conn.execute(text(f"SELECT count(*) FROM {view}")).scalar_one()
+    return {"mode": mode, "buckets": len(buckets) if mode == "incremental" else None, "row_count": row_count}
+
+
+# -------------------------
+# Source fingerprints (skip-unchanged)
+# -------------------------
+
+REFRESH_FINGERPRINT_DDL = """
+CREATE TABLE IF NOT EXISTS marts.refresh_fingerprint (
+  view_name     text PRIMARY KEY,
+  fingerprint   text        NOT NULL,
+  refreshed_at  timestamptz NOT NULL DEFAULT now()
+);
+"""
+
+_fingerprint_table_ready = False
+_fingerprint_table_lock = threading.Lock()
+
+
+def _ensure_fingerprint_table() -> None:
+    global _fingerprint_table_ready
+    with _fingerprint_table_lock:
+        if not _fingerprint_table_ready:
+            with engine.begin() as conn:
+                conn.execute(text(REFRESH_FINGERPRINT_DDL))
+            _fingerprint_table_ready = True
+
+
+def _record_refresh(conn, view: str, fingerprint: str) -> None:
+    conn.execute(text("""
+        INSERT INTO marts.refresh_fingerprint (view_name, fingerprint, refreshed_at)
+        VALUES (:view, :fingerprint, now())
+        ON CONFLICT (view_name) DO UPDATE
+          SET fingerprint = EXCLUDED.fingerprint, refreshed_at = EXCLUDED.refreshed_at
+    """), {"view": view, "fingerprint": fingerprint})
+
+
+# pg_stat_user_tables only sees a write once the writing backend flushes its
+# pending stats, up to ~60 s after commit (PGSTAT_MAX_INTERVAL)
+STATS_FLUSH_GRACE_S = 60
+
+
+def _logged_tables(conn) -> Set[str]:
+    """Tables whose writes marts.change_log records (build_marts_incremental.sql triggers)."""
+    return set(conn.execute(text("""
+        SELECT DISTINCT t.tgrelid::regclass::text
+        FROM pg_trigger t JOIN pg_proc p ON p.oid = t.tgfoid
+        WHERE p.pronamespace = to_regnamespace('marts')
+          AND p.proname IN ('log_claims_changes', 'log_policies_changes')
+    """)).scalars())
+
+
+def _counted_sources(conn, view: str, change_id: Optional[int]) -> List[str]:
+    """Sources of `view` only the asynchronous pg_stat counters can tell about."""
+    logged = _logged_tables(conn) if change_id is not None else set()
+    return [t for t in MART_SOURCES.get(view, ()) if t not in logged]
+
+
+def source_fingerprint(conn, view: str, view_oid: Any = None, change_id: Optional[int] = None) -> str:
+    """
+    Identity of the core tables a mart reads (per partition for partitioned
+    ones; a recreated table gets a new relid), a change signal for them, plus
+    CURRENT_DATE for date-dependent marts and the mart's own oid (a recreated
+    mart never matches).
+
+    Tables with change-log triggers contribute `change_id`, the change_log
+    high-water mark, which moves transactionally with every committed write
+    (to any logged table, so it can only cause extra refreshes). Other tables
+    contribute their pg_stat modification counters, which lag behind commits;
+    refresh_view does not trust those within STATS_FLUSH_GRACE_S of the last
+    refresh. Any stats reset just forces a refresh.
+
+    Upstream marts contribute the time they last changed, so a mart whose
+    upstream was refreshed by an earlier run (while it failed or was left
+    out) is not reported unchanged.
+    """
+    tables = list(MART_SOURCES.get(view, ()))
+    counted = set(_counted_sources(conn, view, change_id))
+    parts = [str(view_oid)]
+    if len(counted) < len(tables):
+        parts.append(f"change_id:{change_id}")
+    for name, *stats in conn.execute(text("""
+        SELECT t.name, s.relid, s.n_tup_ins, s.n_tup_upd, s.n_tup_del, s.n_live_tup
+        FROM unnest(CAST(:tables AS text[])) AS t(name)
+        CROSS JOIN LATERAL pg_partition_tree(to_regclass(t.name)) pt
+        JOIN pg_stat_user_tables s ON s.relid = pt.relid
+        ORDER BY s.schemaname, s.relname
+    """), {"tables": tables}).all():
+        parts.append(str(tuple(stats) if name in counted else stats[0]))
+    upstream = sorted(dependencies(view))
+    if upstream:
+        refreshed_at = dict(conn.execute(
+            text("SELECT view_name, refreshed_at FROM marts.refresh_fingerprint WHERE view_name = ANY(:views)"),
+            {"views": upstream},
+        ).all())
+        parts += [f"{v}@{refreshed_at.get(v)}" for v in upstream]
+    if view in DATE_DEPENDENT_MARTS:
+        parts.append(str(conn.execute(text("SELECT CURRENT_DATE")).scalar_one()))
+    return "|".join(parts)
+
+
+def refresh_view(view: str, full: bool = False, skip_unchanged: bool = False) -> Dict[str, Any]:
+    """
+    Refresh one mart on its own connection and transaction: dirty buckets only
+    for incremental (table) marts, REFRESH MATERIALIZED VIEW otherwise.
+    `full` forces incremental marts to be recomputed from scratch;
+    `skip_unchanged` leaves a view alone if its source fingerprint matches the
+    one recorded at its last refresh.
+    """
+    t0 = time.time()
+    _ensure_fingerprint_table()
+    spec = INCREMENTAL_MARTS.get(view)
+    if spec is not None:
+        with engine.connect() as conn:
+            if _relkind(conn, view) != "r":
+                spec = None
+    if spec is not None:
+        result = _refresh_incremental(view, spec, full)
+        # no dirty buckets is the incremental equivalent of an unchanged source
+        status = "unchanged" if skip_unchanged and result["buckets"] == 0 else "refreshed"
+        return {"view": view, "status": status, "duration_ms": round((time.time() - t0) * 1000)} | result
+
+    # committed before the refresh snapshot, so writes racing it change the next fingerprint
+    change_id = _change_log_high_water()
+    with engine.begin() as conn:
+        state = _matview_state(conn, view)
+        fingerprint = source_fingerprint(conn, view, state.oid if state is not None else None, change_id)
+        if skip_unchanged and state is not None and state.ispopulated:
+            previous = conn.execute(text("""
+                SELECT fingerprint, refreshed_at > now() - make_interval(secs => :grace) AS recent
+                FROM marts.refresh_fingerprint WHERE view_name = :view
+            """), {"view": view, "grace": STATS_FLUSH_GRACE_S}).first()
+            # counters may not show writes made just before the previous refresh yet
+            stale = previous is not None and previous.recent and _counted_sources(conn, view, change_id)
+            if previous is not None and previous.fingerprint == fingerprint and not stale:
+                return {"view": view, "status": "unchanged", "duration_ms": round((time.time() - t0) * 1000)}
+
+        conn.execute(text(_refresh_statement(view, state)))
+        duration_ms = round((time.time() - t0) * 1000)
+        row_count = conn.execute(text(f"SELECT count(*) FROM {view}")).scalar_one()
+        _record_refresh(conn, view, fingerprint)
+    return {"view": view, "status": "refreshed", "duration_ms": duration_ms, "row_count": row_count}
+
+
+def refresh_marts(
+    views: Iterable[str] = MARTS,
+    *,
+    parallelism: int = MART_REFRESH_PARALLELISM,
+    full: bool = False,
+    skip_unchanged: bool = True,
+    refresh_fn: Callable[[str, bool, bool], Dict[str, Any]] = refresh_view,
+    on_start: Optional[Callable[[str], None]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Refresh `views` in dependency order with up to `parallelism` concurrent
+    refreshes. `full` rebuilds incremental marts from scratch; with
+    `skip_unchanged`, views whose sources did not change since their last
+    refresh (and none of whose upstream marts changed since) are reported as
+    "unchanged" instead. A failed mart marks everything downstream
+    of it as skipped. Returns one result dict per view, in completion order;
+    `on_start` and `on_result` are called as views start and finish.
+    """
+    selected = list(dict.fromkeys(views))
+    selected_set = set(selected)
+    pending: Dict[str, Set[str]] = {v: dependencies(v) & selected_set for v in selected}
+    done: Set[str] = set()
+    refreshed: Set[str] = set()
+    failed: Set[str] = set()
+    results: List[Dict[str, Any]] = []
+
+    def run_one(view: str) -> Dict[str, Any]:
+        if on_start is not None:
+            on_start(view)
+        # upstream marts are all done by now, so `refreshed` is final for them
+        skip = skip_unchanged and not full and not (dependencies(view) & refreshed)
+        return refresh_fn(view, full, skip)
+
+    def record(result: Dict[str, Any]) -> None:
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as pool:
+        running: Dict[Future, str] = {}
+        while pending or running:
+            # Anything downstream of a failure will never become ready
+            for v in [v for v, deps in pending.items() if deps & failed]:
+                del pending[v]
+                failed.add(v)
+                record({"view": v, "status": "skipped", "reason": "upstream mart failed"})
+
+            # Start the ready views with the longest downstream chain first
+            ready = sorted((v for v, deps in pending.items() if deps <= done), key=_depth, reverse=True)
+            for v in ready:
+                del pending[v]
+                running[pool.submit(run_one, v)] = v
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                v = running.pop(fut)
+                try:
+                    result = fut.result()
+                    done.add(v)
+                    if result["status"] == "refreshed":
+                        refreshed.add(v)
+                except Exception as e:
+                    failed.add(v)
+                    result = {"view": v, "status": "failed", "error": str(e)}
+                record(result)
+    return results
+
+
+# -------------------------
+# Background refresh jobs
+# -------------------------
+
+REFRESH_LOG_DDL = """
+CREATE TABLE IF NOT EXISTS marts.refresh_log (
+  id           bigserial PRIMARY KEY,
+  job_id       text        NOT NULL,
+  view_name    text        NOT NULL,
+  status       text        NOT NULL,
+  started_at   timestamptz,
+  finished_at  timestamptz NOT NULL DEFAULT now(),
+  duration_ms  integer,
+  row_count    bigint,
+  error        text
+);
+CREATE INDEX IF NOT EXISTS ix_refresh_log_job ON marts.refresh_log (job_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_log_view_time ON marts.refresh_log (view_name, finished_at);
+"""
+
+OK_STATUSES = ("refreshed", "unchanged")
+
+# How many finished jobs to keep in memory; older ones are served from refresh_log
+REFRESH_JOBS_KEPT = 50
+
+
+def _now() -> float:
+    return time.time()
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts is not None else None
+
+
+class RefreshJob:
+    """State of one background refresh run, updated from the worker threads."""
+
+    def __init__(self, views: List[str], parallelism: int, full: bool = False, skip_unchanged: bool = True):
+        self.id = uuid.uuid4().hex
+        self.parallelism = parallelism
+        self.full = full
+        self.skip_unchanged = skip_unchanged
+        self.status = "queued"
+        self.created_at = _now()
+        self.finished_at: Optional[float] = None
+        self.mart_generation: Optional[int] = None
+        self.error: Optional[str] = None
+        self.views: Dict[str, Dict[str, Any]] = {v: {"status": "pending"} for v in views}
+        self._lock = threading.Lock()
+
+    def started(self, view: str) -> None:
+        with self._lock:
+            self.views[view] = {"status": "running", "started_at": _now()}
+
+    def finished(self, result: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self.views[result["view"]]
+            entry.update({k: v for k, v in result.items() if k != "view"})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            views = [
+                {"view": v} | {k: (_iso(x) if k == "started_at" else x) for k, x in entry.items()}
+                for v, entry in self.views.items()
+            ]
+            counts: Dict[str, int] = {}
+            for entry in self.views.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+            end = self.finished_at or _now()
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "parallelism": self.parallelism,
+                "full": self.full,
+                "skip_unchanged": self.skip_unchanged,
+                "created_at": _iso(self.created_at),
+                "finished_at": _iso(self.finished_at),
+                "elapsed_ms": round((end - self.created_at) * 1000),
+                "progress": counts,
+                "unchanged": [v for v, entry in self.views.items() if entry["status"] == "unchanged"],
+                "mart_generation": self.mart_generation,
+                "error": self.error,
+                "views": views,
+            }
+
+
+def ensure_refresh_log() -> None:
+    with engine.begin() as conn:
+        conn.execute(text(REFRESH_LOG_DDL))
+
+
+def _write_refresh_log(job: RefreshJob) -> None:
+    rows = [
+        {
+            "job_id": job.id,
+            "view_name": v,
+            "status": entry["status"],
+            "started_at": _iso(entry.get("started_at")),
+            "duration_ms": entry.get("duration_ms"),
+            "row_count": entry.get("row_count"),
+            "error": entry.get("error") or entry.get("reason"),
+        }
+        for v, entry in job.views.items()
+    ]
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO marts.refresh_log
+              (job_id, view_name, status, started_at, duration_ms, row_count, error)
+            VALUES
+              (:job_id, :view_name, :status, CAST(:started_at AS timestamptz), :duration_ms, :row_count, :error)
+        """), rows)
+
+
+class RefreshJobs:
+    """In-process registry of refresh jobs; at most one runs at a time."""
+
+    def __init__(self, keep: int = REFRESH_JOBS_KEPT):
+        self.keep = keep
+        self._jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._active: Optional[RefreshJob] = None
+
+    def start(
+        self,
+        views: Iterable[str] = MARTS,
+        *,
+        parallelism: int = MART_REFRESH_PARALLELISM,
+        full: bool = False,
+        skip_unchanged: bool = True,
+    ) -> Tuple[RefreshJob, bool]:
+        """
+        Start a job in a background thread. Returns (job, True), or
+        (running job, False) if one is already running; the arguments are
+        then not applied.
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._active, False
+            job = RefreshJob(list(dict.fromkeys(views)), parallelism, full, skip_unchanged)
+            self._active = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                self._jobs.popitem(last=False)
+
+        threading.Thread(target=self._run, args=(job,), name=f"refresh-{job.id[:8]}", daemon=True).start()
+        return job, True
+
+    def _run(self, job: RefreshJob) -> None:
+        job.status = "running"
+        changed = True
+        try:
+            # once per job rather than on every read of the log
+            ensure_refresh_log()
+            results = refresh_marts(
+                list(job.views),
+                parallelism=job.parallelism,
+                full=job.full,
+                skip_unchanged=job.skip_unchanged,
+                on_start=job.started,
+                on_result=job.finished,
+            )
+            job.status = "succeeded" if all(r["status"] in OK_STATUSES for r in results) else "partial"
+            changed = any(r["status"] == "refreshed" for r in results)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            # even a partial run changed some marts, so cached responses are
+            # stale; a run where every mart was unchanged keeps them (and ETags)
+            if changed:
+                job.mart_generation = bump_mart_generation()
+            else:
+                job.mart_generation = mart_generation()
+            job.finished_at = _now()
+            with self._lock:
+                self._active = None
+        try:
+            _write_refresh_log(job)
+        except Exception as e:
+            # the refresh itself succeeded; only the audit trail is missing
+            job.error = f"refresh_log write failed: {e}"
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def active(self) -> Optional[RefreshJob]:
+        return self._active
+
+
+refresh_jobs = RefreshJobs()
+
+
+def logged_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Rebuild a finished job's report from marts.refresh_log (e.g. after a restart)."""
+    with engine.connect() as conn:
+        # created when the first refresh job starts; before that every id is unknown
+        if conn.execute(text("SELECT to_regclass('marts.refresh_log')")).scalar() is None:
+            return None
+        rows = conn.execute(text("""
+            SELECT view_name, status, started_at, finished_at, duration_ms, row_count, error
+            FROM marts.refresh_log
+            WHERE job_id = :job_id
+            ORDER BY id
+        """), {"job_id": job_id}).mappings().all()
+    if not rows:
+        return None
+    return {
+        "job_id": job_id,
+        "status": "succeeded" if all(r["status"] in OK_STATUSES for r in rows) else "partial",
+        "finished_at": max(r["finished_at"] for r in rows).isoformat(),
+        "views": [
+            {
+                "view": r["view_name"],
+                "status": r["status"],
+                "duration_ms": r["duration_ms"],
+                "row_count": r["row_count"],
+                "error": r["error"],
+            }
+            for r in rows
+        ],
+    }
@@ -1,36 +1,45 @@
-from fastapi import APIRouter
-from sqlalchemy import text
-from app.db import engine
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from app.cache import response_cache, single_flight
+from app.refresh import MART_REFRESH_PARALLELISM, MARTS, logged_job, refresh_jobs
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
-MARTS = [
-  "marts.calendar_months",
-  "marts.policies_in_force_by_month",
-  "marts.earned_premium_by_month",
-  "marts.gwp_by_month",
-  "marts.claims_paid_by_month",
-  "marts.loss_ratio_by_month",
-  "marts.claims_count_by_month",
-  "marts.claims_frequency_by_month",
-  "marts.avg_settlement_days_by_month",
-  "marts.claims_paid_vs_reserve_by_month",
-  "marts.claim_severity_histogram",
-  "marts.open_vs_closed_ratio_by_month",
-  "marts.claims_by_peril_month",
-  "marts.cat_exposure_by_region",
-  "marts.fnol_by_day",
-  "marts.sla_breaches_simple",
-  "marts.backlog_by_age_bucket",
-  "marts.retention_by_month",
-  "marts.cross_sell_distribution",
-  "marts.channel_mix_by_month",
-  "marts.customer_demographics",
-]
+@router.post("/refresh_marts", status_code=202)
+def refresh_marts(
+    parallelism: int = Query(MART_REFRESH_PARALLELISM, ge=1, le=16),
+    full: bool = Query(False, description="Recompute incremental marts from scratch"),
+    force: bool = Query(False, description="Refresh marts even if their sources are unchanged"),
+):
+    # Runs in the background; only one refresh at a time, so a second call
+    # while one is running gets 409 with the running job (its own arguments
+    # are not applied).
+    job, started = refresh_jobs.start(MARTS, parallelism=parallelism, full=full, skip_unchanged=not force)
+    return JSONResponse(
+        status_code=202 if started else 409,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "views": MARTS,
+            "status_url": f"/api/admin/refresh_jobs/{job.id}",
+        } | ({} if started else {
+            "detail": "A refresh is already running; this request's parameters were not applied.",
+            "parallelism": job.parallelism,
+            "full": job.full,
+            "skip_unchanged": job.skip_unchanged,
+        }),
+    )
 
-@router.post("/refresh_marts")
-def refresh_marts():
-    with engine.begin() as conn:
-        for v in MARTS:
-            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {v};"))
-    return {"status": "refreshed", "views": MARTS}
+@router.get("/refresh_jobs/{job_id}")
+def refresh_job(job_id: str):
+    job = refresh_jobs.get(job_id)
+    if job is not None:
+        return job.snapshot()
+    logged = logged_job(job_id)
+    if logged is None:
+        raise HTTPException(status_code=404, detail=f"Unknown refresh job '{job_id}'")
+    return logged
+
+@router.get("/cache_stats")
+def cache_stats():
+    return response_cache.stats() | {"single_flight": single_flight.stats()}
@@ -1,15 +1,18 @@
 # backend/app/routers/c360.py
+import asyncio
 from fastapi import APIRouter
 from datetime import date
 from sqlalchemy import text
-from app.db import engine
-from app.models import TimeSeriesPoint, BreakdownItem, DemographicItem
-from app.utils import between_clause
+from app.db import fetch_all
+from app.cache import cached
+from app.models import TimeSeriesPoint, BreakdownItem, DemographicItem, Customer360Bundle
+from app.utils import between_clause, shape_rows, ResponseFormat
 
 router = APIRouter(prefix="/api/c360", tags=["customer360"])
 
 @router.get("/retention", response_model=list[TimeSeriesPoint])
-def retention(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def retention(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period, retention_rate AS value
@@ -17,23 +20,23 @@ def retention(start_date: date | None = None, end_date: date | None = None):
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [TimeSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, TimeSeriesPoint, format)
 
 @router.get("/cross_sell_distribution", response_model=list[BreakdownItem])
-def cross_sell_distribution():
+@cached
+async def cross_sell_distribution(format: ResponseFormat = "rows"):
     sql = text("""
         SELECT products_count::text AS key, customers AS value
         FROM marts.cross_sell_distribution
         ORDER BY products_count
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
-    return [BreakdownItem(**row) for row in rows]
+    rows = await fetch_all(sql)
+    return shape_rows(rows, BreakdownItem, format)
 
 @router.get("/channel_mix", response_model=list[BreakdownItem])
-def channel_mix(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def channel_mix(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT channel AS key, SUM(gwp) AS value
@@ -42,17 +45,31 @@ def channel_mix(start_date: date | None = None, end_date: date | None = None):
         GROUP BY channel
         ORDER BY value DESC
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [BreakdownItem(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, BreakdownItem, format)
 
 @router.get("/demographics", response_model=list[DemographicItem])
-def demographics():
+@cached
+async def demographics(format: ResponseFormat = "rows"):
     sql = text("""
         SELECT age_band, county_name, customers
         FROM marts.customer_demographics
         ORDER BY age_band, county_name
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
-    return [DemographicItem(**row) for row in rows]
+    rows = await fetch_all(sql)
+    return shape_rows(rows, DemographicItem, format)
+
+@router.get("/all", response_model=Customer360Bundle)
+async def c360_all(start_date: date | None = None, end_date: date | None = None):
+    retention_, cross_sell_, channel_mix_, demographics_ = await asyncio.gather(
+        retention(start_date=start_date, end_date=end_date),
+        cross_sell_distribution(),
+        channel_mix(start_date=start_date, end_date=end_date),
+        demographics(),
+    )
+    return Customer360Bundle(
+        retention=retention_,
+        cross_sell_distribution=cross_sell_,
+        channel_mix=channel_mix_,
+        demographics=demographics_,
+    )
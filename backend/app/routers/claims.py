@@ -1,15 +1,18 @@
 # backend/app/routers/claims.py
+import asyncio
 from fastapi import APIRouter
 from datetime import date
 from sqlalchemy import text
-from app.db import engine
-from app.models import TwoSeriesPoint, BreakdownItem, RatioSeriesPoint
-from app.utils import between_clause
+from app.db import fetch_all
+from app.cache import cached
+from app.models import TwoSeriesPoint, BreakdownItem, RatioSeriesPoint, ClaimsBundle
+from app.utils import between_clause, shape_rows, ResponseFormat
 
 router = APIRouter(prefix="/api/claims", tags=["claims"])
 
 @router.get("/paid_vs_reserve", response_model=list[TwoSeriesPoint])
-def paid_vs_reserve(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def paid_vs_reserve(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period,
@@ -19,23 +22,23 @@ def paid_vs_reserve(start_date: date | None = None, end_date: date | None = None
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [TwoSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, TwoSeriesPoint, format)
 
 @router.get("/severity_histogram", response_model=list[BreakdownItem])
-def severity_histogram():
+@cached
+async def severity_histogram(format: ResponseFormat = "rows"):
     sql = text("""
         SELECT severity_band AS key, claim_count AS value
         FROM marts.claim_severity_histogram
         ORDER BY value DESC
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
-    return [BreakdownItem(**row) for row in rows]
+    rows = await fetch_all(sql)
+    return shape_rows(rows, BreakdownItem, format)
 
 @router.get("/open_vs_closed_ratio", response_model=list[RatioSeriesPoint])
-def open_vs_closed_ratio(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def open_vs_closed_ratio(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period,
@@ -46,6 +49,18 @@ def open_vs_closed_ratio(start_date: date | None = None, end_date: date | None =
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [RatioSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, RatioSeriesPoint, format)
+
+@router.get("/all", response_model=ClaimsBundle)
+async def claims_all(start_date: date | None = None, end_date: date | None = None):
+    paid_vs_reserve_, severity_histogram_, open_vs_closed_ratio_ = await asyncio.gather(
+        paid_vs_reserve(start_date=start_date, end_date=end_date),
+        severity_histogram(),
+        open_vs_closed_ratio(start_date=start_date, end_date=end_date),
+    )
+    return ClaimsBundle(
+        paid_vs_reserve=paid_vs_reserve_,
+        severity_histogram=severity_histogram_,
+        open_vs_closed_ratio=open_vs_closed_ratio_,
+    )
@@ -1,19 +1,24 @@
+from typing import Literal
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from datetime import date
-from ..db import engine
+from ..db import fetch_all, stream_batches
+from ..cache import cached
+from ..export import ENCODERS, EXTENSIONS, MEDIA_TYPES, arrow_available
+from .admin import MARTS
 
 router = APIRouter(prefix="/api/marts", tags=["marts"])
 
 @router.get("/claims_by_month")
-def claims_by_month():
+@cached
+async def claims_by_month():
     sql = text("""
         SELECT month, claims_count, paid_sum
         FROM marts.claims_by_month
         ORDER BY month
     """)
-    with engine.begin() as conn:
-        rows = conn.execute(sql).mappings().all()
+    rows = await fetch_all(sql)
     # Convert date to ISO for JSON
     return [
         {"month": r["month"].isoformat(), "claims_count": int(r["claims_count"]), "paid_sum": float(r["paid_sum"])}
@@ -22,16 +27,38 @@ def claims_by_month():
 
 
 @router.get("/claims_by_county")
-def claims_by_county():
+@cached
+async def claims_by_county():
     sql = text("""
         SELECT county, claims_count, paid_sum
         FROM marts.claims_by_county
         ORDER BY claims_count DESC, county
     """)
-    with engine.begin() as conn:
-        rows = conn.execute(sql).mappings().all()
+    rows = await fetch_all(sql)
     return [
         {"county": r["county"], "claims_count": int(r["claims_count"]), "paid_sum": float(r["paid_sum"])}
         for r in rows
     ]
 
+
+@router.get("/{view}/export")
+async def export_view(view: str,
+                      format: Literal["csv", "ndjson", "arrow"] = "csv",
+                      batch_size: int = Query(5000, ge=100, le=100_000)):
+    """
+    Stream a whole mart (any view in the admin MARTS registry) through a
+    server-side cursor as CSV, NDJSON or Arrow IPC, one batch at a time.
+    """
+    qualified = f"marts.{view}"
+    if qualified not in MARTS:
+        raise HTTPException(status_code=404, detail=f"Unknown mart: {view}")
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow on the server.")
+
+    # `qualified` comes from the MARTS allowlist, never from raw user input
+    batches = stream_batches(text(f"SELECT * FROM {qualified}"), batch_size=batch_size)
+    return StreamingResponse(
+        ENCODERS[format](batches),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{view}.{EXTENSIONS[format]}"'},
+    )
@@ -1,28 +1,55 @@
 # backend/app/routers/ops.py
-from fastapi import APIRouter
+import asyncio
+from typing import Annotated
+from fastapi import APIRouter, Query
 from datetime import date
 from sqlalchemy import text
-from app.db import engine
-from app.models import TimeSeriesPoint, SLAItem, BreakdownItem
-from app.utils import between_clause
+from app.db import fetch_all
+from app.cache import cached
+from app.models import TimeSeriesPoint, SLAItem, BreakdownItem, OpsBundle
+from app.utils import between_clause, shape_rows, downsample_series, ResponseFormat, Resolution
 
 router = APIRouter(prefix="/api/ops", tags=["operations"])
 
 @router.get("/fnol", response_model=list[TimeSeriesPoint])
-def fnol(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def fnol(start_date: date | None = None,
+               end_date: date | None = None,
+               resolution: Resolution = "day",
+               max_points: Annotated[int | None, Query(ge=3, le=10_000)] = None,
+               format: ResponseFormat = "rows"):
     where, params = between_clause('"day"', start_date, end_date)  # "day" is a reserved word sometimes
-    sql = text(f"""
-        SELECT "day" AS period, fnol_count AS value
-        FROM marts.fnol_by_day
-        {where}
-        ORDER BY "day"
-    """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [TimeSeriesPoint(**row) for row in rows]
+    if resolution == "day":
+        sql = text(f"""
+            SELECT "day" AS period, fnol_count AS value
+            FROM marts.fnol_by_day
+            {where}
+            ORDER BY "day"
+        """)
+    else:
+        # `resolution` is a validated Literal, safe to inline as the date_trunc unit.
+        # A week/month bucket can begin before start_date; that first bucket only
+        # counts days from start_date on, so it is labelled start_date (the last
+        # bucket is likewise cut at end_date).
+        period = f"""date_trunc('{resolution}', "day")::date"""
+        if start_date:
+            period = f"GREATEST({period}, CAST(:start_date AS date))"
+        sql = text(f"""
+            SELECT {period} AS period,
+                   SUM(fnol_count) AS value
+            FROM marts.fnol_by_day
+            {where}
+            GROUP BY 1
+            ORDER BY 1
+        """)
+    rows = await fetch_all(sql, params)
+    # Shape-preserving downsampling keeps payload flat on multi-year ranges
+    rows = downsample_series(rows, max_points)
+    return shape_rows(rows, TimeSeriesPoint, format)
 
 @router.get("/sla_breaches", response_model=list[SLAItem])
-def sla_breaches(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def sla_breaches(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period,
@@ -34,12 +61,12 @@ def sla_breaches(start_date: date | None = None, end_date: date | None = None):
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [SLAItem(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, SLAItem, format)
 
 @router.get("/backlog_by_age_bucket", response_model=list[BreakdownItem])
-def backlog_by_age_bucket(as_of: date | None = None):
+@cached
+async def backlog_by_age_bucket(as_of: date | None = None, format: ResponseFormat = "rows"):
     # When as_of omitted, return latest snapshot (single day) grouped by region
     params = {}
     where = ""
@@ -59,6 +86,18 @@ def backlog_by_age_bucket(as_of: date | None = None):
         GROUP BY region_key
         ORDER BY value DESC
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [BreakdownItem(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, BreakdownItem, format)
+
+@router.get("/all", response_model=OpsBundle)
+async def ops_all(start_date: date | None = None,
+                  end_date: date | None = None,
+                  as_of: date | None = None,
+                  resolution: Resolution = "day",
+                  max_points: Annotated[int | None, Query(ge=3, le=10_000)] = None):
+    fnol_, sla_breaches_, backlog_ = await asyncio.gather(
+        fnol(start_date=start_date, end_date=end_date, resolution=resolution, max_points=max_points),
+        sla_breaches(start_date=start_date, end_date=end_date),
+        backlog_by_age_bucket(as_of=as_of),
+    )
+    return OpsBundle(fnol=fnol_, sla_breaches=sla_breaches_, backlog_by_age_bucket=backlog_)
@@ -1,15 +1,18 @@
 # backend/app/routers/overview.py
+import asyncio
 from fastapi import APIRouter, Query
 from datetime import date
 from sqlalchemy import text
-from app.db import engine
-from app.models import TimeSeriesPoint, RatioSeriesPoint
-from app.utils import between_clause
+from app.db import fetch_all
+from app.cache import cached
+from app.models import TimeSeriesPoint, RatioSeriesPoint, OverviewBundle
+from app.utils import between_clause, shape_rows, ResponseFormat
 
 router = APIRouter(prefix="/api/overview", tags=["overview"])
 
 @router.get("/gwp", response_model=list[TimeSeriesPoint])
-def gwp(start_date: date | None = Query(None), end_date: date | None = Query(None)):
+@cached
+async def gwp(start_date: date | None = Query(None), end_date: date | None = Query(None), format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period, gwp AS value
@@ -17,12 +20,12 @@ def gwp(start_date: date | None = Query(None), end_date: date | None = Query(Non
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [TimeSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, TimeSeriesPoint, format)
 
 @router.get("/loss_ratio", response_model=list[RatioSeriesPoint])
-def loss_ratio(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def loss_ratio(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period,
@@ -33,12 +36,12 @@ def loss_ratio(start_date: date | None = None, end_date: date | None = None):
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [RatioSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, RatioSeriesPoint, format)
 
 @router.get("/claims_frequency", response_model=list[RatioSeriesPoint])
-def claims_frequency(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def claims_frequency(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period,
@@ -49,12 +52,12 @@ def claims_frequency(start_date: date | None = None, end_date: date | None = Non
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [RatioSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, RatioSeriesPoint, format)
 
 @router.get("/avg_settlement_days", response_model=list[TimeSeriesPoint])
-def avg_settlement_days(start_date: date | None = None, end_date: date | None = None):
+@cached
+async def avg_settlement_days(start_date: date | None = None, end_date: date | None = None, format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     sql = text(f"""
         SELECT month_start AS period, avg_days AS value
@@ -62,6 +65,22 @@ def avg_settlement_days(start_date: date | None = None, end_date: date | None =
         {where}
         ORDER BY month_start
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [TimeSeriesPoint(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, TimeSeriesPoint, format)
+
+@router.get("/all", response_model=OverviewBundle)
+async def overview_all(start_date: date | None = None, end_date: date | None = None):
+    # Every Overview widget in one response; the mart queries run concurrently
+    # and each still goes through its own endpoint's response cache.
+    gwp_, loss_ratio_, claims_frequency_, avg_settlement_days_ = await asyncio.gather(
+        gwp(start_date=start_date, end_date=end_date),
+        loss_ratio(start_date=start_date, end_date=end_date),
+        claims_frequency(start_date=start_date, end_date=end_date),
+        avg_settlement_days(start_date=start_date, end_date=end_date),
+    )
+    return OverviewBundle(
+        gwp=gwp_,
+        loss_ratio=loss_ratio_,
+        claims_frequency=claims_frequency_,
+        avg_settlement_days=avg_settlement_days_,
+    )
@@ -11,6 +11,7 @@ from app.db import engine
 # Our NL→Plan→SQL orchestrator
 from AI.LLM.retriever import answer_question
 from AI.LLM.logging import rag_logger
+from AI.LLM.plan_cache import plan_cache
 
 router = APIRouter(prefix="/api/rag", tags=["rag"])
 
@@ -64,3 +65,8 @@ def rag_ask(req: AskReq):
             f"Exception: {str(e)}"
         )
         raise HTTPException(status_code=400, detail=f"Could not answer the question. {e}")
+
+
+@router.get("/plan_cache_stats")
+def rag_plan_cache_stats():
+    return plan_cache.stats()
@@ -1,17 +1,21 @@
 # backend/app/routers/risk.py
+import asyncio
 from fastapi import APIRouter, Query
 from datetime import date
 from sqlalchemy import text
-from app.db import engine
-from app.models import BreakdownItem
-from app.utils import between_clause
+from app.db import fetch_all
+from app.cache import cached
+from app.models import BreakdownItem, RiskBundle
+from app.utils import between_clause, shape_rows, ResponseFormat
 
 router = APIRouter(prefix="/api/risk", tags=["risk"])
 
 @router.get("/claims_by_peril", response_model=list[BreakdownItem])
-def claims_by_peril(start_date: date | None = None,
+@cached
+async def claims_by_peril(start_date: date | None = None,
                     end_date: date | None = None,
-                    top_n: int = Query(10, ge=1, le=100)):
+                    top_n: int = Query(10, ge=1, le=100),
+                    format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     # Aggregate to total per peril in range, then top N by paid_total
     sql = text(f"""
@@ -29,14 +33,15 @@ def claims_by_peril(start_date: date | None = None,
         LIMIT :top_n
     """)
     params["top_n"] = top_n
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [BreakdownItem(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, BreakdownItem, format)
 
 @router.get("/cat_exposure", response_model=list[BreakdownItem])
-def cat_exposure(region: str | None = None,
+@cached
+async def cat_exposure(region: str | None = None,
                  start_date: date | None = None,
-                 end_date: date | None = None):
+                 end_date: date | None = None,
+                 format: ResponseFormat = "rows"):
     where, params = between_clause("month_start", start_date, end_date)
     if region:
         where += (" AND region_key = :region") if where else " WHERE region_key = :region"
@@ -50,6 +55,16 @@ def cat_exposure(region: str | None = None,
         GROUP BY region_key
         ORDER BY value DESC NULLS LAST
     """)
-    with engine.connect() as conn:
-        rows = conn.execute(sql, params).mappings().all()
-    return [BreakdownItem(**row) for row in rows]
+    rows = await fetch_all(sql, params)
+    return shape_rows(rows, BreakdownItem, format)
+
+@router.get("/all", response_model=RiskBundle)
+async def risk_all(start_date: date | None = None,
+                   end_date: date | None = None,
+                   top_n: int = Query(10, ge=1, le=100),
+                   region: str | None = None):
+    claims_by_peril_, cat_exposure_ = await asyncio.gather(
+        claims_by_peril(start_date=start_date, end_date=end_date, top_n=top_n),
+        cat_exposure(region=region, start_date=start_date, end_date=end_date),
+    )
+    return RiskBundle(claims_by_peril=claims_by_peril_, cat_exposure=cat_exposure_)
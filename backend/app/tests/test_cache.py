@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app import cache  # noqa: E402
+from app.cache import ResponseCache, cached  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    """No version watcher and no database behind the generation."""
+    monkeypatch.setattr(cache, "MART_VERSION_POLL_S", 0)
+    monkeypatch.setattr(cache, "read_mart_version", lambda: None)
+    monkeypatch.setattr(cache, "_db_version", None)
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    store = ResponseCache(8)
+    monkeypatch.setattr(cache, "response_cache", store)
+    return store
+
+
+def _counting_endpoint():
+    calls = []
+
+    @cached
+    async def endpoint(start_date=None, end_date=None):
+        calls.append((start_date, end_date))
+        return {"start": start_date, "end": end_date, "n": len(calls)}
+
+    return endpoint, calls
+
+
+def test_same_params_hit_and_different_params_are_isolated(fresh_cache):
+    endpoint, calls = _counting_endpoint()
+    first = asyncio.run(endpoint("2024-01-01"))
+    assert asyncio.run(endpoint(start_date="2024-01-01")) is first
+    assert asyncio.run(endpoint("2024-02-01"))["start"] == "2024-02-01"
+    assert asyncio.run(endpoint("2024-01-01", "2024-12-31"))["end"] == "2024-12-31"
+    assert len(calls) == 3
+    assert fresh_cache.stats()["hits"] == 1
+
+
+def test_generation_bump_invalidates_entries(fresh_cache):
+    endpoint, calls = _counting_endpoint()
+    asyncio.run(endpoint())
+    asyncio.run(endpoint())
+    cache.bump_mart_generation()
+    assert asyncio.run(endpoint())["n"] == 2
+    assert len(calls) == 2
+
+
+def test_lru_evicts_the_least_recently_used():
+    store = ResponseCache(2)
+    store.put("a", 0, 1)
+    store.put("b", 0, 2)
+    assert store.get("a", 0) == 1
+    store.put("c", 0, 3)
+    assert store.get("b", 0) is cache._MISSING
+    assert store.get("a", 0) == 1 and store.get("c", 0) == 3
+    assert store.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    store = ResponseCache(2, ttl_s=0.001)
+    store.put("a", 0, 1)
+    time.sleep(0.01)
+    assert store.get("a", 0) is cache._MISSING
+    assert store.stats()["size"] == 0
+
+
+def test_size_zero_disables_caching(monkeypatch):
+    store = ResponseCache(0)
+    monkeypatch.setattr(cache, "response_cache", store)
+    endpoint, calls = _counting_endpoint()
+    asyncio.run(endpoint())
+    asyncio.run(endpoint())
+    assert len(calls) == 2
+    assert store.stats()["size"] == 0
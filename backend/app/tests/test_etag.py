@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app import cache  # noqa: E402
+from app.cache import _etag_matches, conditional_get  # noqa: E402
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(monkeypatch, calls):
+    monkeypatch.setattr(cache, "MART_VERSION_POLL_S", 0)
+    monkeypatch.setattr(cache, "read_mart_version", lambda: None)
+    monkeypatch.setattr(cache, "_db_version", None)
+    app = FastAPI()
+    app.add_middleware(BaseHTTPMiddleware, dispatch=conditional_get)
+
+    @app.get("/api/overview/gwp")
+    def gwp(start_date: str = ""):
+        calls.append(start_date)
+        return [{"period": "2024-01-01", "value": 1.0}]
+
+    @app.get("/api/rag/ask")
+    def ask():
+        return {"answer": "42"}
+
+    return TestClient(app)
+
+
+def test_if_none_match_parsing():
+    etag = '"abc"'
+    assert _etag_matches('"abc"', etag)
+    assert _etag_matches('"x", "abc" , "y"', etag)
+    assert _etag_matches('W/"abc"', etag)
+    assert _etag_matches('"x", W/"abc"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"abcd", W/"ab"', etag)
+    assert not _etag_matches("", etag)
+    assert not _etag_matches(None, etag)
+
+
+def test_matching_tags_get_304_without_running_the_endpoint(client, calls):
+    first = client.get("/api/overview/gwp")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.headers["cache-control"] == "no-cache"
+
+    for header in (etag, f'"stale", {etag}', f"W/{etag}", "*"):
+        r = client.get("/api/overview/gwp", headers={"If-None-Match": header})
+        assert r.status_code == 304 and r.headers["etag"] == etag and r.content == b""
+    assert client.get("/api/overview/gwp", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert len(calls) == 2
+
+
+def test_etag_depends_on_query_and_mart_generation(client):
+    etag = client.get("/api/overview/gwp").headers["etag"]
+    assert client.get("/api/overview/gwp?start_date=2024-01-01").headers["etag"] != etag
+    cache.bump_mart_generation()
+    r = client.get("/api/overview/gwp", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+
+
+def test_non_mart_routes_are_not_tagged(client):
+    assert "etag" not in client.get("/api/rag/ask").headers
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.export import encode_arrow, encode_csv, encode_ndjson  # noqa: E402
+
+
+def _encode(encoder, batches):
+    async def source():
+        for batch in batches:
+            yield batch
+
+    async def collect():
+        return b"".join([chunk async for chunk in encoder(source())])
+
+    return asyncio.run(collect())
+
+
+COLUMNS = ["month", "peril", "paid"]
+
+
+def test_csv_and_ndjson_stream_every_batch():
+    batches = [(COLUMNS, []), (COLUMNS, [("2024-01", "flood", Decimal("1.5"))]), (COLUMNS, [("2024-02", None, 2)])]
+    assert _encode(encode_csv, batches).decode().splitlines() == [
+        "month,peril,paid", "2024-01,flood,1.5", "2024-02,,2",
+    ]
+    assert _encode(encode_ndjson, batches).splitlines() == [
+        b'{"month":"2024-01","peril":"flood","paid":1.5}',
+        b'{"month":"2024-02","peril":null,"paid":2}',
+    ]
+
+
+def test_arrow_leading_all_null_column_becomes_string():
+    pa = pytest.importorskip("pyarrow")
+    batches = [
+        (COLUMNS, []),
+        (COLUMNS, [("2024-01", None, Decimal("1.5")), ("2024-02", None, None)]),
+        (COLUMNS, [("2024-03", "flood", Decimal("2"))]),
+        (COLUMNS, [("2024-04", 7, Decimal("3"))]),
+    ]
+    table = pa.ipc.open_stream(_encode(encode_arrow, batches)).read_all()
+    assert table.schema.field("peril").type == pa.string()
+    assert table.schema.field("paid").type == pa.float64()
+    assert table.column("peril").to_pylist() == [None, None, "flood", "7"]
+    assert table.column("paid").to_pylist() == [1.5, None, 2.0, 3.0]
+
+
+def test_arrow_empty_result_is_a_valid_stream():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(_encode(encode_arrow, [(COLUMNS, [])])).read_all()
+    assert table.num_rows == 0 and table.schema.names == COLUMNS
@@ -0,0 +1,59 @@
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("DATABASE_URL"), reason="needs DATABASE_URL pointing at a database with core loaded"
+)
+
+
+@pytest.fixture
+def cur():
+    from app.db import engine
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("DROP TABLE IF EXISTS raw.claims_delta")
+        cur.execute("CREATE TABLE raw.claims_delta AS SELECT * FROM core.claims WITH NO DATA")
+        yield cur
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _some_claim(cur):
+    cur.execute("SELECT claim_id, loss_date FROM core.claims ORDER BY claim_id LIMIT 1")
+    return cur.fetchone()
+
+
+def test_corrected_partition_key_moves_the_row(cur):
+    import load_to_db
+
+    claim_id, loss_date = _some_claim(cur)
+    cur.execute("INSERT INTO raw.claims_delta SELECT * FROM core.claims WHERE claim_id = %s", (claim_id,))
+    cur.execute("UPDATE raw.claims_delta SET loss_date = loss_date - 400")
+
+    result = load_to_db.merge_delta(cur, "claims")
+    assert result["updated"] == [claim_id] and result["inserted"] == []
+    cur.execute("SELECT loss_date FROM core.claims WHERE claim_id = %s", (claim_id,))
+    assert cur.fetchall() == [(loss_date - timedelta(days=400),)]
+
+
+def test_id_held_twice_in_core_is_rejected(cur):
+    import load_to_db
+
+    claim_id, _ = _some_claim(cur)
+    # a second row for the same id, as an unserialized writer could leave behind
+    cur.execute("CREATE TEMP TABLE _dup AS SELECT * FROM core.claims WHERE claim_id = %s", (claim_id,))
+    cur.execute("UPDATE _dup SET loss_date = loss_date + 1")
+    cur.execute("INSERT INTO core.claims SELECT * FROM _dup")
+    cur.execute("INSERT INTO raw.claims_delta SELECT * FROM core.claims WHERE claim_id = %s LIMIT 1", (claim_id,))
+
+    with pytest.raises(SystemExit, match="match several rows"):
+        load_to_db.merge_delta(cur, "claims")
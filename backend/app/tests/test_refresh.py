@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# app modules import each other as `app.*`, like under uvicorn from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("DATABASE_URL"), reason="needs DATABASE_URL pointing at a database with core + marts loaded"
+)
+
+
+def _statuses(results):
+    return {r["view"]: r["status"] for r in results}
+
+
+def test_downstream_mart_refreshes_after_upstream_refreshed_in_an_earlier_run():
+    from app.refresh import MART_DEPENDENCIES, refresh_marts
+
+    downstream = "marts.loss_ratio_by_month"
+    upstream = sorted(MART_DEPENDENCIES[downstream])
+    refresh_marts(upstream + [downstream])
+    assert _statuses(refresh_marts([downstream]))[downstream] == "unchanged"
+
+    # an earlier run refreshed the upstream but left the downstream out
+    assert _statuses(refresh_marts(["marts.earned_premium_by_month"], skip_unchanged=False)) == {
+        "marts.earned_premium_by_month": "refreshed"
+    }
+    assert _statuses(refresh_marts([downstream]))[downstream] == "refreshed"
+    assert _statuses(refresh_marts([downstream]))[downstream] == "unchanged"
+
+
+def test_write_just_before_a_rerun_is_not_reported_unchanged():
+    from sqlalchemy import text
+
+    from app.db import engine
+    from app.refresh import refresh_marts
+
+    view = "marts.claim_severity_histogram"
+    refresh_marts([view], skip_unchanged=False)
+    with engine.begin() as conn:
+        # no-op update: still a committed write the pg_stat counters may not show yet
+        conn.execute(text(
+            "UPDATE core.claims SET paid = paid "
+            "WHERE claim_id = (SELECT claim_id FROM core.claims ORDER BY claim_id LIMIT 1)"
+        ))
+    assert _statuses(refresh_marts([view]))[view] == "refreshed"
+
+
+def test_reading_the_job_log_does_not_create_it():
+    from sqlalchemy import text
+
+    from app.db import engine
+    from app.refresh import ensure_refresh_log, logged_job
+
+    ensure_refresh_log()
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE marts.refresh_log RENAME TO refresh_log_saved"))
+    try:
+        assert logged_job("no-such-job") is None
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT to_regclass('marts.refresh_log')")).scalar() is None
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE marts.refresh_log_saved RENAME TO refresh_log"))
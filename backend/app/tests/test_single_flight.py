@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.cache import SingleFlight  # noqa: E402
+
+
+def _value(v):
+    async def fn():
+        await asyncio.sleep(0.01)
+        return v
+
+    return fn
+
+
+def test_followers_get_the_leaders_result():
+    sf = SingleFlight()
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [calls]
+
+    async def main():
+        return await asyncio.gather(*(sf.do("k", query) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert sf.stats()["executions"] == 1 and sf.stats()["coalesced"] == 4
+
+
+def test_different_keys_run_separately():
+    sf = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(sf.do("a", _value("a")), sf.do("b", _value("b")))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert sf.stats()["executions"] == 2
+
+
+def test_exception_reaches_every_waiter_and_releases_the_key():
+    sf = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def main():
+        results = await asyncio.gather(*(sf.do("k", boom) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert sf.stats()["in_flight"] == 0
+        # the next caller runs the query again instead of seeing the old failure
+        return await sf.do("k", _value("ok"))
+
+    assert asyncio.run(main()) == "ok"
+    assert sf.stats()["executions"] == 2
+
+
+def test_cancelled_follower_does_not_cancel_the_shared_query():
+    sf = SingleFlight()
+    release = None
+
+    async def query():
+        await release.wait()
+        return "done"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.ensure_future(sf.do("k", query))
+        follower = asyncio.ensure_future(sf.do("k", query))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        release.set()
+        return await leader
+
+    assert asyncio.run(main()) == "done"
+    assert sf.stats()["executions"] == 1
+
+
+def test_disabled_runs_every_call():
+    sf = SingleFlight(enabled=False)
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        n = calls
+        await asyncio.sleep(0.01)
+        return n
+
+    async def main():
+        return await asyncio.gather(*(sf.do("k", query) for _ in range(3)))
+
+    assert sorted(asyncio.run(main())) == [1, 2, 3]
+    assert sf.stats()["coalesced"] == 0
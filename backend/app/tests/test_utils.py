@@ -0,0 +1,74 @@
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import orjson
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.models import TimeSeriesPoint  # noqa: E402
+from app.utils import columnar_response, downsample_series, lttb_indices, shape_rows  # noqa: E402
+
+ROWS = [
+    {"period": date(2024, 1, 1), "value": Decimal("1.25"), "extra": "x"},
+    {"period": date(2024, 2, 1), "value": None, "extra": "y"},
+    {"period": date(2024, 3, 1), "value": 3, "extra": "z"},
+]
+
+
+def test_columnar_response_has_one_array_per_column():
+    response = columnar_response(ROWS, ["period", "value"])
+    assert response.media_type == "application/json"
+    body = orjson.loads(response.body)
+    assert list(body) == ["period", "value"]
+    assert body == {
+        "period": ["2024-01-01", "2024-02-01", "2024-03-01"],
+        "value": [1.25, None, 3],
+    }
+
+
+def test_columnar_response_for_no_rows_keeps_the_columns():
+    assert orjson.loads(columnar_response([], ["period", "value"]).body) == {"period": [], "value": []}
+
+
+def test_shape_rows_follows_the_model_fields():
+    assert orjson.loads(shape_rows(ROWS, TimeSeriesPoint, "columnar").body) == {
+        "period": ["2024-01-01", "2024-02-01", "2024-03-01"],
+        "value": [1.25, None, 3],
+    }
+    assert shape_rows(ROWS[:1], TimeSeriesPoint) == [TimeSeriesPoint(period=date(2024, 1, 1), value=1.25)]
+
+
+def _series(n):
+    x = np.arange(n, dtype=float)
+    return x, np.sin(x / 7.0) * 100 + (x % 13)
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 3), (100, 10), (1000, 37), (1001, 1000)])
+def test_lttb_keeps_endpoints_and_increasing_indices(n, n_out):
+    idx = lttb_indices(*_series(n), n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    x, y = np.arange(200, dtype=float), np.zeros(200)
+    y[117] = 50.0
+    assert 117 in lttb_indices(x, y, 20)
+
+
+@pytest.mark.parametrize("n_out", [100, 150, 2, 1, 0])
+def test_lttb_returns_everything_when_it_cannot_reduce(n_out):
+    assert lttb_indices(*_series(100), n_out).tolist() == list(range(100))
+
+
+def test_downsample_series_only_when_over_the_limit():
+    rows = [{"period": date(2024, 1, 1) + timedelta(days=i), "value": i % 5} for i in range(50)]
+    assert downsample_series(rows, None) is rows
+    assert downsample_series(rows, 50) is rows
+    picked = downsample_series(rows, 10)
+    assert len(picked) == 10 and picked[0] is rows[0] and picked[-1] is rows[-1]
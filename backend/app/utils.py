@@ -1,6 +1,17 @@
 # backend/app/utils.py
 from datetime import date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Literal, Sequence, Type
+
+import numpy as np
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+# Allowed date_trunc units for server-side resolution control
+Resolution = Literal["day", "week", "month"]
+
+# ?format=rows (default) -> list of objects, ?format=columnar -> {"col": [...], ...}
+ResponseFormat = Literal["rows", "columnar"]
 
 def between_clause(column_name: str, start_date: Optional[date], end_date: Optional[date]) -> tuple[str, Dict[str, Any]]:
     where = []
@@ -13,3 +24,59 @@ def between_clause(column_name: str, start_date: Optional[date], end_date: Optio
         params["end_date"] = end_date
     clause = (" WHERE " + " AND ".join(where)) if where else ""
     return clause, params
+
+def columnar_response(rows: Sequence[Any], columns: Sequence[str]) -> Response:
+    """
+    One array per column, built straight from the row mappings and encoded with
+    orjson. No per-row model objects and no response_model validation pass.
+    """
+    data = {col: [row[col] for row in rows] for col in columns}
+    # numeric columns arrive as Decimal; orjson only calls `default` for those
+    return Response(content=orjson.dumps(data, default=float), media_type="application/json")
+
+def shape_rows(rows: Sequence[Any], model: Type[BaseModel], format: ResponseFormat = "rows"):
+    if format == "columnar":
+        return columnar_response(rows, list(model.model_fields))
+    return [model(**row) for row in rows]
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of the `n_out` points
+    that best preserve the visual shape of (x, y). First and last points are
+    always kept. Bucket averages are computed in one vectorized pass; the
+    selection walks the buckets with a vectorized triangle-area scan in each.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    # n_out - 2 buckets over the interior points [1, n-1); each has >= 1 point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: edges[-1]], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: edges[-1]], edges[:-1]) / counts
+    # the "next" point for bucket i is bucket i+1's average (last point for the final bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample_series(rows: Sequence[Any], max_points: int | None) -> Sequence[Any]:
+    """Apply LTTB to (period, value) rows when there are more than `max_points`."""
+    if not max_points or len(rows) <= max_points:
+        return rows
+    x = np.fromiter((row["period"].toordinal() for row in rows), dtype=float, count=len(rows))
+    y = np.fromiter((float(row["value"] or 0) for row in rows), dtype=float, count=len(rows))
+    return [rows[i] for i in lttb_indices(x, y, max_points)]
@@ -0,0 +1,157 @@
+"""
+Benchmark the join shapes the NL→SQL compiler emits (AI/LLM/compiler.py,
+JOIN_RULES: claims->policies, policies->customers) against core, with and
+without the keys and indexes build_core.sql declares.
+
+"before" runs inside a transaction that drops the primary keys, join-column
+and BRIN indexes and is rolled back afterwards; "after" runs on the tables as
+built. Each query is EXPLAIN ANALYZEd --runs times; the median execution time
+and the plan shape are reported for both.
+
+The drops take an exclusive lock on core.* for the "before" pass, so run it
+against a dev database, not while the API is serving.
+
+Usage (inside the backend container):
+  python scripts/bench_core_joins.py [--runs 5] [--plans]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+if not os.getenv("DATABASE_URL"):
+    raise SystemExit("DATABASE_URL not set")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from AI.LLM.compiler import compile_sql  # noqa: E402
+from AI.LLM.dsl import Plan  # noqa: E402
+
+# what build_core.sql adds on top of the two original date indexes
+BASELINE_DROPS = [
+    "ALTER TABLE core.policies DROP CONSTRAINT IF EXISTS pk_core_policies",
+    "ALTER TABLE core.claims DROP CONSTRAINT IF EXISTS pk_core_claims",
+    "ALTER TABLE core.customers DROP CONSTRAINT IF EXISTS pk_core_customers",
+    "DROP INDEX IF EXISTS core.idx_core_policies_customer_id",
+    "DROP INDEX IF EXISTS core.idx_core_claims_policy_id",
+    "DROP INDEX IF EXISTS core.brin_core_policies_end_date",
+    "DROP INDEX IF EXISTS core.brin_core_claims_report_date",
+    "DROP INDEX IF EXISTS core.brin_core_claims_close_date",
+]
+
+
+def sample_values(conn):
+    """Real keys to filter on, picked from the middle of each table."""
+    def middle(sql):
+        return conn.execute(text(sql)).scalar()
+    return {
+        "customer_id": middle("SELECT customer_id FROM core.customers ORDER BY customer_id "
+                              "OFFSET (SELECT count(*) / 2 FROM core.customers) LIMIT 1"),
+        "policy_id": middle("SELECT policy_id FROM core.claims ORDER BY policy_id "
+                            "OFFSET (SELECT count(*) / 2 FROM core.claims) LIMIT 1"),
+        "county": middle("SELECT county_name FROM core.customers GROUP BY 1 ORDER BY count(*) LIMIT 1"),
+        "month": middle("SELECT date_trunc('month', max(report_date))::date FROM core.claims"),
+    }
+
+
+def join_shapes(v):
+    """(name, Plan) pairs covering the compiler's join edges."""
+    month_end = f"{v['month']:%Y-%m}-28"
+    return [
+        ("claims of one policy", Plan(
+            view="claims", select=["claims.claim_id", "claims.loss_date", "claims.paid"],
+            filters=[{"col": "claims.policy_id", "op": "=", "val": v["policy_id"]}],
+        )),
+        ("claims->policies for one customer", Plan(
+            view="claims", select=["claims.claim_id", "policies.product_type", "claims.paid"],
+            filters=[{"col": "policies.customer_id", "op": "=", "val": v["customer_id"]}],
+            joins=["claims->policies"],
+        )),
+        ("policies->customers for one customer", Plan(
+            view="policies", select=["policies.policy_id", "policies.status", "customers.city"],
+            filters=[{"col": "customers.customer_id", "op": "=", "val": v["customer_id"]}],
+            joins=["policies->customers"],
+        )),
+        ("claims->policies->customers in one county", Plan(
+            view="claims", select=["customers.city"],
+            filters=[{"col": "customers.county_name", "op": "=", "val": v["county"]}],
+            joins=["claims->policies", "policies->customers"],
+            group_by=["customers.city"],
+            aggregations=["count(*) as claims", "sum(claims.paid) as paid"],
+        )),
+        ("claims by county (claims_by_county mart)", Plan(
+            view="claims", select=["customers.county_name"],
+            joins=["claims->policies", "policies->customers"],
+            group_by=["customers.county_name"],
+            aggregations=["count(*) as claims_count", "sum(claims.paid) as paid_sum"],
+            limit=200,
+        )),
+        ("claims reported in one month", Plan(
+            view="claims", aggregations=["count(*) as claims", "sum(claims.reserve) as reserve"],
+            filters=[{"col": "claims.report_date", "op": "BETWEEN", "val": [str(v["month"]), month_end]}],
+        )),
+    ]
+
+
+def plan_shape(node, depth=0):
+    """Compact plan tree: one line per node with the relation/index it touches."""
+    target = node.get("Index Name") or node.get("Relation Name") or ""
+    lines = [f"{'  ' * depth}{node['Node Type']}{' on ' + target if target else ''}"]
+    for child in node.get("Plans", []):
+        lines.extend(plan_shape(child, depth + 1))
+    return lines
+
+
+def measure(conn, sql, params, runs):
+    times, plan = [], None
+    for _ in range(runs):
+        out = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql.rstrip(';')}"), params).scalar_one()
+        doc = (json.loads(out) if isinstance(out, str) else out)[0]
+        times.append(doc["Execution Time"])
+        plan = doc["Plan"]
+    return statistics.median(times), plan_shape(plan)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--runs", type=int, default=5, help="EXPLAIN ANALYZE runs per query (median reported)")
+    p.add_argument("--plans", action="store_true", help="Print the before/after plan trees")
+    args = p.parse_args()
+
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    with engine.connect() as conn:
+        shapes = [(name, *compile_sql(plan)) for name, plan in join_shapes(sample_values(conn))]
+
+    results = {}
+    with engine.connect() as conn:
+        tx = conn.begin()
+        for stmt in BASELINE_DROPS:
+            conn.execute(text(stmt))
+        for name, sql, params in shapes:
+            results[name] = {"before": measure(conn, sql, params, args.runs)}
+        tx.rollback()
+
+    with engine.connect() as conn:
+        for name, sql, params in shapes:
+            results[name]["after"] = measure(conn, sql, params, args.runs)
+
+    print(f"{'query':45s} {'before ms':>10s} {'after ms':>10s} {'speedup':>8s}")
+    for name, r in results.items():
+        (before, _), (after, _) = r["before"], r["after"]
+        print(f"{name:45s} {before:10.2f} {after:10.2f} {before / max(after, 1e-3):7.1f}x")
+
+    if args.plans:
+        for name, sql, _ in shapes:
+            print(f"\n── {name}\n{sql}")
+            for label in ("before", "after"):
+                print(f"  {label}:")
+                for line in results[name][label][1]:
+                    print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
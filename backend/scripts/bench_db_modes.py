@@ -0,0 +1,131 @@
+"""
+Benchmark the sync (threadpool) and async (asyncpg) DB paths of the dashboard API.
+
+For each mode a uvicorn worker is started with DB_ASYNC set accordingly and the
+response cache and single-flight coalescing disabled, so every request reaches
+Postgres. N concurrent clients then hammer a mix of mart endpoints and we report
+throughput and latency.
+
+Usage (inside the backend container):
+  python scripts/bench_db_modes.py --concurrency 50 200 500 --requests 3000
+
+Requires: httpx
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+ENDPOINTS = [
+    "/api/overview/gwp",
+    "/api/overview/loss_ratio",
+    "/api/overview/claims_frequency",
+    "/api/overview/avg_settlement_days",
+    "/api/claims/paid_vs_reserve",
+    "/api/risk/claims_by_peril",
+    "/api/ops/fnol",
+    "/api/c360/retention",
+]
+
+
+def start_server(mode: str, port: int, pool_size: int) -> subprocess.Popen:
+    env = os.environ | {
+        "DB_ASYNC": "1" if mode == "async" else "0",
+        "RESPONSE_CACHE_SIZE": "0",
+        "SINGLE_FLIGHT": "0",
+        "DB_POOL_SIZE": str(pool_size),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{mode} server did not come up on port {port}")
+
+
+async def run_load(base_url: str, concurrency: int, total: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal issued, errors
+        while issued < total:
+            path = ENDPOINTS[issued % len(ENDPOINTS)]
+            issued += 1
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(path)
+                if r.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {
+        "rps": len(latencies) / wall,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "errors": errors,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 500])
+    p.add_argument("--requests", type=int, default=3000, help="Requests per concurrency level")
+    p.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--pool-size", type=int, default=20, help="DB_POOL_SIZE for both modes")
+    args = p.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL not set")
+
+    results = []
+    for mode in args.modes:
+        proc = start_server(mode, args.port, args.pool_size)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(run_load(base_url, 10, 100))  # warm pools
+            for c in args.concurrency:
+                r = asyncio.run(run_load(base_url, c, args.requests))
+                results.append((mode, c, r))
+                print(f"→ {mode:5s} c={c:<4d} {r['rps']:8.1f} req/s  p50={r['p50_ms']:.1f}ms  "
+                      f"p95={r['p95_ms']:.1f}ms  p99={r['p99_ms']:.1f}ms  errors={r['errors']}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print("\nmode   clients   req/s     p50 ms   p95 ms   p99 ms   errors")
+    for mode, c, r in results:
+        print(f"{mode:6s} {c:7d} {r['rps']:8.1f} {r['p50_ms']:9.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['errors']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,78 @@
 -- Rebuild core tables from raw
 
--- Drop and recreate policies
+-- Yearly range partitions for a partitioned core table: one per year in
+-- [lo, hi] plus a DEFAULT partition (out-of-range dates). The partition key is
+-- part of the primary key, so it is NOT NULL: rows without it are rejected below
+-- and by scripts/load_to_db.py --delta instead of landing anywhere. Idempotent;
+-- rows that already landed in the default partition for a new year are moved
+-- into it. Called by this build and by scripts/load_to_db.py --delta.
+CREATE OR REPLACE FUNCTION core.ensure_partitions(parent regclass, lo date, hi date)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+  nsp   text;
+  rel   text;
+  key   text;
+  dflt  text;
+  part  text;
+  y     int;
+BEGIN
+  SELECT n.nspname, c.relname INTO nsp, rel
+  FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+  WHERE c.oid = parent;
+  SELECT a.attname INTO key
+  FROM pg_partitioned_table pt
+  JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+  WHERE pt.partrelid = parent;
+
+  dflt := format('%I.%I', nsp, rel || '_default');
+  IF to_regclass(dflt) IS NULL THEN
+    EXECUTE format('CREATE TABLE %s PARTITION OF %s DEFAULT', dflt, parent);
+  END IF;
+  IF lo IS NULL OR hi IS NULL THEN
+    RETURN;
+  END IF;
+
+  FOR y IN extract(year FROM lo)::int .. extract(year FROM hi)::int LOOP
+    part := format('%I.%I', nsp, rel || '_' || y);
+    CONTINUE WHEN to_regclass(part) IS NOT NULL;
+    EXECUTE format('CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS)', part, parent);
+    EXECUTE format('WITH moved AS (DELETE FROM %s WHERE %I >= $1 AND %I < $2 RETURNING *) '
+                   'INSERT INTO %s SELECT * FROM moved', dflt, key, key, part)
+      USING make_date(y, 1, 1), make_date(y + 1, 1, 1);
+    EXECUTE format('ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+                   parent, part, make_date(y, 1, 1), make_date(y + 1, 1, 1));
+  END LOOP;
+END $$;
+
+-- Drop and recreate policies (partitioned by start_date)
 DROP TABLE IF EXISTS core.policies CASCADE;
-CREATE TABLE core.policies AS
+CREATE TABLE core.policies (
+    policy_id      text,
+    customer_id    text,
+    product_type   text,
+    start_date     date,
+    end_date       date,
+    status         text,
+    channel        text,
+    discount_pct   numeric,
+    gross_premium  numeric
+) PARTITION BY RANGE (start_date);
+
+DO $$
+DECLARE n bigint;
+BEGIN
+  SELECT count(*) INTO n FROM raw.policies WHERE start_date IS NULL;
+  IF n > 0 THEN
+    RAISE EXCEPTION 'raw.policies has % row(s) with a NULL start_date', n
+      USING HINT = 'core.policies is partitioned by start_date (part of its primary key); fix or drop those rows in raw.policies';
+  END IF;
+END $$;
+
+SELECT core.ensure_partitions('core.policies', min(start_date)::date, max(start_date)::date)
+FROM raw.policies;
+
+INSERT INTO core.policies
 SELECT
     policy_id,
     customer_id,
@@ -13,14 +83,47 @@ SELECT
     channel,
     CAST(discount_pct AS numeric)   AS discount_pct,
     CAST(gross_premium AS numeric)  AS gross_premium
-FROM raw.policies;
+FROM raw.policies
+ORDER BY start_date;  -- physical order follows the date, so the BRIN index below stays tight
 
--- Index for performance
+-- Keys + indexes for performance (created on every partition). The partition
+-- key has to be part of the primary key, so policy_id alone is no longer
+-- enforced unique; load_to_db.py merge_delta keeps it unique for delta feeds.
+ALTER TABLE core.policies ADD CONSTRAINT pk_core_policies PRIMARY KEY (policy_id, start_date);
+CREATE INDEX idx_core_policies_customer_id ON core.policies(customer_id);  -- policies->customers
 CREATE INDEX idx_core_policies_start_date ON core.policies(start_date);
+CREATE INDEX brin_core_policies_end_date ON core.policies USING brin (end_date);
 
--- Drop and recreate claims
+-- Drop and recreate claims (partitioned by loss_date)
 DROP TABLE IF EXISTS core.claims CASCADE;
-CREATE TABLE core.claims AS
+CREATE TABLE core.claims (
+    claim_id       text,
+    policy_id      text,
+    product_type   text,
+    loss_date      date,
+    peril          text,
+    status         text,
+    reserve        numeric,
+    paid           numeric,
+    report_date    date,
+    close_date     date,
+    severity_band  text
+) PARTITION BY RANGE (loss_date);
+
+DO $$
+DECLARE n bigint;
+BEGIN
+  SELECT count(*) INTO n FROM raw.claims WHERE loss_date IS NULL;
+  IF n > 0 THEN
+    RAISE EXCEPTION 'raw.claims has % row(s) with a NULL loss_date', n
+      USING HINT = 'core.claims is partitioned by loss_date (part of its primary key); fix or drop those rows in raw.claims';
+  END IF;
+END $$;
+
+SELECT core.ensure_partitions('core.claims', min(loss_date)::date, max(loss_date)::date)
+FROM raw.claims;
+
+INSERT INTO core.claims
 SELECT
     claim_id,
     policy_id,
@@ -33,9 +136,16 @@ SELECT
     CAST(report_date AS date)  AS report_date,
     CAST(close_date AS date)   AS close_date,
     severity_band
-FROM raw.claims;
+FROM raw.claims
+ORDER BY loss_date;  -- report/close dates follow loss_date closely enough for BRIN
 
+-- the partition key has to be part of the primary key (claim_id alone is not
+-- enforced unique; see core.policies)
+ALTER TABLE core.claims ADD CONSTRAINT pk_core_claims PRIMARY KEY (claim_id, loss_date);
+CREATE INDEX idx_core_claims_policy_id ON core.claims(policy_id);  -- claims->policies
 CREATE INDEX idx_core_claims_loss_date ON core.claims(loss_date);
+CREATE INDEX brin_core_claims_report_date ON core.claims USING brin (report_date);
+CREATE INDEX brin_core_claims_close_date ON core.claims USING brin (close_date);
 
 -- Drop and recreate customers
 DROP TABLE IF EXISTS core.customers CASCADE;
@@ -56,3 +166,10 @@ SELECT
     CAST(fire_risk AS numeric),
     CAST(dob AS date) AS dob
 FROM raw.customers;
+
+ALTER TABLE core.customers ADD CONSTRAINT pk_core_customers PRIMARY KEY (customer_id);
+
+-- Fresh planner statistics (autovacuum may not get to new tables for a while)
+ANALYZE core.policies;
+ANALYZE core.claims;
+ANALYZE core.customers;
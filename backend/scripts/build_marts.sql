@@ -139,3 +139,30 @@ ORDER BY 1;
 
 CREATE INDEX IF NOT EXISTS idx_marts_avg_settlement_time_by_month
   ON marts.avg_settlement_time_by_month (month);
+
+-- ─────────────────────────────────────────────────────────────
+-- Refresh audit log (one row per view per /api/admin/refresh_marts job)
+-- ─────────────────────────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS marts.refresh_log (
+  id           bigserial PRIMARY KEY,
+  job_id       text        NOT NULL,
+  view_name    text        NOT NULL,
+  status       text        NOT NULL,
+  started_at   timestamptz,
+  finished_at  timestamptz NOT NULL DEFAULT now(),
+  duration_ms  integer,
+  row_count    bigint,
+  error        text
+);
+
+CREATE INDEX IF NOT EXISTS ix_refresh_log_job
+  ON marts.refresh_log (job_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_log_view_time
+  ON marts.refresh_log (view_name, finished_at);
+
+-- Source fingerprint per mart at its last refresh (skip-unchanged refreshes)
+CREATE TABLE IF NOT EXISTS marts.refresh_fingerprint (
+  view_name     text PRIMARY KEY,
+  fingerprint   text        NOT NULL,
+  refreshed_at  timestamptz NOT NULL DEFAULT now()
+);
@@ -0,0 +1,271 @@
+-- Incremental mart maintenance
+--
+-- Converts the period-bucketed marts from materialized views into plain tables
+-- keyed by period, and records which days were touched in core.claims /
+-- core.policies in marts.change_log. The refresh engine (app/refresh.py) then
+-- recomputes only the dirty buckets of these tables instead of a full REFRESH.
+--
+-- Idempotent. Run once the marts exist (restored from marts_full.dump), and
+-- again whenever core.claims / core.policies are recreated, since the triggers
+-- below go with them. incremental_state is reset so the next refresh
+-- recomputes every incremental mart in full once. On the first conversion the
+-- new tables start with the rows the old views served, and
+-- claims_frequency_by_month / loss_ratio_by_month are refreshed at the end, so
+-- every mart keeps serving throughout.
+
+-- ─────────────────────────────────────────────────────────────
+-- Change log + per-mart watermark
+-- ─────────────────────────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS marts.change_log (
+  id           bigserial PRIMARY KEY,
+  source       text        NOT NULL,   -- e.g. 'core.claims'
+  column_name  text        NOT NULL,   -- date column the day comes from
+  day          date        NOT NULL,
+  logged_at    timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS marts.incremental_state (
+  view_name       text PRIMARY KEY,
+  last_change_id  bigint      NOT NULL,
+  refreshed_at    timestamptz NOT NULL DEFAULT now()
+);
+
+-- Statement-level triggers: one insert per statement with the distinct days
+-- touched, so bulk loads don't pay a per-row trigger.
+CREATE OR REPLACE FUNCTION marts.log_claims_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO marts.change_log (source, column_name, day)
+    SELECT DISTINCT 'core.claims', d.column_name, d.day
+    FROM new_rows r
+    CROSS JOIN LATERAL (VALUES ('loss_date', r.loss_date),
+                               ('report_date', r.report_date),
+                               ('close_date', r.close_date)) AS d(column_name, day)
+    WHERE d.day IS NOT NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO marts.change_log (source, column_name, day)
+    SELECT DISTINCT 'core.claims', d.column_name, d.day
+    FROM old_rows r
+    CROSS JOIN LATERAL (VALUES ('loss_date', r.loss_date),
+                               ('report_date', r.report_date),
+                               ('close_date', r.close_date)) AS d(column_name, day)
+    WHERE d.day IS NOT NULL;
+  END IF;
+  RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION marts.log_policies_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO marts.change_log (source, column_name, day)
+    SELECT DISTINCT 'core.policies', d.column_name, d.day
+    FROM new_rows r
+    CROSS JOIN LATERAL (VALUES ('start_date', r.start_date),
+                               ('end_date', r.end_date)) AS d(column_name, day)
+    WHERE d.day IS NOT NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO marts.change_log (source, column_name, day)
+    SELECT DISTINCT 'core.policies', d.column_name, d.day
+    FROM old_rows r
+    CROSS JOIN LATERAL (VALUES ('start_date', r.start_date),
+                               ('end_date', r.end_date)) AS d(column_name, day)
+    WHERE d.day IS NOT NULL;
+  END IF;
+  RETURN NULL;
+END $$;
+
+-- transition tables need one trigger per event
+DROP TRIGGER IF EXISTS trg_claims_log_ins ON core.claims;
+DROP TRIGGER IF EXISTS trg_claims_log_upd ON core.claims;
+DROP TRIGGER IF EXISTS trg_claims_log_del ON core.claims;
+CREATE TRIGGER trg_claims_log_ins AFTER INSERT ON core.claims
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION marts.log_claims_changes();
+CREATE TRIGGER trg_claims_log_upd AFTER UPDATE ON core.claims
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION marts.log_claims_changes();
+CREATE TRIGGER trg_claims_log_del AFTER DELETE ON core.claims
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION marts.log_claims_changes();
+
+DROP TRIGGER IF EXISTS trg_policies_log_ins ON core.policies;
+DROP TRIGGER IF EXISTS trg_policies_log_upd ON core.policies;
+DROP TRIGGER IF EXISTS trg_policies_log_del ON core.policies;
+CREATE TRIGGER trg_policies_log_ins AFTER INSERT ON core.policies
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION marts.log_policies_changes();
+CREATE TRIGGER trg_policies_log_upd AFTER UPDATE ON core.policies
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION marts.log_policies_changes();
+CREATE TRIGGER trg_policies_log_del AFTER DELETE ON core.policies
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION marts.log_policies_changes();
+
+-- ─────────────────────────────────────────────────────────────
+-- Period-keyed mart tables (replace the materialized views)
+-- ─────────────────────────────────────────────────────────────
+DO $$
+DECLARE v text;
+BEGIN
+  FOREACH v IN ARRAY ARRAY[
+    'claims_by_month', 'claims_count_by_month', 'claims_paid_by_month',
+    'claims_by_peril_month', 'fnol_by_day', 'gwp_by_month', 'channel_mix_by_month',
+    'avg_settlement_days_by_month', 'claims_paid_vs_reserve_by_month',
+    'open_vs_closed_ratio_by_month'
+  ] LOOP
+    IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'marts' AND matviewname = v) THEN
+      -- keep what the view serves so the new table starts out filled
+      IF (SELECT ispopulated FROM pg_matviews WHERE schemaname = 'marts' AND matviewname = v) THEN
+        EXECUTE format('CREATE TEMP TABLE %I AS SELECT * FROM marts.%I', 'carry_' || v, v);
+      END IF;
+      -- CASCADE takes claims_frequency_by_month / loss_ratio_by_month with it
+      EXECUTE format('DROP MATERIALIZED VIEW marts.%I CASCADE', v);
+    END IF;
+  END LOOP;
+END $$;
+
+CREATE TABLE IF NOT EXISTS marts.claims_by_month (
+  month         date PRIMARY KEY,
+  claims_count  bigint  NOT NULL,
+  paid_sum      numeric NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS marts.claims_count_by_month (
+  month_start   date PRIMARY KEY,
+  claims_count  bigint NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS marts.claims_paid_by_month (
+  month_start  date PRIMARY KEY,
+  claims_paid  numeric NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS marts.claims_by_peril_month (
+  month_start   date    NOT NULL,
+  peril         text    NOT NULL,
+  claims_count  bigint  NOT NULL,
+  paid_total    numeric NOT NULL,
+  avg_severity  numeric,
+  PRIMARY KEY (month_start, peril)
+);
+
+CREATE TABLE IF NOT EXISTS marts.fnol_by_day (
+  day         date PRIMARY KEY,
+  fnol_count  bigint NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS marts.gwp_by_month (
+  month_start  date PRIMARY KEY,
+  gwp          numeric
+);
+
+CREATE TABLE IF NOT EXISTS marts.channel_mix_by_month (
+  month_start  date    NOT NULL,
+  channel      text    NOT NULL,
+  gwp          numeric NOT NULL,
+  policies     bigint  NOT NULL,
+  PRIMARY KEY (month_start, channel)
+);
+
+CREATE TABLE IF NOT EXISTS marts.avg_settlement_days_by_month (
+  month_start    date PRIMARY KEY,
+  closed_claims  bigint NOT NULL,
+  avg_days       numeric,
+  p50_days       double precision,
+  p90_days       double precision
+);
+
+CREATE TABLE IF NOT EXISTS marts.claims_paid_vs_reserve_by_month (
+  month_start    date PRIMARY KEY,
+  paid_total     numeric NOT NULL,
+  reserve_total  numeric NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS marts.open_vs_closed_ratio_by_month (
+  month_start           date PRIMARY KEY,
+  opened_count          bigint NOT NULL,
+  closed_count          bigint NOT NULL,
+  closed_to_open_ratio  numeric
+);
+
+-- First conversion: copy the old views' rows (by column name; the period key
+-- comes first and is never NULL in the tables)
+DO $$
+DECLARE v text; cols text;
+BEGIN
+  FOREACH v IN ARRAY ARRAY[
+    'claims_by_month', 'claims_count_by_month', 'claims_paid_by_month',
+    'claims_by_peril_month', 'fnol_by_day', 'gwp_by_month', 'channel_mix_by_month',
+    'avg_settlement_days_by_month', 'claims_paid_vs_reserve_by_month',
+    'open_vs_closed_ratio_by_month'
+  ] LOOP
+    IF to_regclass(format('pg_temp.%I', 'carry_' || v)) IS NOT NULL THEN
+      SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO cols
+      FROM pg_attribute
+      WHERE attrelid = format('marts.%I', v)::regclass AND attnum > 0 AND NOT attisdropped;
+      EXECUTE format('INSERT INTO marts.%I (%s) SELECT %s FROM pg_temp.%I WHERE %s IS NOT NULL',
+                     v, cols, cols, 'carry_' || v, split_part(cols, ', ', 1));
+      EXECUTE format('DROP TABLE pg_temp.%I', 'carry_' || v);
+    END IF;
+  END LOOP;
+END $$;
+
+-- ─────────────────────────────────────────────────────────────
+-- Views on top of the incremental tables stay materialized
+-- (small: one row per calendar month); unique indexes allow CONCURRENTLY.
+-- ─────────────────────────────────────────────────────────────
+-- IF NOT EXISTS: only missing after the CASCADE above (first conversion)
+CREATE MATERIALIZED VIEW IF NOT EXISTS marts.claims_frequency_by_month AS
+SELECT m.month_start,
+       COALESCE(cc.claims_count, 0::bigint)     AS claims_count,
+       COALESCE(pif.policies_in_force, 0::bigint) AS policies_in_force,
+       CASE
+         WHEN COALESCE(pif.policies_in_force, 0::bigint) = 0 THEN NULL::numeric
+         ELSE COALESCE(cc.claims_count, 0::bigint)::numeric / pif.policies_in_force::numeric
+       END AS claims_frequency
+FROM marts.calendar_months m
+LEFT JOIN marts.claims_count_by_month cc ON cc.month_start = m.month_start
+LEFT JOIN marts.policies_in_force_by_month pif ON pif.month_start = m.month_start
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_claims_freq_month
+  ON marts.claims_frequency_by_month (month_start);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS marts.loss_ratio_by_month AS
+SELECT m.month_start,
+       COALESCE(p.claims_paid, 0::numeric)               AS claims_paid,
+       COALESCE(e.earned_premium, 0::double precision)   AS earned_premium,
+       CASE
+         WHEN COALESCE(e.earned_premium, 0::double precision) = 0::double precision THEN NULL::double precision
+         ELSE COALESCE(p.claims_paid, 0::numeric)::double precision / e.earned_premium
+       END AS loss_ratio
+FROM marts.calendar_months m
+LEFT JOIN marts.claims_paid_by_month p ON p.month_start = m.month_start
+LEFT JOIN marts.earned_premium_by_month e ON e.month_start = m.month_start
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_loss_ratio_month
+  ON marts.loss_ratio_by_month (month_start);
+
+-- populate them if they were just created above (a re-run leaves them serving),
+-- unless their other inputs have never been refreshed either
+DO $$
+DECLARE v text;
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'marts' AND NOT ispopulated AND matviewname IN
+             ('calendar_months', 'policies_in_force_by_month', 'earned_premium_by_month')) THEN
+    RETURN;
+  END IF;
+  FOREACH v IN ARRAY ARRAY['claims_frequency_by_month', 'loss_ratio_by_month'] LOOP
+    IF NOT (SELECT ispopulated FROM pg_matviews WHERE schemaname = 'marts' AND matviewname = v) THEN
+      EXECUTE format('REFRESH MATERIALIZED VIEW marts.%I', v);
+    END IF;
+  END LOOP;
+END $$;
+
+-- next refresh rebuilds every incremental mart in full, then goes incremental
+TRUNCATE marts.incremental_state;
@@ -1,4 +1,5 @@
-import argparse, os
+import argparse, csv, io, json, os, queue, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import pandas as pd
 from sqlalchemy import create_engine
@@ -13,35 +14,432 @@ DATE_COLS = {
     "claims": ["loss_date","report_date","close_date"],
 }
 
-def main():
-    p = argparse.ArgumentParser()
-    p.add_argument("--path", required=True, help="Folder with CSVs (container path)")
-    p.add_argument("--schema", default="raw", help="Target schema name (default: raw)")
-    p.add_argument("--replace", action="store_true", help="Replace tables instead of append")
-    args = p.parse_args()
+# Non-text columns for --copy (the types pandas infers for to_sql, so the core
+# build sees the same raw tables either way; DATE_COLS load as date). Anything
+# else is text.
+DOUBLE, BIGINT = "double precision", "bigint"
+RISK_COLS = {c: DOUBLE for c in [
+    "crime_risk","hail_risk","flood_risk","wind_risk","fire_risk",
+    "dist_fire_station_km","dist_hydrant_km","dist_police_km","dist_coast_km","dist_danube_km",
+]}
+COLUMN_TYPES = {
+    "customers": {"postal_code": BIGINT, **RISK_COLS},
+    "policies": {"discount_pct": DOUBLE, "gross_premium": DOUBLE},
+    "coverages": {"limit": DOUBLE, "deductible": BIGINT, "premium_component": DOUBLE},
+    "properties": {"year_built": DOUBLE, "area_sqm": DOUBLE, "floors": DOUBLE, "has_alarm": "boolean",
+                   "replacement_cost": DOUBLE,
+                   "building_value": DOUBLE, "contents_value": DOUBLE},
+    "rental_units": {"personal_property_limit": DOUBLE, "roommates_count": BIGINT},
+    "vehicles": {"year": BIGINT, "annual_mileage": BIGINT, "telematics_score": DOUBLE, "night_driving_pct": DOUBLE,
+                 "hard_brakes_per_100km": DOUBLE, "overspeed_events_per_100km": DOUBLE, "phone_use_pct": DOUBLE},
+    "claims": {"reserve": DOUBLE, "paid": DOUBLE},
+    "loss_events": {"postal_code": BIGINT, "temperature_c": DOUBLE, "precip_mm": DOUBLE, "wind_mps": DOUBLE,
+                    "hail_size_cm": DOUBLE},
+    "geo_features": {"postal_code": BIGINT, **RISK_COLS},
+}
 
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
-        raise SystemExit("DATABASE_URL not set")
+COPY_CHUNK_BYTES = 1 << 20  # bytes handed to COPY per round trip
+PARQUET_BATCH_ROWS = 65536  # Parquet rows decoded at a time
+PARQUET_BATCHES_AHEAD = 4   # serialized batches buffered ahead of COPY (bounds memory)
 
-    engine = create_engine(db_url)
-    base = Path(args.path)
-    mode = "replace" if args.replace else "append"
+# --delta: tables merged into core by primary key (in this order)
+PRIMARY_KEYS = {
+    "customers": "customer_id",
+    "policies": "policy_id",
+    "claims": "claim_id",
+}
+# partition key of the partitioned core tables (build_core.sql)
+PARTITION_KEYS = {
+    "policies": "start_date",
+    "claims": "loss_date",
+}
+
+
+def column_type(table, col):
+    if col in DATE_COLS.get(table, []):
+        return "date"
+    return COLUMN_TYPES.get(table, {}).get(col, "text")
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def read_header(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [c.strip().lower() for c in next(csv.reader(f))]
+
+
+def find_file(base, name):
+    """<name>.parquet if present, else <name>.csv; None if neither exists."""
+    for suffix in (".parquet", ".csv"):
+        f = base / f"{name}{suffix}"
+        if f.exists():
+            return f
+    return None
+
+
+def arrow_pg_type(t):
+    """Postgres column type for an Arrow type, so typed Parquet columns stay typed."""
+    import pyarrow.types as pat  # type: ignore
+
+    if pat.is_boolean(t):
+        return "boolean"
+    if pat.is_int8(t) or pat.is_int16(t) or pat.is_uint8(t):
+        return "smallint"
+    if pat.is_int32(t) or pat.is_uint16(t):
+        return "integer"
+    if pat.is_integer(t):
+        return "bigint"
+    if pat.is_float16(t) or pat.is_float32(t):
+        return "real"
+    if pat.is_float64(t):
+        return DOUBLE
+    if pat.is_decimal(t):
+        return f"numeric({t.precision},{t.scale})"
+    if pat.is_date(t):
+        return "date"
+    if pat.is_timestamp(t):
+        return "timestamptz" if t.tz else "timestamp"
+    return "text"
+
+
+class ArrowCsvStream:
+    """
+    File-like view of a Parquet file as CSV for COPY. A background thread
+    decodes and serializes record batches while COPY sends the previous ones;
+    at most PARQUET_BATCHES_AHEAD batches are held, so memory stays bounded.
+    """
+
+    def __init__(self, parquet_file, columns):
+        self._batches = parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=columns)
+        self._queue = queue.Queue(maxsize=PARQUET_BATCHES_AHEAD)
+        self._closed = threading.Event()
+        self._buf = b""
+        self._pos = 0
+        self._done = False
+        threading.Thread(target=self._produce, daemon=True).start()
+
+    def _produce(self):
+        import pyarrow.csv as pacsv  # type: ignore
+
+        # every non-null value is quoted, so NULL (unquoted empty) and '' stay apart
+        options = pacsv.WriteOptions(include_header=False, quoting_style="all_valid")
+        try:
+            for batch in self._batches:
+                out = io.BytesIO()
+                pacsv.write_csv(batch, out, options)
+                if not self._put(out.getvalue()):
+                    return
+            self._put(None)
+        except BaseException as e:  # re-raised by read() in the COPY thread
+            self._put(e)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(self, size=-1):
+        while not self._done and len(self._buf) - self._pos < max(size, 1):
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                raise item
+            if item is None:
+                self._done = True
+                break
+            self._buf = self._buf[self._pos:] + item
+            self._pos = 0
+        end = len(self._buf) if size < 0 else self._pos + size
+        chunk = self._buf[self._pos:end]
+        self._pos = min(end, len(self._buf))
+        return chunk
+
+    def close(self):
+        self._closed.set()
+
+
+def copy_parquet(engine, path, schema, name, replace):
+    """
+    Stream one Parquet file into schema.name: record batches are fed to COPY
+    FROM STDIN as they are decoded, and the table is created with the file's
+    own column types (no CAST pass needed afterwards).
+    """
+    import pyarrow.parquet as pq  # type: ignore
+
+    pf = pq.ParquetFile(path)
+    fields = list(pf.schema_arrow)
+    table = f"{quote_ident(schema)}.{quote_ident(name)}"
+    col_defs = ", ".join(f"{quote_ident(f.name.strip().lower())} {arrow_pg_type(f.type)}" for f in fields)
+    col_list = ", ".join(quote_ident(f.name.strip().lower()) for f in fields)
 
+    t0 = time.time()
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        if replace:
+            cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ({col_defs})")
+        stream = ArrowCsvStream(pf, [f.name for f in fields])
+        try:
+            cur.copy_expert(f"COPY {table} ({col_list}) FROM STDIN WITH (FORMAT csv)", stream, size=COPY_CHUNK_BYTES)
+        finally:
+            stream.close()
+        rows = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return rows, time.time() - t0
+
+
+def copy_file(engine, path, schema, name, replace):
+    if path.suffix == ".parquet":
+        return copy_parquet(engine, path, schema, name, replace)
+    return copy_table(engine, path, schema, name, replace)
+
+
+def copy_table(engine, path, schema, name, replace):
+    """
+    Stream one CSV into schema.name with COPY FROM STDIN on its own connection.
+    The file is read in COPY_CHUNK_BYTES pieces, so memory stays flat no matter
+    the file size; create + load run in one transaction (all or nothing).
+    """
+    cols = read_header(path)
+    table = f"{quote_ident(schema)}.{quote_ident(name)}"
+    col_defs = ", ".join(f"{quote_ident(c)} {column_type(name, c)}" for c in cols)
+    col_list = ", ".join(quote_ident(c) for c in cols)
+
+    t0 = time.time()
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        if replace:
+            cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ({col_defs})")
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            cur.copy_expert(
+                f"COPY {table} ({col_list}) FROM STDIN WITH (FORMAT csv, HEADER true)",
+                f,
+                size=COPY_CHUNK_BYTES,
+            )
+        rows = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return rows, time.time() - t0
+
+
+def load_copy(engine, base, schema, replace, jobs):
+    files = []
+    for name in TABLES:
+        f = find_file(base, name)
+        if f is None:
+            print(f"skip: {name}.parquet / {name}.csv not found"); continue
+        files.append((name, f))
+
+    t0 = time.time()
+    total = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(copy_file, engine, f, schema, name, replace): name for name, f in files}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            rows, secs = fut.result()
+            total += rows
+            print(f"   done: {name} ({rows} rows, {secs:.1f}s, {rows / max(secs, 1e-9):,.0f} rows/s)")
+    wall = time.time() - t0
+    print(f"→ {total} rows in {wall:.1f}s ({total / max(wall, 1e-9):,.0f} rows/s)")
+
+
+def merge_delta(cur, name):
+    """
+    Merge raw.<name>_delta into core.<name> by primary key. Only rows that are
+    new or differ from core are touched; returns their keys and the old + new
+    values of the table's date columns.
+    """
+    pk = PRIMARY_KEYS[name]
+    q = quote_ident
+    core, staging = f"core.{q(name)}", f"raw.{q(name + '_delta')}"
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (core,))
+    row = cur.fetchone()
+    if row is None:
+        raise SystemExit(f"{core} does not exist; build core first (scripts/build_core.sql) before merging deltas")
+    relkind = row[0]
+    cur.execute("""
+        SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+          AND a.attname IN (SELECT attname FROM pg_attribute
+                            WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped)
+        ORDER BY a.attnum
+    """, (core, staging))
+    cols = cur.fetchall()
+    if not any(c == pk for c, _ in cols):
+        raise SystemExit(f"raw.{name}_delta has no {pk} column")
+    names = [c for c, _ in cols]
+    dates = [c for c in DATE_COLS.get(name, []) if c in names]
+
+    # cast to core's types; the last row wins if a key repeats in the feed
+    cur.execute(f"""
+        CREATE TEMP TABLE _delta ON COMMIT DROP AS
+        SELECT {", ".join(f"CAST(s.{q(c)} AS {t}) AS {q(c)}" for c, t in cols)}
+        FROM (SELECT DISTINCT ON ({q(pk)}) * FROM {staging} ORDER BY {q(pk)}, ctid DESC) s
+    """)
+    key = PARTITION_KEYS.get(name)
+    if key in names and relkind == "p":
+        # The partition key is part of core's primary key, so the database no
+        # longer keeps ids unique. Rows are still matched on the id alone (a
+        # corrected date moves the row instead of adding a second one); merges
+        # serialize on this lock so two feeds can't both insert one id under
+        # different dates, and ids core already holds twice are rejected.
+        cur.execute(f"LOCK TABLE {core} IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute(f"""
+            SELECT count(*) FROM (
+              SELECT t.{q(pk)} FROM {core} t JOIN _delta d ON d.{q(pk)} = t.{q(pk)}
+              GROUP BY t.{q(pk)} HAVING count(*) > 1
+            ) dup
+        """)
+        ambiguous = cur.fetchone()[0]
+        if ambiguous:
+            raise SystemExit(f"{core}: {ambiguous} {pk} value(s) in the feed match several rows (one per {key})")
+        # nor can the partition key be NULL
+        cur.execute(f"SELECT count(*) FROM _delta WHERE {q(key)} IS NULL")
+        missing = cur.fetchone()[0]
+        if missing:
+            raise SystemExit(f"{staging}: {missing} row(s) with a NULL {key}; {core} is partitioned by it")
+        # years the feed reaches into get their partition before the merge
+        cur.execute(f"SELECT core.ensure_partitions(%s, min({q(key)}), max({q(key)})) FROM _delta", (core,))
+    cur.execute(f"""
+        CREATE TEMP TABLE _changed ON COMMIT DROP AS
+        SELECT d.*, t.{q(pk)} IS NULL AS is_new
+               {"".join(f", t.{q(c)} AS {q('old_' + c)}" for c in dates)}
+        FROM _delta d
+        LEFT JOIN {core} t ON t.{q(pk)} = d.{q(pk)}
+        WHERE t.{q(pk)} IS NULL
+           OR ({", ".join(f"t.{q(c)}" for c in names)}) IS DISTINCT FROM ({", ".join(f"d.{q(c)}" for c in names)})
+    """)
+    cur.execute(f"""
+        MERGE INTO {core} t
+        USING _changed s ON t.{q(pk)} = s.{q(pk)}
+        WHEN MATCHED THEN
+          UPDATE SET {", ".join(f"{q(c)} = s.{q(c)}" for c in names if c != pk)}
+        WHEN NOT MATCHED THEN
+          INSERT ({", ".join(q(c) for c in names)}) VALUES ({", ".join(f"s.{q(c)}" for c in names)})
+    """)
+
+    cur.execute(f"SELECT {q(pk)}, is_new FROM _changed ORDER BY 1")
+    keys = cur.fetchall()
+    changed_dates = {}
+    for c in dates:
+        cur.execute(f"""
+            SELECT DISTINCT d FROM _changed, LATERAL (VALUES ({q(c)}), ({q('old_' + c)})) v(d)
+            WHERE d IS NOT NULL ORDER BY 1
+        """)
+        changed_dates[c] = [d.isoformat() for (d,) in cur.fetchall()]
+    cur.execute("DROP TABLE _delta, _changed")
+    return {
+        "inserted": [k for k, new in keys if new],
+        "updated": [k for k, new in keys if not new],
+        "dates": changed_dates,
+    }
+
+
+def load_delta(engine, base, jobs, changes_out):
+    """
+    Delta feed: COPY the customers/policies/claims files into raw.*_delta
+    staging tables, then merge them into core in one transaction (dashboards
+    never see a half-applied feed) and write the changed keys/dates as JSON
+    for downstream mart maintenance.
+    """
+    files = []
+    for name in PRIMARY_KEYS:
+        f = find_file(base, name)
+        if f is None:
+            print(f"skip: {name}.parquet / {name}.csv not found"); continue
+        files.append((name, f))
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(copy_file, engine, f, "raw", f"{name}_delta", True): name for name, f in files}
+        for fut in as_completed(futures):
+            rows, secs = fut.result()
+            print(f"   staged: {futures[fut]} ({rows} rows, {secs:.1f}s)")
+
+    changes = {}
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        for name, _ in files:
+            changes[name] = merge_delta(cur, name)
+            c = changes[name]
+            print(f"   merged: {name} ({len(c['inserted'])} inserted, {len(c['updated'])} updated)")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    with open(changes_out, "w", encoding="utf-8") as f:
+        json.dump({"loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "tables": changes}, f, indent=1)
+    print(f"→ delta applied in {time.time() - t0:.1f}s; changes written to {changes_out}")
+
+
+def load_pandas(engine, base, schema, mode):
     with engine.begin() as conn:
         # set schema for this session
-        conn.exec_driver_sql(f"SET search_path TO {args.schema}, public;")
+        conn.exec_driver_sql(f"SET search_path TO {schema}, public;")
 
         for name in TABLES:
-            f = base / f"{name}.csv"
-            if not f.exists():
-                print(f"skip: {f.name} not found"); continue
+            f = find_file(base, name)
+            if f is None:
+                print(f"skip: {name}.parquet / {name}.csv not found"); continue
             dates = DATE_COLS.get(name, [])
             print(f"→ loading {name} from {f.name} (parse_dates={dates})")
-            df = pd.read_csv(f, parse_dates=dates)
+            if f.suffix == ".parquet":
+                df = pd.read_parquet(f)
+            else:
+                df = pd.read_csv(f, parse_dates=dates)
             df.columns = [c.strip().lower() for c in df.columns]
             df.to_sql(name, conn, if_exists=mode, index=False)
             print(f"   done: {name} ({len(df)} rows)")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--path", required=True, help="Folder with CSV/Parquet files (container path)")
+    p.add_argument("--schema", default="raw", help="Target schema name (default: raw)")
+    p.add_argument("--replace", action="store_true", help="Replace tables instead of append")
+    p.add_argument("--copy", action="store_true", help="Stream files with COPY instead of pandas to_sql")
+    p.add_argument("--jobs", type=int, default=4, help="Tables loaded in parallel with --copy (default: 4)")
+    p.add_argument("--delta", action="store_true",
+                   help="Merge customers/policies/claims files into core by primary key (via raw.*_delta)")
+    p.add_argument("--changes-out", default="delta_changes.json",
+                   help="Where --delta writes the changed keys and dates (default: delta_changes.json)")
+    args = p.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL not set")
+
+    engine = create_engine(db_url, pool_size=max(args.jobs, 1))
+    base = Path(args.path)
+
+    if args.delta:
+        load_delta(engine, base, max(args.jobs, 1), args.changes_out)
+    elif args.copy:
+        load_copy(engine, base, args.schema, args.replace, max(args.jobs, 1))
+    else:
+        load_pandas(engine, base, args.schema, "replace" if args.replace else "append")
     print("All done ✅")
 
 if __name__ == "__main__":
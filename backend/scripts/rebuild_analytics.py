@@ -1,21 +1,215 @@
+"""
+Blue/green rebuild of core + marts from raw.
+
+Everything is built in shadow schemas (core_next, marts_next) while the API
+keeps reading the live `core` / `marts`:
+
+  1. build_core.sql runs against core_next (tables, indexes, change-log triggers)
+  2. every mart in `marts` is recreated in marts_next from its current
+     definition, pointed at core_next, with its indexes; incremental (table)
+     marts are recomputed in full
+  3. ANALYZE the shadow schemas
+  4. one short transaction swaps the schemas by renaming them; bookkeeping
+     tables (refresh_log, change_log, ...) and trigger functions move across
+  5. the previous generation (core_old, marts_old) is dropped once the queries
+     still reading it have finished
+
+Queries in flight keep the relations they already opened, new ones resolve to
+the new schemas, so dashboards never see a missing or half-built mart.
+
+On a fresh database (no `marts` schema yet) marts_next is built from
+build_marts.sql instead, and shadow schemas without a live counterpart are
+simply renamed into place.
+
+Usage (inside the backend container):
+  python scripts/rebuild_analytics.py
+"""
 import os
+import re
+import sys
+import time
+from datetime import date
+from graphlib import TopologicalSorter
+from pathlib import Path
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 
 DB = os.getenv("DATABASE_URL")
 if not DB:
     raise SystemExit("DATABASE_URL is not set")
 
-def run_sql_file(engine, path):
+SCRIPTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS.parent))
+
+from app.refresh import INCREMENTAL_MARTS  # noqa: E402
+
+SWAP_LOCK_TIMEOUT = os.getenv("SWAP_LOCK_TIMEOUT", "5s")
+SWAP_ATTEMPTS = 10
+
+
+def next_schema(sql, *schemas):
+    """Point schema-qualified names in `sql` at the shadow schemas (core. -> core_next.)."""
+    for schema in schemas:
+        sql = re.sub(rf'(?<![\w."]){schema}\.', f"{schema}_next.", sql)
+    return sql
+
+
+def ddl(sql):
+    """text() for DDL read back from the catalog: a ':name' in it is not a bind parameter."""
+    return text(re.sub(r"(?<!:):(?=\w)", r"\\:", sql))
+
+
+def run_sql_file(conn, path, *schemas):
     with open(path, "r", encoding="utf-8") as f:
         sql = f.read()
+    conn.execute(ddl(next_schema(sql, *schemas)))
+
+
+def relations(conn, schema, kinds):
+    """Relations of the given kinds in `schema`; partitions come with their parent."""
+    return conn.execute(text("""
+        SELECT c.oid, c.relname, c.relkind
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = :schema AND c.relkind = ANY(:kinds) AND NOT c.relispartition
+        ORDER BY c.relname
+    """), {"schema": schema, "kinds": list(kinds)}).all()
+
+
+def build_core(conn):
+    run_sql_file(conn, SCRIPTS / "build_core.sql", "core")
+
+    # core tables build_core.sql doesn't produce are carried over as they are
+    built = {r.relname for r in relations(conn, "core_next", "rp")}
+    for r in relations(conn, "core", "r"):
+        if r.relname not in built:
+            conn.execute(text(f'CREATE TABLE core_next."{r.relname}" (LIKE core."{r.relname}" INCLUDING ALL)'))
+            conn.execute(text(f'INSERT INTO core_next."{r.relname}" SELECT * FROM core."{r.relname}"'))
+
+    # change-log triggers (build_marts_incremental.sql); their functions stay in
+    # marts and move to the new schema at swap time
+    triggers = conn.execute(text("""
+        SELECT pg_get_triggerdef(t.oid)
+        FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'core' AND NOT t.tgisinternal AND t.tgparentid = 0
+    """)).scalars().all()
+    for trigger in triggers:
+        conn.execute(ddl(next_schema(trigger, "core")))
+
+
+def mart_order(conn):
+    """Views/tables in marts, each after the marts it selects from."""
+    deps = conn.execute(text("""
+        SELECT DISTINCT c.relname AS view, ref.relname AS source
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_rewrite rw ON rw.ev_class = c.oid
+        JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = rw.oid
+                        AND d.refclassid = 'pg_class'::regclass
+        JOIN pg_class ref ON ref.oid = d.refobjid
+        WHERE n.nspname = 'marts' AND ref.relnamespace = n.oid AND ref.oid <> c.oid
+    """)).all()
+    graph = {r.relname: set() for r in relations(conn, "marts", "rmv")}
+    for view, source in deps:
+        graph[view].add(source)
+    return list(TopologicalSorter(graph).static_order())
+
+
+def build_marts(conn):
+    """Recreate every mart in marts_next; returns the tables to move across at swap time."""
+    rels = {r.relname: r for r in relations(conn, "marts", "rmv")}
+    carried = []
+    for name in mart_order(conn):
+        r = rels[name]
+        view, shadow = f'marts."{name}"', f'marts_next."{name}"'
+        t0 = time.time()
+        if r.relkind in ("m", "v"):
+            definition = conn.execute(text("SELECT pg_get_viewdef(:oid)"), {"oid": r.oid}).scalar_one()
+            kind = "MATERIALIZED VIEW" if r.relkind == "m" else "VIEW"
+            conn.execute(ddl(f"CREATE {kind} {shadow} AS {next_schema(definition.rstrip(' ;'), 'core', 'marts')}"))
+            indexes = conn.execute(
+                text("SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = :oid"), {"oid": r.oid}
+            ).scalars().all()
+            for index in indexes:
+                conn.execute(ddl(next_schema(index, "marts")))
+        elif f"marts.{name}" in INCREMENTAL_MARTS:
+            spec = INCREMENTAL_MARTS[f"marts.{name}"]
+            conn.execute(text(f"CREATE TABLE {shadow} (LIKE {view} INCLUDING ALL)"))
+            conn.execute(text(f"INSERT INTO {shadow} {next_schema(spec.select, 'core')}"),
+                         {"lo": date.min, "hi": date.max, "buckets": None})
+        else:
+            carried.append(name)
+            continue
+        print(f"   built: marts_next.{name} ({time.time() - t0:.1f}s)")
+    return carried
+
+
+def build_shadow(engine):
     with engine.begin() as conn:
-        conn.execute(text(sql))
+        # qualify every name in the definitions we read back
+        conn.execute(text("SET LOCAL search_path TO pg_catalog"))
+        conn.execute(text("DROP SCHEMA IF EXISTS core_next CASCADE; DROP SCHEMA IF EXISTS marts_next CASCADE"))
+        conn.execute(text("CREATE SCHEMA core_next; CREATE SCHEMA marts_next"))
+
+        t0 = time.time()
+        build_core(conn)
+        print(f"→ core_next built ({time.time() - t0:.1f}s)")
+        if conn.execute(text("SELECT to_regnamespace('marts')")).scalar() is None:
+            t0 = time.time()
+            run_sql_file(conn, SCRIPTS / "build_marts.sql", "core", "marts")
+            print(f"→ no marts schema yet: marts_next built from build_marts.sql ({time.time() - t0:.1f}s)")
+            carried = []
+        else:
+            carried = build_marts(conn)
+
+        t0 = time.time()
+        for schema in ("core_next", "marts_next"):
+            for r in relations(conn, schema, "rmp"):
+                conn.execute(text(f'ANALYZE {schema}."{r.relname}"'))
+        print(f"→ analyzed shadow schemas ({time.time() - t0:.1f}s)")
+    return carried
+
+
+def swap(engine, carried):
+    """Make the shadow schemas live in one transaction; retried if a lock isn't granted in time."""
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+                for name in carried:
+                    conn.execute(text(f'ALTER TABLE marts."{name}" SET SCHEMA marts_next'))
+                functions = conn.execute(text("""
+                    SELECT p.oid::regprocedure::text FROM pg_proc p
+                    JOIN pg_namespace n ON n.oid = p.pronamespace WHERE n.nspname = 'marts'
+                """)).scalars().all()
+                for fn in functions:
+                    conn.execute(text(f"ALTER FUNCTION {fn} SET SCHEMA marts_next"))
+                conn.execute(text("DROP SCHEMA IF EXISTS core_old CASCADE; DROP SCHEMA IF EXISTS marts_old CASCADE"))
+                for schema in ("core", "marts"):
+                    # a fresh database has nothing to swap out yet
+                    if conn.execute(text("SELECT to_regnamespace(:schema)"), {"schema": schema}).scalar() is not None:
+                        conn.execute(text(f"ALTER SCHEMA {schema} RENAME TO {schema}_old"))
+                    conn.execute(text(f"ALTER SCHEMA {schema}_next RENAME TO {schema}"))
+            return
+        except OperationalError as e:
+            if getattr(e.orig, "pgcode", None) != "55P03" or attempt == SWAP_ATTEMPTS:  # lock_not_available
+                raise
+            print(f"   swap: lock not granted, retrying ({attempt}/{SWAP_ATTEMPTS})")
+
 
 def main():
     engine = create_engine(DB)
-    run_sql_file(engine, "/app/scripts/build_core.sql")
-    run_sql_file(engine, "/app/scripts/build_marts.sql")
-    print("Rebuilt core + marts ✅")
+    t0 = time.time()
+    carried = build_shadow(engine)
+    swap(engine, carried)
+    print(f"→ swapped in new core + marts ({time.time() - t0:.1f}s)")
+
+    # waits for the queries still reading the previous generation
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS core_old CASCADE; DROP SCHEMA IF EXISTS marts_old CASCADE"))
+    print("Rebuilt core + marts ✅ (the API drops its cached responses within MART_VERSION_POLL_S seconds)")
 
 if __name__ == "__main__":
     main()
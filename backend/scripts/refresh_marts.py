@@ -1,28 +1,50 @@
+"""
+Refresh the marts from the command line with the same engine as
+POST /api/admin/refresh_marts: dependency-ordered and parallel, skipping marts
+whose source tables did not change since their last refresh.
+
+A running backend notices the refresh within MART_VERSION_POLL_S seconds and
+drops its cached responses; the admin endpoint does so immediately.
+
+Usage (inside the backend container):
+  python scripts/refresh_marts.py [--parallelism 4] [--force] [--full]
+"""
+import argparse
 import os
-from sqlalchemy import create_engine, text
+import sys
+from pathlib import Path
 
-DB = os.getenv("DATABASE_URL")
-if not DB:
+if not os.getenv("DATABASE_URL"):
     raise SystemExit("DATABASE_URL is not set")
 
-SQL = """
--- Rebuild core (idempotent) if you want this script to be the single entrypoint:
--- \\i /app/scripts/build_core.sql
-
--- Refresh marts (fast dashboards)
-REFRESH MATERIALIZED VIEW marts.claims_by_month;
-REFRESH MATERIALIZED VIEW marts.loss_ratio_by_month;
-REFRESH MATERIALIZED VIEW marts.claims_by_county;
-REFRESH MATERIALIZED VIEW marts.gwp_by_month;
-REFRESH MATERIALIZED VIEW marts.claims_frequency_by_month;
-REFRESH MATERIALIZED VIEW marts.avg_settlement_time_by_month;
-"""
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.refresh import MART_REFRESH_PARALLELISM, MARTS, refresh_marts  # noqa: E402
+
 
 def main():
-    engine = create_engine(DB)
-    with engine.begin() as conn:
-        conn.execute(text(SQL))
+    p = argparse.ArgumentParser()
+    p.add_argument("--parallelism", type=int, default=MART_REFRESH_PARALLELISM)
+    p.add_argument("--force", action="store_true", help="Refresh even marts whose sources are unchanged")
+    p.add_argument("--full", action="store_true", help="Recompute incremental marts from scratch")
+    p.add_argument("views", nargs="*", help="Subset of marts (default: all)")
+    args = p.parse_args()
+
+    views = args.views or MARTS
+    results = refresh_marts(views, parallelism=args.parallelism, full=args.full, skip_unchanged=not args.force)
+
+    for r in results:
+        detail = r.get("error") or r.get("reason") or ""
+        duration = f"{r['duration_ms']:>7d} ms" if "duration_ms" in r else " " * 10
+        print(f"{r['status']:10s} {duration}  {r['view']}  {detail}")
+
+    skipped = [r["view"] for r in results if r["status"] == "unchanged"]
+    failed = [r["view"] for r in results if r["status"] in ("failed", "skipped")]
+    print(f"Refreshed {len(results) - len(skipped) - len(failed)}, unchanged {len(skipped)}, failed {len(failed)}")
+    if failed:
+        raise SystemExit(1)
     print("Refreshed marts ✅")
 
+
 if __name__ == "__main__":
     main()
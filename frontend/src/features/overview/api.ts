@@ -1,6 +1,6 @@
 import { api } from "../../lib/api";
 import { useQuery } from "@tanstack/react-query";
-import type { TimeSeriesPoint, RatioSeriesPoint } from "./types";
+import type { TimeSeriesPoint, RatioSeriesPoint, OverviewBundle } from "./types";
 
 export async function fetchGwp(params?: { start_date?: string; end_date?: string }) {
   const res = await api.get<TimeSeriesPoint[]>("/api/overview/gwp", { params });
@@ -19,6 +19,12 @@ export async function fetchAvgSettlementDays(params?: { start_date?: string; end
   return res.data;
 }
 
+// All four Overview series in one round trip
+export async function fetchOverviewAll(params?: { start_date?: string; end_date?: string }) {
+  const res = await api.get<OverviewBundle>("/api/overview/all", { params });
+  return res.data;
+}
+
 export const useGwp = (params?: { start_date?: string; end_date?: string }) =>
   useQuery({ queryKey: ["gwp", params], queryFn: () => fetchGwp(params) });
 
@@ -30,3 +36,6 @@ export const useClaimsFrequency = (params?: { start_date?: string; end_date?: st
 
 export const useAvgSettlementDays = (params?: { start_date?: string; end_date?: string }) =>
   useQuery({ queryKey: ["avg_settlement_days", params], queryFn: () => fetchAvgSettlementDays(params) });
+
+export const useOverviewAll = (params?: { start_date?: string; end_date?: string }) =>
+  useQuery({ queryKey: ["overview_all", params], queryFn: () => fetchOverviewAll(params) });
@@ -9,3 +9,10 @@ export type RatioSeriesPoint = {
   denominator: number;
   ratio: number; // 0..1
 };
+
+export type OverviewBundle = {
+  gwp: TimeSeriesPoint[];
+  loss_ratio: RatioSeriesPoint[];
+  claims_frequency: RatioSeriesPoint[];
+  avg_settlement_days: TimeSeriesPoint[];
+};
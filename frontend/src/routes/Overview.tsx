@@ -5,12 +5,7 @@ import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 
 import { fmtCurrency, fmtPct, fmtNumber } from "../lib/fmt";
-import {
-  useGwp,
-  useLossRatio,
-  useClaimsFrequency,
-  useAvgSettlementDays,
-} from "../features/overview/api";
+import { useOverviewAll } from "../features/overview/api";
 import { KpiCard } from "../features/overview/KpiCard";
 import TrendBars from "../features/overview/TrendBars";
 
@@ -40,11 +35,12 @@ export default function Overview() {
     [start, end]
   );
 
-  // Queries
-  const gwp = useGwp(params);
-  const lr = useLossRatio(params);
-  const cf = useClaimsFrequency(params);
-  const asd = useAvgSettlementDays(params);
+  // Queries (one bootstrap request for every widget on the tab)
+  const all = useOverviewAll(params);
+  const gwp = { data: all.data?.gwp };
+  const lr = { data: all.data?.loss_ratio };
+  const cf = { data: all.data?.claims_frequency };
+  const asd = { data: all.data?.avg_settlement_days };
 
   // Aggregations
   const totalGwp = useMemo(
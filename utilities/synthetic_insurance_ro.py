@@ -11,25 +11,41 @@ Adds Romanian-specific geo context:
   - Auto telematics features
   - Weather at loss date (precipitation, wind, hail size, temperature)
 
-Outputs relational CSVs ready for Azure SQL + a blob manifest.
+Outputs relational CSVs (or Parquet) ready for Azure SQL, a manifest with
+row counts and checksums, and a blob manifest.
+
+Every column is drawn in one batched NumPy call. Policies are generated in
+shards with their own seed streams spawned from --seed, on a process pool;
+a run is reproducible for a given --seed and --shard-size whatever the
+number of workers, and scales to millions of policies.
 
 Run example:
   python synth_insurance_ro.py --policies 12000 --seed 42 --out ./out
+  python synth_insurance_ro.py --policies 5000000 --workers 8 --out ./out
 
 Requires: pandas, numpy, faker
 """
 from __future__ import annotations
 import argparse
+import hashlib
+import io
 import os
 import json
-from dataclasses import dataclass
-from datetime import datetime, timedelta, date
+import queue
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from dataclasses import dataclass, replace
+from datetime import date
 import numpy as np
 import pandas as pd
-from faker import Faker
-
-# Romanian locale for realistic names
-fake = Faker("ro_RO")
+# Romanian locale data for realistic names / phone numbers
+from faker.providers.person.ro_RO import Provider as PersonRO
+from faker.providers.phone_number.ro_RO import Provider as PhoneRO
 
 np.set_printoptions(suppress=True)
 
@@ -134,18 +150,46 @@ COVERAGE_TYPES = {
     "commercial_property": ["building","contents","business_interruption","equipment_breakdown","liability"],
 }
 
-rng = np.random.default_rng()
+# County lookup tables (row i ↔ COUNTIES[i]); generators work on county indices
+COUNTY_CODES = np.array([c["code"] for c in COUNTIES])
+COUNTY_NAMES = np.array([c["name"] for c in COUNTIES])
+COUNTY_WEIGHTS = np.array([c["weight"] for c in COUNTIES])
+CITY_NAMES = np.array([city for c in COUNTIES for city in c["cities"]])
+CITY_COUNT = np.array([len(c["cities"]) for c in COUNTIES])
+CITY_OFFSET = np.concatenate([[0], np.cumsum(CITY_COUNT)[:-1]])
+
+def _county_has(*tags) -> np.ndarray:
+    return np.array([any(t in c["tags"] for t in tags) for c in COUNTIES])
+
+URBAN = _county_has("urban_hub", "capital")
+COASTAL = _county_has("coastal", "danube_delta")
+DANUBE = _county_has("danube") | COASTAL
+MOUNTAIN = _county_has("mountain", "carpathians")
+
+# Name / phone / e-mail material from Faker's ro_RO providers, sampled in bulk
+FIRST_NAMES_F = np.array(PersonRO.first_names_female)
+FIRST_NAMES_M = np.array(PersonRO.first_names_male)
+LAST_NAMES = np.array(PersonRO.last_names)
+PHONE_FORMATS = list(PhoneRO.formats)
+EMAIL_DOMAINS = np.array(["example.com", "example.net", "example.org"])
+
+def _ascii_lower(names:np.ndarray) -> np.ndarray:
+    return np.array([unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode().lower() for s in names])
+
+FIRST_NAMES_F_ASCII = _ascii_lower(FIRST_NAMES_F)
+FIRST_NAMES_M_ASCII = _ascii_lower(FIRST_NAMES_M)
+LAST_NAMES_ASCII = _ascii_lower(LAST_NAMES)
 
-# Helpers
+# Helpers (all vectorized: one call draws a whole column)
 
-def pick_county_city():
-    county = rng.choice(COUNTIES, p=[c["weight"] for c in COUNTIES])
-    city = rng.choice(county["cities"])  # simple uniform within county
-    return county, city
+def pick_county_city(n:int, rng:np.random.Generator):
+    county = rng.choice(len(COUNTIES), size=n, p=COUNTY_WEIGHTS)
+    city = CITY_OFFSET[county] + (rng.random(n) * CITY_COUNT[county]).astype(int)  # uniform within county
+    return county, CITY_NAMES[city]
 
-# Synthetic postal code: RO-<two letters><6 digits>
-def make_postal_code(code:str) -> str:
-    return f"{rng.integers(100000,999999)}"
+# Synthetic postal code: 6 digits
+def make_postal_code(n:int, rng:np.random.Generator) -> np.ndarray:
+    return rng.integers(100000, 999999, n).astype(str)
 
 # Risk baselines by tags (0..1)
 TAG_RISK_BASE = {
@@ -168,163 +212,200 @@ TAG_RISK_BASE = {
     "suburban": {"crime": 0.5, "hail": 0.35, "flood": 0.3, "wind": 0.35, "fire": 0.35},
     "seismic": {"crime": 0.4, "hail": 0.35, "flood": 0.35, "wind": 0.35, "fire": 0.45},
 }
+RISKS = ["crime", "hail", "flood", "wind", "fire"]
+
+# Tag average per county (rows) and risk (columns)
+COUNTY_RISK_BASE = np.array([
+    [sum(TAG_RISK_BASE.get(t, {}).get(k, 0) for t in c["tags"]) / max(1, len(c["tags"])) for k in RISKS]
+    for c in COUNTIES
+])
 
 # Convert county tags into numeric risks (with randomness for non-uniformity)
-def county_risks(county_tags:list[str]) -> dict:
-    agg = {"crime":0,"hail":0,"flood":0,"wind":0,"fire":0}
-    for t in county_tags:
-        base = TAG_RISK_BASE.get(t)
-        if not base:
-            continue
-        for k,v in base.items():
-            agg[k] += v
-    # Average + random jitter
-    for k in agg:
-        agg[k] = max(0.01, min(0.99, (agg[k]/max(1,len(county_tags))) * rng.uniform(0.85,1.15)))
-    return agg
+def county_risks(county:np.ndarray, rng:np.random.Generator) -> dict:
+    base = COUNTY_RISK_BASE[county]
+    jittered = np.clip(base * rng.uniform(0.85, 1.15, base.shape), 0.01, 0.99)
+    return {k: jittered[:, j] for j, k in enumerate(RISKS)}
 
 # Proximities (km) based on tags
-def proximities(tags:list[str]) -> dict:
-    urban = ("urban_hub" in tags) or ("capital" in tags)
-    coastal = "coastal" in tags or "danube_delta" in tags
-    danube = "danube" in tags or coastal
+def proximities(county:np.ndarray, rng:np.random.Generator) -> dict:
+    n = len(county)
+    urban, coastal, danube = URBAN[county], COASTAL[county], DANUBE[county]
 
     def sample_distance(base_small:float, base_large:float, heavy_tail:bool=False):
         if heavy_tail:
             # Pareto-like heavy tail
-            x = rng.pareto(2.5) + 0.1
-            return float(np.clip(base_small * x, 0, base_large*3))
-        if urban:
-            return float(np.clip(rng.gamma(2.0, base_small), 0.1, base_large))
-        else:
-            return float(np.clip(rng.gamma(1.5, base_large/2), 0.2, base_large*1.5))
+            x = rng.pareto(2.5, n) + 0.1
+            return np.clip(base_small * x, 0, base_large*3)
+        return np.where(urban,
+                        np.clip(rng.gamma(2.0, base_small, n), 0.1, base_large),
+                        np.clip(rng.gamma(1.5, base_large/2, n), 0.2, base_large*1.5))
 
     return {
         "dist_fire_station_km": sample_distance(0.5, 8, heavy_tail=True),
         "dist_hydrant_km": sample_distance(0.3, 5),
         "dist_police_km": sample_distance(0.7, 12),
-        "dist_coast_km": float(rng.uniform(1,30)) if coastal else float(rng.uniform(80,600)),
-        "dist_danube_km": float(rng.uniform(1,25)) if danube else float(rng.uniform(30,400)),
+        "dist_coast_km": np.where(coastal, rng.uniform(1, 30, n), rng.uniform(80, 600, n)),
+        "dist_danube_km": np.where(danube, rng.uniform(1, 25, n), rng.uniform(30, 400, n)),
     }
 
+# Names, e-mails and phone numbers drawn from the ro_RO provider lists
+def fake_contacts(n:int, rng:np.random.Generator):
+    female = rng.random(n) < 0.5
+    first_f, first_m = rng.integers(0, len(FIRST_NAMES_F), n), rng.integers(0, len(FIRST_NAMES_M), n)
+    second_f, second_m = rng.integers(0, len(FIRST_NAMES_F), n), rng.integers(0, len(FIRST_NAMES_M), n)
+    last = rng.integers(0, len(LAST_NAMES), n)
+    double = rng.random(n) < 0.25  # 1 in 4 formats carries two first names
+
+    first = pd.Series(np.where(female, FIRST_NAMES_F[first_f], FIRST_NAMES_M[first_m]))
+    second = pd.Series(np.where(female, FIRST_NAMES_F[second_f], FIRST_NAMES_M[second_m]))
+    last_name = pd.Series(LAST_NAMES[last])
+    full_name = first + np.where(double, " " + second, "") + " " + last_name
+
+    first_a = pd.Series(np.where(female, FIRST_NAMES_F_ASCII[first_f], FIRST_NAMES_M_ASCII[first_m]))
+    last_a = pd.Series(LAST_NAMES_ASCII[last])
+    style = rng.integers(0, 4, n)
+    digits = pd.Series(rng.integers(10, 100, n).astype(str))
+    user = np.select([style == 0, style == 1, style == 2],
+                     [last_a + first_a, first_a + last_a, first_a + digits],
+                     first_a.str[0] + last_a)
+    email = pd.Series(user) + "@" + EMAIL_DOMAINS[rng.integers(0, len(EMAIL_DOMAINS), n)]
+
+    fmt = rng.integers(0, len(PHONE_FORMATS), n)
+    phone = np.empty(n, dtype=object)
+    for i, f in enumerate(PHONE_FORMATS):
+        idx = np.flatnonzero(fmt == i)
+        if not len(idx):
+            continue
+        k = f.count("#")
+        drawn = pd.Series(rng.integers(0, 10**k, len(idx)).astype(str)).str.zfill(k)
+        out, pos = pd.Series("", index=drawn.index), 0
+        for literal, run in re.findall(r"([^#]*)(#*)", f):
+            out = out + literal + drawn.str[pos:pos+len(run)]
+            pos += len(run)
+        phone[idx] = out.to_numpy()
+
+    return full_name.to_numpy(), email.to_numpy(), phone
+
+# Uniform date of birth for ages 18..80 on today's date
+def date_of_birth(n:int, rng:np.random.Generator) -> np.ndarray:
+    today = np.datetime64(date.today(), "D")
+    return today - rng.integers(int(18*365.25), int(81*365.25), n)
+
 # Weather simulator for loss date conditioned on peril + month + tags
-def simulate_weather(peril:str, month:int, tags:list[str]) -> dict:
-    coastal = "coastal" in tags or "danube_delta" in tags
-    mountain = "mountain" in tags or "carpathians" in tags
+def simulate_weather(peril:np.ndarray, month:np.ndarray, county:np.ndarray, rng:np.random.Generator) -> dict:
+    n = len(peril)
+    coastal, mountain = COASTAL[county], MOUNTAIN[county]
+    hail_peril = peril == "hail"
 
     # Baselines
     t_base = 10 + 12*np.sin((month-3)/12*2*np.pi)  # crude seasonality
-    temp = rng.normal(t_base, 6 if mountain else (5 if coastal else 7))
-    precip = max(0, rng.gamma(2.0, 3.5))
-    wind = rng.normal(6 if coastal else 3.5, 2.0)
-    hail = max(0, rng.normal(0.2 if peril=="hail" else 0.0, 0.25))
+    temp = rng.normal(t_base, np.where(mountain, 6, np.where(coastal, 5, 7)))
+    precip = np.maximum(0, rng.gamma(2.0, 3.5, n))
+    wind = rng.normal(np.where(coastal, 6, 3.5), 2.0)
+    hail = np.maximum(0, rng.normal(np.where(hail_peril, 0.2, 0.0), 0.25))
 
     # Peril adjustments
-    if peril == "hail":
-        precip *= rng.uniform(1.2,2.0)
-        wind *= rng.uniform(1.0,1.3)
-        hail = max(0.2, rng.normal(1.2, 0.5))
-    elif peril in ("water_damage",):
-        precip *= rng.uniform(1.3,2.2)
-    elif peril in ("fire",):
-        precip *= rng.uniform(0.5,0.9)
-        wind *= rng.uniform(0.9,1.1)
+    precip *= np.select([hail_peril, peril == "water_damage", peril == "fire"],
+                        [rng.uniform(1.2, 2.0, n), rng.uniform(1.3, 2.2, n), rng.uniform(0.5, 0.9, n)], 1.0)
+    wind *= np.select([hail_peril, peril == "fire"], [rng.uniform(1.0, 1.3, n), rng.uniform(0.9, 1.1, n)], 1.0)
+    hail = np.where(hail_peril, np.maximum(0.2, rng.normal(1.2, 0.5, n)), hail)
 
     return {
-        "temperature_c": round(float(temp),1),
-        "precip_mm": round(float(precip),1),
-        "wind_mps": round(float(max(0,wind)),1),
-        "hail_size_cm": round(float(hail),2)
+        "temperature_c": np.round(temp, 1),
+        "precip_mm": np.round(precip, 1),
+        "wind_mps": np.round(np.maximum(0, wind), 1),
+        "hail_size_cm": np.round(hail, 2)
     }
 
 # Telematics generator
-def generate_telematics() -> dict:
-    score = float(np.clip(rng.normal(70, 12), 20, 98))
-    night_pct = float(np.clip(rng.beta(2,5), 0, 1))
-    hard_brakes = float(rng.gamma(1.8, 2.5))  # per 100km
-    over_speed = float(rng.gamma(1.3, 1.8))
-    phone_use = float(np.clip(rng.beta(2.2,6.0),0,1))
+def generate_telematics(n:int, rng:np.random.Generator) -> dict:
+    score = np.clip(rng.normal(70, 12, n), 20, 98)
+    night_pct = np.clip(rng.beta(2, 5, n), 0, 1)
+    hard_brakes = rng.gamma(1.8, 2.5, n)  # per 100km
+    over_speed = rng.gamma(1.3, 1.8, n)
+    phone_use = np.clip(rng.beta(2.2, 6.0, n), 0, 1)
     return {
-        "telematics_score": round(score,1),
-        "night_driving_pct": round(night_pct,3),
-        "hard_brakes_per_100km": round(hard_brakes,1),
-        "overspeed_events_per_100km": round(over_speed,1),
-        "phone_use_pct": round(phone_use,3)
+        "telematics_score": np.round(score, 1),
+        "night_driving_pct": np.round(night_pct, 3),
+        "hard_brakes_per_100km": np.round(hard_brakes, 1),
+        "overspeed_events_per_100km": np.round(over_speed, 1),
+        "phone_use_pct": np.round(phone_use, 3)
     }
 
-# Premium modeling helpers
-def homeowner_premium(repl_cost:float, risks:dict, crime:float, discounts:float) -> float:
+# Premium modeling helpers (arrays in, arrays out)
+def homeowner_premium(repl_cost, risks:dict, crime, discounts):
     base = 120.0 + 0.0012 * repl_cost
     rf = 1 + 0.5*risks['hail'] + 0.4*risks['flood'] + 0.2*crime + 0.1*risks['fire']
-    return float(np.clip(base * rf * (1-discounts), 80, 4000))
+    return np.clip(base * rf * (1-discounts), 80, 4000)
 
-def renters_premium(limit_pp:float, risks:dict, crime:float, discounts:float) -> float:
-    base = 40 + 0.003*min(limit_pp, 50000)
+def renters_premium(limit_pp, risks:dict, crime, discounts):
+    base = 40 + 0.003*np.minimum(limit_pp, 50000)
     rf = 1 + 0.25*risks['water'] + 0.35*crime
-    return float(np.clip(base * rf * (1-discounts), 25, 600))
+    return np.clip(base * rf * (1-discounts), 25, 600)
 
-def auto_premium(annual_km:int, telem:dict, risks:dict, crime:float, discounts:float) -> float:
+def auto_premium(annual_km, telem:dict, risks:dict, crime, discounts):
     risk_telem = (100 - telem['telematics_score'])/100
-    base = 180 + 0.01*min(annual_km, 30000)
+    base = 180 + 0.01*np.minimum(annual_km, 30000)
     rf = 1 + 0.6*risk_telem + 0.2*crime + 0.15*risks['wind'] + 0.1*risks['hail']
-    return float(np.clip(base * rf * (1-discounts), 120, 2500))
+    return np.clip(base * rf * (1-discounts), 120, 2500)
 
-def commercial_premium(building:float, contents:float, risks:dict, crime:float, discounts:float) -> float:
+def commercial_premium(building, contents, risks:dict, crime, discounts):
     exposure = building + 0.6*contents
     base = 300 + 0.0006*exposure
     rf = 1 + 0.35*risks['fire'] + 0.4*risks['flood'] + 0.25*crime + 0.1*risks['wind']
-    return float(np.clip(base * rf * (1-discounts), 200, 20000))
+    return np.clip(base * rf * (1-discounts), 200, 20000)
 
 # Claim severity lognormal
-import math
-
-def ln_severity(peril:str) -> float:
-    mu, sigma = SEVERITY_LN[peril]
-    return float(np.random.lognormal(mu, sigma))
+def ln_severity(peril:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+    mu = np.array([SEVERITY_LN[p][0] for p in SEVERITY_LN])
+    sigma = np.array([SEVERITY_LN[p][1] for p in SEVERITY_LN])
+    k = pd.Index(list(SEVERITY_LN)).get_indexer(peril)
+    return rng.lognormal(mu[k], sigma[k])
 
 # Frequency modulator by policy risks
-def policy_freq_multiplier(product:str, risks:dict, crime:float, telem:dict|None) -> float:
-    if product == "homeowners":
-        return 1 + 0.8*risks['hail'] + 0.6*risks['flood'] + 0.3*crime
-    if product == "renters":
-        return 1 + 0.5*crime + 0.3*risks['flood']
-    if product == "auto":
-        telem_risk = (100 - telem['telematics_score'])/100 if telem else 0.3
-        return 1 + 0.9*telem_risk + 0.3*crime + 0.2*risks['wind']
-    if product == "commercial_property":
-        return 1 + 0.5*risks['fire'] + 0.6*risks['flood'] + 0.3*crime
-    return 1.0
+def policy_freq_multiplier(product:np.ndarray, risks:dict, crime, telem_score) -> np.ndarray:
+    telem_risk = np.where(np.isnan(telem_score), 0.3, (100 - telem_score)/100)
+    return np.select(
+        [product == "homeowners", product == "renters", product == "auto", product == "commercial_property"],
+        [1 + 0.8*risks['hail'] + 0.6*risks['flood'] + 0.3*crime,
+         1 + 0.5*crime + 0.3*risks['flood'],
+         1 + 0.9*telem_risk + 0.3*crime + 0.2*risks['wind'],
+         1 + 0.5*risks['fire'] + 0.6*risks['flood'] + 0.3*crime],
+        1.0)
+
+def _ids(prefix:str, idx:np.ndarray, width:int) -> np.ndarray:
+    """Sequential ids (P-000001, ...) for 0-based row numbers."""
+    if len(idx) == 0:
+        return np.empty(0, dtype=f"U{len(prefix) + width}")
+    return np.char.add(prefix, np.char.zfill((idx + 1).astype(str), width))
 
 # -------------------------
 # Generators
 # -------------------------
 
-def generate_customers(n:int):
-    rows=[]
-    for i in range(n):
-        county, city = pick_county_city()
-        risks = county_risks(county['tags'])
-        crime = risks['crime']
-        postal = make_postal_code(county['code'])
-        prox = proximities(county['tags'])
-        rows.append({
-            "customer_id": f"C-{i+1:06d}",
-            "full_name": fake.name(),
-            "email": fake.email(),
-            "phone": fake.phone_number(),
-            "county_code": county['code'],
-            "county_name": county['name'],
-            "city": city,
-            "postal_code": postal,
-            "crime_risk": round(crime,3),
-            "hail_risk": round(risks['hail'],3),
-            "flood_risk": round(risks['flood'],3),
-            "wind_risk": round(risks['wind'],3),
-            "fire_risk": round(risks['fire'],3),
-            **{k:round(v,2) for k,v in prox.items()},
-            "dob": fake.date_of_birth(minimum_age=18, maximum_age=80)
-        })
-    return pd.DataFrame(rows)
+def generate_customers(n:int, rng:np.random.Generator, first_id:int=0):
+    county, city = pick_county_city(n, rng)
+    risks = county_risks(county, rng)
+    postal = make_postal_code(n, rng)
+    prox = proximities(county, rng)
+    full_name, email, phone = fake_contacts(n, rng)
+    return pd.DataFrame({
+        "customer_id": _ids("C-", np.arange(n) + first_id, 6),
+        "full_name": full_name,
+        "email": email,
+        "phone": phone,
+        "county_code": COUNTY_CODES[county],
+        "county_name": COUNTY_NAMES[county],
+        "city": city,
+        "postal_code": postal,
+        "crime_risk": np.round(risks['crime'], 3),
+        "hail_risk": np.round(risks['hail'], 3),
+        "flood_risk": np.round(risks['flood'], 3),
+        "wind_risk": np.round(risks['wind'], 3),
+        "fire_risk": np.round(risks['fire'], 3),
+        **{k: np.round(v, 2) for k, v in prox.items()},
+        "dob": date_of_birth(n, rng)
+    })
 
 VEHICLE_MAKES = {
     "Dacia": ["Logan","Duster","Sandero"],
@@ -338,113 +419,120 @@ COMM_LOC_TYPES = ["office","warehouse","factory","retail"]
 CONSTRUCTION = ["brick","concrete","wood","steel"]
 
 
-def generate_policies(customers:pd.DataFrame, sizes:Sizes):
+def _coverages(pol:np.ndarray, ctypes:list, limits:list, deductibles:list, p:list,
+               premium:np.ndarray, share:tuple, rng:np.random.Generator) -> pd.DataFrame:
+    """One coverage row per (policy, coverage type); `pol` are policy row numbers."""
+    m, k = len(pol), len(ctypes)
+    limit = np.column_stack([np.broadcast_to(np.asarray(l, dtype=float), m) for l in limits]) if m else np.empty((0, k))
+    return pd.DataFrame({
+        "_pol": np.repeat(pol, k),
+        "_pos": np.tile(np.arange(k), m),
+        "coverage_type": np.tile(ctypes, m),
+        "limit": np.round(limit.ravel(), 2),
+        "deductible": rng.choice(deductibles, size=m*k, p=p),
+        "premium_component": np.round(np.repeat(premium, k) * rng.uniform(*share, m*k), 2),
+    })
+
+
+def generate_policies(customers:pd.DataFrame, sizes:Sizes, rng:np.random.Generator, first_id:int=0):
     n = sizes.n_policies
     # Assign product types by shares
-    product_choices = rng.choice(PRODUCTS, size=n, p=[sizes.auto_share, sizes.home_share, sizes.renters_share, sizes.commercial_share])
-    cust_ids = rng.choice(customers.customer_id.values, size=n, replace=True)
-
-    rows_pol=[]; rows_cov=[]; rows_prop=[]; rows_rent=[]; rows_veh=[]
-
-    start_base = date(2024,1,1)
-    for i in range(n):
-        pid = f"P-{i+1:06d}"
-        cid = cust_ids[i]
-        cust = customers.loc[customers.customer_id==cid].iloc[0]
-        product = product_choices[i]
-        # policy term random 6-18 months
-        start = start_base + timedelta(days=int(rng.integers(0, 365)))
-        end = start + timedelta(days=int(rng.integers(180, 540)))
-        status = rng.choice(["active","lapsed","cancelled"], p=[0.86,0.09,0.05])
-        channel = rng.choice(["agent","online","partner"], p=[0.55,0.35,0.10])
-        discounts = float(np.clip(rng.normal(0.05,0.04),0,0.2))
-        risks = {"hail":cust.hail_risk,"flood":cust.flood_risk,"wind":cust.wind_risk,"fire":cust.fire_risk}
-        crime = float(cust.crime_risk)
-
-        premium = 0.0
-        # Product-specific attributes & coverages
-        if product == "homeowners":
-            area = int(np.clip(rng.normal(110, 40), 40, 350))
-            cost_sqm = rng.choice([600,700,800,900,1000], p=[0.1,0.2,0.3,0.25,0.15])
-            repl = area*cost_sqm * rng.uniform(0.9,1.3)
-            floors = int(np.clip(rng.normal(2,0.8),1,4))
-            constr = rng.choice(["brick","concrete","wood"], p=[0.6,0.35,0.05])
-            has_alarm = rng.choice([True,False], p=[0.55,0.45])
-            premium = homeowner_premium(repl, risks, crime, discounts)
-            rows_prop.append({"property_id":f"H-{i+1:06d}","policy_id":pid,"year_built":int(rng.integers(1965,2024)),
-                              "construction":constr,"area_sqm":area,"floors":floors,
-                              "has_alarm":has_alarm,"replacement_cost":round(repl,2)})
-            # coverages
-            for ctype in COVERAGE_TYPES['homeowners']:
-                limit = {"dwelling":repl, "other_structures":0.1*repl, "personal_property": 0.2*repl,
-                         "loss_of_use": 0.1*repl, "personal_liability": 100000, "medical_payments": 5000}[ctype]
-                deductible = rng.choice([250,500,1000,1500], p=[0.2,0.45,0.25,0.1])
-                rows_cov.append({"coverage_id":f"CV-{len(rows_cov)+1:07d}","policy_id":pid,
-                                 "coverage_type":ctype,"limit":round(float(limit),2),"deductible":deductible,
-                                 "premium_component":round(premium* rng.uniform(0.1,0.35),2)})
-        elif product == "renters":
-            limit_pp = float(rng.choice([15000,25000,35000,50000], p=[0.25,0.4,0.25,0.1]))
-            roommates = int(rng.integers(0,3))
-            premium = renters_premium(limit_pp, {"water":cust.flood_risk}, crime, discounts)
-            rows_rent.append({"unit_id":f"R-{i+1:06d}","policy_id":pid,"personal_property_limit":limit_pp,
-                              "roommates_count":roommates,"building_type":rng.choice(["block","house"], p=[0.8,0.2])})
-            for ctype in COVERAGE_TYPES['renters']:
-                limit = {"personal_property":limit_pp, "liability":50000, "loss_of_use":5000}[ctype]
-                deductible = rng.choice([100,250,500], p=[0.3,0.5,0.2])
-                rows_cov.append({"coverage_id":f"CV-{len(rows_cov)+1:07d}","policy_id":pid,
-                                 "coverage_type":ctype,"limit":limit,"deductible":deductible,
-                                 "premium_component":round(premium* rng.uniform(0.15,0.4),2)})
-        elif product == "auto":
-            make = rng.choice(list(VEHICLE_MAKES.keys()))
-            model = rng.choice(VEHICLE_MAKES[make])
-            year = int(rng.integers(2005,2025))
-            annual_km = int(np.clip(rng.normal(12000, 6000), 2000, 35000))
-            telem = generate_telematics()
-            premium = auto_premium(annual_km, telem, risks, crime, discounts)
-            rows_veh.append({"vehicle_id":f"V-{i+1:06d}","policy_id":pid,"make":make,"model":model,
-                             "year":year,"annual_mileage":annual_km, **telem})
-            for ctype in COVERAGE_TYPES['auto']:
-                limit = {"liability_bi":50000, "liability_pd":25000, "collision":15000, "comprehensive":15000,
-                         "uninsured_motorist":25000, "medical_payments":5000}[ctype]
-                deductible = rng.choice([0,200,400,800], p=[0.1,0.4,0.35,0.15])
-                rows_cov.append({"coverage_id":f"CV-{len(rows_cov)+1:07d}","policy_id":pid,
-                                 "coverage_type":ctype,"limit":limit,"deductible":deductible,
-                                 "premium_component":round(premium* rng.uniform(0.07,0.25),2)})
-        else:  # commercial_property
-            loc_type = rng.choice(COMM_LOC_TYPES, p=[0.35,0.35,0.15,0.15])
-            building = float(rng.uniform(100_000, 5_000_000))
-            contents = float(rng.uniform(50_000, 2_500_000))
-            premium = commercial_premium(building, contents, risks, crime, discounts)
-            rows_prop.append({"property_id":f"C-{i+1:06d}","policy_id":pid,"location_type":loc_type,
-                              "sprinkler_grade": rng.choice(["A","B","C","None"], p=[0.25,0.35,0.25,0.15]),
-                              "building_value":round(building,2),"contents_value":round(contents,2)})
-            for ctype in COVERAGE_TYPES['commercial_property']:
-                limit = {"building":building, "contents":contents, "business_interruption":0.4*building,
-                         "equipment_breakdown":0.2*building, "liability":250000}[ctype]
-                deductible = rng.choice([1000,2500,5000,10000], p=[0.25,0.35,0.25,0.15])
-                rows_cov.append({"coverage_id":f"CV-{len(rows_cov)+1:07d}","policy_id":pid,
-                                 "coverage_type":ctype,"limit":round(float(limit),2),"deductible":deductible,
-                                 "premium_component":round(premium* rng.uniform(0.06,0.22),2)})
-
-        rows_pol.append({
-            "policy_id":pid,
-            "customer_id":cid,
-            "product_type":product,
-            "start_date":start,
-            "end_date":end,
-            "status":status,
-            "channel":channel,
-            "discount_pct":round(discounts,3),
-            "gross_premium":round(premium,2)
-        })
+    product = rng.choice(PRODUCTS, size=n, p=[sizes.auto_share, sizes.home_share, sizes.renters_share, sizes.commercial_share])
+    cust = rng.integers(0, len(customers), n)
+    policy_id = _ids("P-", np.arange(n) + first_id, 6)
+
+    # policy term random 6-18 months
+    start = np.datetime64("2024-01-01") + rng.integers(0, 365, n)
+    end = start + rng.integers(180, 540, n)
+    status = rng.choice(["active","lapsed","cancelled"], size=n, p=[0.86,0.09,0.05])
+    channel = rng.choice(["agent","online","partner"], size=n, p=[0.55,0.35,0.10])
+    discounts = np.clip(rng.normal(0.05, 0.04, n), 0, 0.2)
+    risk_cols = {k: customers[f"{k}_risk"].to_numpy()[cust] for k in RISKS}
+    premium = np.zeros(n)
+    cov_parts = []
+
+    def subset(mask):
+        pol = np.flatnonzero(mask)
+        return pol, {k: v[pol] for k, v in risk_cols.items()}, discounts[pol]
+
+    # Homeowners
+    pol, risks, disc = subset(product == "homeowners")
+    m = len(pol)
+    area = np.clip(rng.normal(110, 40, m), 40, 350).astype(int)
+    cost_sqm = rng.choice([600,700,800,900,1000], size=m, p=[0.1,0.2,0.3,0.25,0.15])
+    repl = area*cost_sqm * rng.uniform(0.9, 1.3, m)
+    floors = np.clip(rng.normal(2, 0.8, m), 1, 4).astype(int)
+    constr = rng.choice(["brick","concrete","wood"], size=m, p=[0.6,0.35,0.05])
+    has_alarm = rng.random(m) < 0.55
+    premium[pol] = homeowner_premium(repl, risks, risks['crime'], disc)
+    homes = pd.DataFrame({"_pol": pol, "property_id": _ids("H-", pol + first_id, 6), "policy_id": policy_id[pol],
+                          "year_built": rng.integers(1965, 2024, m), "construction": constr, "area_sqm": area,
+                          "floors": floors, "has_alarm": has_alarm, "replacement_cost": np.round(repl, 2)})
+    cov_parts.append(_coverages(pol, COVERAGE_TYPES['homeowners'],
+                                [repl, 0.1*repl, 0.2*repl, 0.1*repl, 100000, 5000],
+                                [250,500,1000,1500], [0.2,0.45,0.25,0.1], premium[pol], (0.1, 0.35), rng))
+
+    # Renters
+    pol, risks, disc = subset(product == "renters")
+    m = len(pol)
+    limit_pp = rng.choice([15000.0,25000.0,35000.0,50000.0], size=m, p=[0.25,0.4,0.25,0.1])
+    premium[pol] = renters_premium(limit_pp, {"water": risks['flood']}, risks['crime'], disc)
+    rentals = pd.DataFrame({"unit_id": _ids("R-", pol + first_id, 6), "policy_id": policy_id[pol],
+                            "personal_property_limit": limit_pp, "roommates_count": rng.integers(0, 3, m),
+                            "building_type": rng.choice(["block","house"], size=m, p=[0.8,0.2])})
+    cov_parts.append(_coverages(pol, COVERAGE_TYPES['renters'], [limit_pp, 50000, 5000],
+                                [100,250,500], [0.3,0.5,0.2], premium[pol], (0.15, 0.4), rng))
+
+    # Auto
+    pol, risks, disc = subset(product == "auto")
+    m = len(pol)
+    makes = np.array(list(VEHICLE_MAKES))
+    models = np.array(list(VEHICLE_MAKES.values()))
+    make = rng.integers(0, len(makes), m)
+    model = models[make, rng.integers(0, models.shape[1], m)]
+    annual_km = np.clip(rng.normal(12000, 6000, m), 2000, 35000).astype(int)
+    telem = generate_telematics(m, rng)
+    premium[pol] = auto_premium(annual_km, telem, risks, risks['crime'], disc)
+    vehicles = pd.DataFrame({"vehicle_id": _ids("V-", pol + first_id, 6), "policy_id": policy_id[pol], "make": makes[make],
+                             "model": model, "year": rng.integers(2005, 2025, m), "annual_mileage": annual_km, **telem})
+    cov_parts.append(_coverages(pol, COVERAGE_TYPES['auto'], [50000, 25000, 15000, 15000, 25000, 5000],
+                                [0,200,400,800], [0.1,0.4,0.35,0.15], premium[pol], (0.07, 0.25), rng))
 
-    return (
-        pd.DataFrame(rows_pol),
-        pd.DataFrame(rows_cov),
-        pd.DataFrame(rows_prop) if rows_prop else pd.DataFrame(columns=["property_id","policy_id"]),
-        pd.DataFrame(rows_rent) if rows_rent else pd.DataFrame(columns=["unit_id","policy_id"]),
-        pd.DataFrame(rows_veh) if rows_veh else pd.DataFrame(columns=["vehicle_id","policy_id"]) ,
-    )
+    # Commercial property
+    pol, risks, disc = subset(product == "commercial_property")
+    m = len(pol)
+    loc_type = rng.choice(COMM_LOC_TYPES, size=m, p=[0.35,0.35,0.15,0.15])
+    building = rng.uniform(100_000, 5_000_000, m)
+    contents = rng.uniform(50_000, 2_500_000, m)
+    premium[pol] = commercial_premium(building, contents, risks, risks['crime'], disc)
+    commercial = pd.DataFrame({"_pol": pol, "property_id": _ids("C-", pol + first_id, 6), "policy_id": policy_id[pol],
+                               "location_type": loc_type,
+                               "sprinkler_grade": rng.choice(["A","B","C","None"], size=m, p=[0.25,0.35,0.25,0.15]),
+                               "building_value": np.round(building, 2), "contents_value": np.round(contents, 2)})
+    cov_parts.append(_coverages(pol, COVERAGE_TYPES['commercial_property'],
+                                [building, contents, 0.4*building, 0.2*building, 250000],
+                                [1000,2500,5000,10000], [0.25,0.35,0.25,0.15], premium[pol], (0.06, 0.22), rng))
+
+    # Coverages and properties in policy order, as a row-by-row build would emit them
+    coverages = pd.concat(cov_parts, ignore_index=True).sort_values(["_pol", "_pos"], ignore_index=True)
+    coverages.insert(0, "policy_id", policy_id[coverages["_pol"].to_numpy()])
+    coverages.insert(0, "coverage_id", _ids("CV-", np.arange(len(coverages)), 7))
+    coverages = coverages.drop(columns=["_pol", "_pos"])
+    properties = (pd.concat([homes, commercial], ignore_index=True)
+                  .sort_values("_pol", ignore_index=True).drop(columns="_pol"))
+
+    policies = pd.DataFrame({
+        "policy_id": policy_id,
+        "customer_id": customers.customer_id.to_numpy()[cust],
+        "product_type": product,
+        "start_date": start,
+        "end_date": end,
+        "status": status,
+        "channel": channel,
+        "discount_pct": np.round(discounts, 3),
+        "gross_premium": np.round(premium, 2)
+    })
+    return policies, coverages, properties, rentals, vehicles
 
 # Claims generator
 PERILS_BY_PRODUCT = {
@@ -455,90 +543,481 @@ PERILS_BY_PRODUCT = {
 }
 
 
-def generate_claims(policies:pd.DataFrame, customers:pd.DataFrame, vehicles:pd.DataFrame, properties:pd.DataFrame):
-    claims=[]; losses=[]
-    veh_by_pid = {r.policy_id:r for _,r in vehicles.iterrows()} if not vehicles.empty else {}
-    prop_by_pid = {r.policy_id:r for _,r in properties.iterrows()} if not properties.empty else {}
-    for _,p in policies.iterrows():
-        cust = customers.loc[customers.customer_id==p.customer_id].iloc[0]
-        product = p.product_type
-        # Frequency base
-        base = BASE_FREQ[product]
-        # Policy-level multipliers
-        risks = {"hail":cust.hail_risk,"flood":cust.flood_risk,"wind":cust.wind_risk,"fire":cust.fire_risk}
-        crime = float(cust.crime_risk)
-        telem = veh_by_pid[p.policy_id].to_dict() if product=='auto' and p.policy_id in veh_by_pid else None
-        freq_mult = policy_freq_multiplier(product, risks, crime, telem)
-        # Expected annual claims across perils
-        expected_year = sum(base.values()) * freq_mult
-        # Term fraction in years
-        term_days = (pd.to_datetime(p.end_date) - pd.to_datetime(p.start_date)).days
-        horizon_years = max(0.1, term_days / 365.0)
-        lam = expected_year * horizon_years
-        n_claims = rng.poisson(lam=lam)
-        if n_claims==0:
-            continue
-        for _ in range(n_claims):
-            perils = PERILS_BY_PRODUCT[product]
-            probs = np.array([base[x] for x in perils], dtype=float)
-            probs = probs / probs.sum()
-            peril = rng.choice(perils, p=probs)
-            # month weighting
-            month = int(rng.integers(1,13))
-            if peril in SEASONALITY:
-                if rng.random() < 0.7:
-                    # biased draw toward seasonal peaks
-                    month = rng.choice(range(1,13), p=np.array(SEASONALITY[peril])/np.sum(SEASONALITY[peril]))
-            loss_date = pd.to_datetime(p.start_date) + timedelta(days=int(rng.integers(0, term_days)))
-            # ensure month alignment
-            loss_date = loss_date.replace(month=month, day=min(loss_date.day,28))
-            # severity
-            sev = ln_severity(peril)
-            # Apply deductibles caps approximately by product
-            if product=="auto":
-                sev = np.clip(sev, 150, 30000)
-            elif product=="homeowners":
-                base_cap = prop_by_pid.get(p.policy_id, {}).get('replacement_cost', 200000)
-                sev = np.clip(sev, 300, 0.6*base_cap)
-            elif product=="commercial_property":
-                base_cap = prop_by_pid.get(p.policy_id, {}).get('building_value', 1_000_000)
-                sev = np.clip(sev, 1000, 0.7*base_cap)
-            else:
-                sev = np.clip(sev, 150, 25000)
-
-            # status & payments
-            status = rng.choice(["open","closed","denied"], p=[0.2,0.73,0.07])
-            paid = sev * (rng.uniform(0.6,0.95) if status!="denied" else 0.0)
-            reserve = 0.0 if status!="open" else sev * rng.uniform(0.2,0.6)
-            close_date = None if status=="open" else (loss_date + timedelta(days=int(rng.gamma(3.0,5.0))))
-
-            # Weather snapshot
-            wx = simulate_weather(peril, month, [t for t in COUNTIES if t['code']==cust.county_code][0]['tags'])
-
-            claim_id = f"CL-{len(claims)+1:07d}"
-            claims.append({
-                "claim_id":claim_id,
-                "policy_id":p.policy_id,
-                "product_type":product,
-                "loss_date": loss_date.date(),
-                "peril": peril,
-                "status": status,
-                "reserve": round(float(reserve),2),
-                "paid": round(float(paid),2),
-                "report_date": loss_date.date(),
-                "close_date": None if close_date is None else close_date.date(),
-                "severity_band": rng.choice(["low","medium","high","cat"], p=[0.45,0.35,0.18,0.02])
-            })
-            losses.append({
-                "event_id": f"EV-{len(losses)+1:07d}",
-                "claim_id": claim_id,
-                "county_code": cust.county_code,
-                "county_name": cust.county_name,
-                "city": cust.city,
-                "postal_code": cust.postal_code,
-                **wx
-            })
-    return pd.DataFrame(claims), pd.DataFrame(losses)
+def _by_policy(policies:pd.DataFrame, df:pd.DataFrame, col:str) -> np.ndarray:
+    """df[col] aligned with `policies` (NaN where a policy has no row)."""
+    if col not in df:
+        return np.full(len(policies), np.nan)
+    return df.set_index("policy_id")[col].reindex(policies.policy_id).to_numpy(dtype=float)
+
+
+def expected_claims_per_year(policies:pd.DataFrame, customers:pd.DataFrame, vehicles:pd.DataFrame) -> np.ndarray:
+    """Policy-level frequency: expected annual claims across perils, scaled by the policy's risks."""
+    product = policies.product_type.to_numpy()
+    cust = pd.Index(customers.customer_id).get_indexer(policies.customer_id)
+    risks = {k: customers[f"{k}_risk"].to_numpy()[cust] for k in RISKS}
+    freq_mult = policy_freq_multiplier(product, risks, risks['crime'], _by_policy(policies, vehicles, "telematics_score"))
+    base_total = pd.Series({p: sum(f.values()) for p, f in BASE_FREQ.items()})[product].to_numpy()
+    return base_total * freq_mult
+
+
+def draw_perils(product:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+    peril = np.empty(len(product), dtype=object)
+    for prod, perils in PERILS_BY_PRODUCT.items():
+        idx = np.flatnonzero(product == prod)
+        probs = np.array([BASE_FREQ[prod][x] for x in perils], dtype=float)
+        peril[idx] = rng.choice(perils, size=len(idx), p=probs / probs.sum())
+    return peril
+
+
+def cap_severity(sev:np.ndarray, product:np.ndarray, replacement_cost:np.ndarray, building_value:np.ndarray) -> np.ndarray:
+    """Apply deductibles caps approximately by product (NaN property values use the defaults)."""
+    repl_cap = 0.6 * np.nan_to_num(replacement_cost, nan=200000)
+    bldg_cap = 0.7 * np.nan_to_num(building_value, nan=1_000_000)
+    return np.select(
+        [product == "auto", product == "homeowners", product == "commercial_property"],
+        [np.clip(sev, 150, 30000), np.clip(sev, 300, repl_cap), np.clip(sev, 1000, bldg_cap)],
+        np.clip(sev, 150, 25000))
+
+
+def generate_claims(policies:pd.DataFrame, customers:pd.DataFrame, vehicles:pd.DataFrame, properties:pd.DataFrame,
+                    rng:np.random.Generator):
+    pol_ids = policies.policy_id
+    product = policies.product_type.to_numpy()
+    cust = pd.Index(customers.customer_id).get_indexer(policies.customer_id)
+
+    # expected annual claims × term in years
+    start = policies.start_date.to_numpy().astype("datetime64[D]")
+    term_days = (policies.end_date.to_numpy().astype("datetime64[D]") - start).astype(int)
+    horizon_years = np.maximum(0.1, term_days / 365.0)
+    n_claims = rng.poisson(expected_claims_per_year(policies, customers, vehicles) * horizon_years)
+
+    # One row per claim, in policy order
+    pol = np.repeat(np.arange(len(policies)), n_claims)
+    n = len(pol)
+    c_product = product[pol]
+    peril = draw_perils(c_product, rng)
+
+    # month weighting: biased draw toward seasonal peaks for 70% of seasonal perils
+    month = rng.integers(1, 13, n)
+    seasonal = rng.random(n) < 0.7
+    for name, weights in SEASONALITY.items():
+        idx = np.flatnonzero((peril == name) & seasonal)
+        month[idx] = rng.choice(np.arange(1, 13), size=len(idx), p=np.array(weights)/np.sum(weights))
+
+    # loss date inside the term, then moved to the drawn month (day capped at 28)
+    raw = start[pol] + rng.integers(0, term_days[pol])
+    day = np.minimum((raw - raw.astype("datetime64[M]")).astype(int) + 1, 28)
+    year_month = raw.astype("datetime64[Y]").astype(int) * 12 + (month - 1)
+    loss_date = year_month.astype("datetime64[M]").astype("datetime64[D]") + (day - 1)
+
+    # severity, capped approximately by product
+    sev = cap_severity(ln_severity(peril, rng), c_product,
+                       _by_policy(policies, properties, "replacement_cost")[pol],
+                       _by_policy(policies, properties, "building_value")[pol])
+
+    # status & payments
+    status = rng.choice(["open","closed","denied"], size=n, p=[0.2,0.73,0.07])
+    paid = np.where(status != "denied", sev * rng.uniform(0.6, 0.95, n), 0.0)
+    reserve = np.where(status == "open", sev * rng.uniform(0.2, 0.6, n), 0.0)
+    close_date = np.where(status == "open", np.datetime64("NaT"),
+                          loss_date + rng.gamma(3.0, 5.0, n).astype(int))
+
+    # Weather snapshot
+    county = pd.Index(COUNTY_CODES).get_indexer(customers.county_code.to_numpy()[cust[pol]])
+    wx = simulate_weather(peril, month, county, rng)
+
+    claim_id = _ids("CL-", np.arange(n), 7)
+    claims = pd.DataFrame({
+        "claim_id": claim_id,
+        "policy_id": pol_ids.to_numpy()[pol],
+        "product_type": c_product,
+        "loss_date": loss_date,
+        "peril": peril,
+        "status": status,
+        "reserve": np.round(reserve, 2),
+        "paid": np.round(paid, 2),
+        "report_date": loss_date,
+        "close_date": close_date,
+        "severity_band": rng.choice(["low","medium","high","cat"], size=n, p=[0.45,0.35,0.18,0.02])
+    })
+    loss_events = pd.DataFrame({
+        "event_id": _ids("EV-", np.arange(n), 7),
+        "claim_id": claim_id,
+        **{col: customers[col].to_numpy()[cust[pol]] for col in ["county_code","county_name","city","postal_code"]},
+        **wx
+    })
+    return claims, loss_events
+
+# -------------------------
+# Shards
+# -------------------------
+# Policies are generated in fixed-size shards, each with its own seed stream
+# spawned from --seed and its own customers. The split depends only on
+# --policies and --shard-size, so the output is the same for any --workers.
+SHARD_POLICIES = 100_000
+
+@dataclass
+class Shard:
+    index: int
+    seed: np.random.SeedSequence
+    n_customers: int
+    n_policies: int
+    first_customer: int
+    first_policy: int
+
+
+def plan_shards(n_policies:int, n_customers:int, seed:int, shard_policies:int=SHARD_POLICIES) -> list[Shard]:
+    n_shards = max(1, -(-n_policies // shard_policies))
+    pol_bounds = np.minimum(np.arange(n_shards + 1) * shard_policies, n_policies)
+    cust_bounds = n_customers * pol_bounds // max(1, n_policies)
+    cust_bounds[-1] = n_customers
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    return [Shard(i, seeds[i], int(cust_bounds[i+1] - cust_bounds[i]), int(pol_bounds[i+1] - pol_bounds[i]),
+                  int(cust_bounds[i]), int(pol_bounds[i]))
+            for i in range(n_shards)]
+
+
+def generate_shard(shard:Shard, sizes:Sizes) -> dict:
+    """All tables for one shard; CV-/CL-/EV- ids are shard-local until renumber()."""
+    rng = np.random.default_rng(shard.seed)
+    customers = generate_customers(shard.n_customers, rng, first_id=shard.first_customer)
+    policies, coverages, properties, rentals, vehicles = generate_policies(
+        customers, replace(sizes, n_policies=shard.n_policies), rng, first_id=shard.first_policy)
+    claims, loss_events = generate_claims(policies, customers, vehicles, properties, rng)
+    return {"customers": customers, "policies": policies, "coverages": coverages, "properties": properties,
+            "rental_units": rentals, "vehicles": vehicles, "claims": claims, "loss_events": loss_events}
+
+
+def renumber(tables:dict, counts:dict) -> None:
+    """Continue CV-/CL-/EV- numbering after the rows of earlier shards (`counts` is updated)."""
+    cov, claims, events = tables["coverages"], tables["claims"], tables["loss_events"]
+    cov["coverage_id"] = _ids("CV-", np.arange(len(cov)) + counts["coverages"], 7)
+    seq = np.arange(len(claims)) + counts["claims"]  # one loss event per claim, same order
+    claims["claim_id"] = events["claim_id"] = _ids("CL-", seq, 7)
+    events["event_id"] = _ids("EV-", seq, 7)
+    counts["coverages"] += len(cov)
+    counts["claims"] += len(claims)
+
+
+def generate_sharded(shards:list[Shard], sizes:Sizes, workers:int):
+    """Yield each shard's tables, renumbered, in shard order; at most 2×workers shards are held."""
+    counts = {"coverages": 0, "claims": 0}
+    workers = min(workers, len(shards))
+    if workers <= 1:
+        for shard in shards:
+            tables = generate_shard(shard, sizes)
+            renumber(tables, counts)
+            yield tables
+        return
+    todo = iter(shards)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(generate_shard, shard, sizes) for shard in islice(todo, 2 * workers))
+        try:
+            while pending:
+                tables = pending.popleft().result()
+                for shard in islice(todo, 1):
+                    pending.append(pool.submit(generate_shard, shard, sizes))
+                renumber(tables, counts)
+                yield tables
+        finally:
+            for future in pending:
+                future.cancel()
+
+# -------------------------
+# Delta replay
+# -------------------------
+class DeltaReplay:
+    """
+    Day-by-day change feed continuing a generated snapshot, for exercising the
+    incremental path (load_to_db.py --delta, change-log marts). Each day emits
+    full customers/policies/claims rows for:
+      - new customers and the policies they take out that day
+      - FNOL claims on policies in force (reported that day, status open)
+      - open claims that settle (closed or denied, close_date that day)
+      - partial payments / reserve re-estimates on claims still open
+    """
+    SETTLE_RATE = 1/15          # daily chance an open claim settles (snapshot close lag: gamma(3, 5), mean 15 days)
+    PAYMENT_RATE = 0.10         # daily chance an open claim gets a payment / reserve re-estimate
+    DENIED_SHARE = 0.07 / 0.80  # of settlements (snapshot: 73% closed, 7% denied)
+    FNOL_LAG_P = 0.4            # loss → first notice lag ~ geometric, in days
+
+    SNAPSHOT_DATES = {"policies": ("start_date",), "claims": ("loss_date", "report_date", "close_date")}
+
+    def __init__(self, sizes:Sizes, seed:np.random.SeedSequence, start=None):
+        """`start`: first replayed day if already known (--delta-start), else next_day."""
+        self.sizes = sizes
+        self.rng = np.random.default_rng(seed)
+        self.start = None if start is None else pd.Timestamp(start)
+        self.n_customers = self.n_policies = self.n_claims = 0
+        self._last_day = pd.NaT
+        self._policies = []
+        self._open = []
+
+    def add(self, tables:dict) -> None:
+        """
+        Take in one snapshot shard (in shard order): id counters, the latest
+        snapshot date, and only what the replay reads later: the terms of
+        policies that can still be in force and the open claims.
+        """
+        self._last_day = pd.Series([self._last_day] + [
+            tables[name][col].max() for name, cols in self.SNAPSHOT_DATES.items() for col in cols
+        ]).max()  # NaT-skipping
+        # the replay can't start before the latest date seen so far
+        keep_from = self.start if self.start is not None else self._last_day
+        state = self._policy_state(tables)
+        self._policies.append(state[state.end_date >= keep_from].reset_index(drop=True))
+        claims = tables["claims"]
+        self._open.append(claims[claims.status == "open"].reset_index(drop=True))
+        self.n_customers += len(tables["customers"])
+        self.n_policies += len(tables["policies"])
+        self.n_claims += len(claims)
+
+    @property
+    def next_day(self) -> np.datetime64:
+        """The day after the latest snapshot date (policy start, loss, report or close)."""
+        return self._last_day.to_datetime64().astype("datetime64[D]") + 1
+
+    def days(self, start:np.datetime64, n_days:int):
+        """Yield (day, {"customers", "policies", "claims"}) for n_days days from start."""
+        policies = pd.concat(self._policies, ignore_index=True)
+        open_claims = pd.concat(self._open, ignore_index=True)
+        daily_policies = self.n_policies / 365  # the snapshot is one year of new business
+        for d in range(n_days):
+            day = np.datetime64(start, "D") + d
+            customers, new_policies, state = self._new_business(day, max(1, self.rng.poisson(daily_policies)))
+            policies = pd.concat([policies[policies.end_date >= day], state], ignore_index=True)
+            changed, open_claims = self._settle(day, open_claims)
+            fnol = self._fnol(day, policies)
+            open_claims = pd.concat([open_claims, fnol], ignore_index=True)
+            yield day, {"customers": customers, "policies": new_policies,
+                        "claims": pd.concat([changed, fnol], ignore_index=True)}
+
+    @staticmethod
+    def _policy_state(tables:dict) -> pd.DataFrame:
+        policies = tables["policies"]
+        return pd.DataFrame({
+            "policy_id": policies.policy_id.to_numpy(),
+            "product_type": policies.product_type.to_numpy(),
+            "start_date": policies.start_date.to_numpy(),
+            "end_date": policies.end_date.to_numpy(),
+            "rate": expected_claims_per_year(policies, tables["customers"], tables["vehicles"]),
+        })
+
+    def _new_business(self, day:np.datetime64, n_policies:int):
+        rng = self.rng
+        customers = generate_customers(int(np.ceil(n_policies * 0.6)), rng, first_id=self.n_customers)
+        policies, _, _, _, vehicles = generate_policies(
+            customers, replace(self.sizes, n_policies=n_policies), rng, first_id=self.n_policies)
+        term = policies.end_date - policies.start_date
+        policies["start_date"] = pd.Timestamp(day)
+        policies["end_date"] = policies.start_date + term
+        self.n_customers += len(customers)
+        self.n_policies += n_policies
+        state = self._policy_state({"policies": policies, "customers": customers, "vehicles": vehicles})
+        return customers, policies, state
+
+    def _fnol(self, day:np.datetime64, policies:pd.DataFrame) -> pd.DataFrame:
+        rng = self.rng
+        in_force = policies[(policies.start_date <= day) & (policies.end_date >= day)]
+        pol = np.repeat(np.arange(len(in_force)), rng.poisson(in_force.rate.to_numpy() / 365))
+        n = len(pol)
+        product = in_force.product_type.to_numpy()[pol]
+        peril = draw_perils(product, rng)
+        start = in_force.start_date.to_numpy().astype("datetime64[D]")[pol]
+        loss_date = np.maximum(day - (rng.geometric(self.FNOL_LAG_P, n) - 1), start)
+        sev = cap_severity(ln_severity(peril, rng), product, np.full(n, np.nan), np.full(n, np.nan))
+        claims = pd.DataFrame({
+            "claim_id": _ids("CL-", np.arange(n) + self.n_claims, 7),
+            "policy_id": in_force.policy_id.to_numpy()[pol],
+            "product_type": product,
+            "loss_date": loss_date,
+            "peril": peril,
+            "status": "open",
+            "reserve": np.round(sev * rng.uniform(0.8, 1.2, n), 2),  # case reserve at first notice
+            "paid": 0.0,
+            "report_date": np.full(n, day),
+            "close_date": np.full(n, np.datetime64("NaT", "D")),
+            "severity_band": rng.choice(["low","medium","high","cat"], size=n, p=[0.45,0.35,0.18,0.02])
+        })
+        self.n_claims += n
+        return claims
+
+    def _settle(self, day:np.datetime64, open_claims:pd.DataFrame):
+        """(changed rows, claims still open) after one day of settlements and payments."""
+        rng = self.rng
+        n = len(open_claims)
+        u = rng.random(n)
+        settle = u < self.SETTLE_RATE
+        pay = ~settle & (u < self.SETTLE_RATE + self.PAYMENT_RATE)
+        denied = settle & (rng.random(n) < self.DENIED_SHARE)
+        reserve, paid = open_claims.reserve.to_numpy(), open_claims.paid.to_numpy()
+        payment = np.where(pay, reserve * rng.uniform(0.1, 0.4, n), 0.0)
+        settlement = reserve * rng.uniform(0.8, 1.2, n)
+        re_estimate = rng.uniform(0.9, 1.2, n)
+        loss_date = open_claims.loss_date.to_numpy().astype("datetime64[D]")
+        updated = open_claims.assign(
+            status=np.where(denied, "denied", np.where(settle, "closed", "open")),
+            paid=np.round(np.where(denied, 0.0, np.where(settle, paid + settlement, paid + payment)), 2),
+            reserve=np.round(np.where(settle, 0.0, np.where(pay, (reserve - payment) * re_estimate, reserve)), 2),
+            close_date=np.where(settle, np.maximum(day, loss_date), np.datetime64("NaT", "D")),
+        )
+        return updated[settle | pay], updated[~settle].reset_index(drop=True)
+
+# -------------------------
+# Output
+# -------------------------
+GEO_COLUMNS = ["county_code","county_name","city","postal_code","crime_risk","hail_risk","flood_risk","wind_risk",
+               "fire_risk","dist_fire_station_km","dist_hydrant_km","dist_police_km","dist_coast_km","dist_danube_km"]
+
+
+class TableWriter:
+    """Appends chunks of one table to <out>/<name>.csv or .parquet (one row group per chunk)."""
+
+    def __init__(self, out:str, name:str, fmt:str):
+        self.path = os.path.join(out, f"{name}.{fmt}")
+        self.fmt = fmt
+        self.rows = 0
+        self._file = open(self.path, "w", encoding="utf-8", newline="") if fmt == "csv" else None
+        self._parquet = None
+
+    def write(self, df:pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            df.to_csv(self._file, header=self._file.tell() == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                # dates are generated as datetime64; store them as Parquet dates
+                schema = pa.schema([f.with_type(pa.date32()) if pa.types.is_timestamp(f.type) else f
+                                    for f in table.schema]).remove_metadata()
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self.rows += len(df)
+
+    def close(self) -> dict:
+        if self._file is not None:
+            self._file.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return {"file": os.path.basename(self.path), "rows": self.rows,
+                "bytes": os.path.getsize(self.path), "sha256": digest.hexdigest()}
+
+def pg_type(col:pd.Series) -> str:
+    """Postgres type for a generated column (raw tables created by --dsn)."""
+    values = col.dropna()
+    if pd.api.types.is_bool_dtype(col) or (col.dtype == object and len(values) and values.map(type).eq(bool).all()):
+        return "boolean"  # has_alarm is bool with NaN for commercial properties
+    if pd.api.types.is_integer_dtype(col):
+        return "bigint"
+    if pd.api.types.is_float_dtype(col):
+        return "double precision"
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return "date"
+    return "text"
+
+
+def quote_ident(name:str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class PgSink:
+    """
+    Streams shards into Postgres with COPY on a background thread while the
+    next shard is being generated; at most SINK_SHARDS_AHEAD shards wait in
+    between. Each shard is committed on its own.
+
+    schema="raw" creates raw.<table> from the generated columns. schema="core"
+    appends customers/policies/claims to the core tables built by
+    build_core.sql (yearly partitions are added as needed, only the columns
+    core keeps are copied); the other tables still go to raw.
+    """
+    CORE_TABLES = {"customers", "policies", "claims"}
+    PARTITION_KEYS = {"policies": "start_date", "claims": "loss_date"}
+    SINK_SHARDS_AHEAD = 2
+
+    def __init__(self, dsn:str, schema:str, replace_tables:bool):
+        import psycopg2
+
+        self.conn = psycopg2.connect(re.sub(r"^postgresql\+\w+://", "postgresql://", dsn))
+        self.schema = schema
+        self.replace = replace_tables
+        self.rows = {}
+        self._columns = {}
+        self._queue = queue.Queue(maxsize=self.SINK_SHARDS_AHEAD)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, tables:dict) -> None:
+        self._queue.put(tables)
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> dict:
+        self._queue.put(None)
+        self._thread.join()
+        self.conn.close()
+        if self._error is not None:
+            raise self._error
+        return self.rows
+
+    def _run(self):
+        while (tables := self._queue.get()) is not None:
+            if self._error is not None:
+                continue  # keep draining so put() never blocks after a failure
+            try:
+                self._load(tables)
+            except BaseException as e:  # re-raised by put()/close() in the main thread
+                self.conn.rollback()
+                self._error = e
+
+    def target(self, name:str) -> str:
+        schema = "core" if self.schema == "core" and name in self.CORE_TABLES else "raw"
+        return f"{schema}.{quote_ident(name)}"
+
+    def _prepare(self, cur, name:str, df:pd.DataFrame) -> list:
+        """Create/empty the target on its first chunk; returns the columns to copy."""
+        table = self.target(name)
+        if table.startswith("core."):
+            cur.execute("SELECT to_regclass(%s)", (table,))
+            if cur.fetchone()[0] is None:
+                raise SystemExit(f"{table} does not exist; run build_core.sql once before --schema core")
+            cur.execute("SELECT attname FROM pg_attribute WHERE attrelid = %s::regclass AND attnum > 0 "
+                        "AND NOT attisdropped", (table,))
+            existing = {r[0] for r in cur.fetchall()}
+            if self.replace:
+                cur.execute(f"TRUNCATE {table}")
+            return [c for c in df.columns if c in existing]
+        cur.execute("CREATE SCHEMA IF NOT EXISTS raw")
+        if self.replace:
+            cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        col_defs = ", ".join(f"{quote_ident(c)} {pg_type(df[c])}" for c in df.columns)
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ({col_defs})")
+        return list(df.columns)
+
+    def _load(self, tables:dict) -> None:
+        with self.conn.cursor() as cur:
+            for name, df in tables.items():
+                if name not in self._columns:
+                    self._columns[name] = self._prepare(cur, name, df)
+                cols = self._columns[name]
+                table = self.target(name)
+                key = self.PARTITION_KEYS.get(name)
+                if table.startswith("core.") and key and len(df):
+                    cur.execute("SELECT core.ensure_partitions(%s::regclass, %s::date, %s::date)",
+                                (table, str(df[key].min().date()), str(df[key].max().date())))
+                buf = io.StringIO()
+                df[cols].to_csv(buf, header=False, index=False)
+                buf.seek(0)
+                cur.copy_expert(f"COPY {table} ({', '.join(map(quote_ident, cols))}) FROM STDIN WITH (FORMAT csv)", buf)
+                self.rows[name] = self.rows.get(name, 0) + len(df)
+        self.conn.commit()
 
 # -------------------------
 # Main
@@ -548,49 +1027,99 @@ if __name__ == "__main__":
     parser.add_argument("--policies", type=int, default=10000)
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--out", type=str, default="./out")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes generating shards (output does not depend on it)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_POLICIES,
+                        help="Policies per shard; changing it changes the generated data")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Output file format (parquet needs pyarrow)")
+    parser.add_argument("--dsn", type=str, default=None,
+                        help="COPY shards straight into this Postgres database instead of writing files")
+    parser.add_argument("--schema", choices=["raw", "core"], default="raw",
+                        help="With --dsn: target schema for customers/policies/claims (core needs build_core.sql)")
+    parser.add_argument("--replace", action="store_true",
+                        help="With --dsn: drop the raw tables / truncate the core tables first")
+    parser.add_argument("--delta-days", type=int, default=0,
+                        help="After the snapshot, replay this many days of changes as delta batches")
+    parser.add_argument("--delta-start", type=str, default=None,
+                        help="First replayed day (YYYY-MM-DD); default: the day after the last snapshot date")
+    parser.add_argument("--delta-out", type=str, default=None,
+                        help="Directory for the delta batches (default: <out>/delta)")
     args = parser.parse_args()
 
-    rng = np.random.default_rng(args.seed)
-    Faker.seed(args.seed)
-
-    os.makedirs(args.out, exist_ok=True)
-
     # Derive number of customers (some multi-policy)
     n_customers = max(2000, int(args.policies*0.6))
 
-    customers = generate_customers(n_customers)
-    policies, coverages, properties, rentals, vehicles = generate_policies(customers, Sizes(n_policies=args.policies))
-    claims, loss_events = generate_claims(policies, customers, vehicles, properties)
-
-    # Export
-    def dump(df:pd.DataFrame, name:str):
-        path = os.path.join(args.out, name)
-        df.to_csv(path, index=False)
-        print(f"→ {name}: {len(df)} rows")
-
-    dump(customers, "customers.csv")
-    dump(policies, "policies.csv")
-    dump(coverages, "coverages.csv")
-    dump(properties, "properties.csv")
-    dump(rentals, "rental_units.csv")
-    dump(vehicles, "vehicles.csv")
-    dump(claims, "claims.csv")
-    dump(loss_events, "loss_events.csv")
-
-    # Geo features extract (unique combos) for reference
-    geo = customers[["county_code","county_name","city","postal_code","crime_risk","hail_risk","flood_risk","wind_risk","fire_risk","dist_fire_station_km","dist_hydrant_km","dist_police_km","dist_coast_km","dist_danube_km"]].drop_duplicates()
-    dump(geo, "geo_features.csv")
-
-    # Simple blob manifest (no files created, just a template for later uploads)
-    manifest = []
-    for _,cl in claims.head(min(200, len(claims))).iterrows():
-        manifest.append({
-            "claim_id": cl.claim_id,
-            "blob_path": f"claims/{cl.claim_id}/",
-            "expected_files": ["report.pdf","photo_1.jpg","photo_2.jpg"],
-            "ocr_text": ""
-        })
-    with open(os.path.join(args.out, "blob_manifest.json"), "w", encoding="utf-8") as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    # Each shard is written (or copied) as soon as it arrives, so memory is
+    # bounded by the shards in flight rather than by the dataset size
+    shards = plan_shards(args.policies, n_customers, args.seed, args.shard_size)
+    sink = PgSink(args.dsn, args.schema, args.replace) if args.dsn else None
+    # the replay draws from its own stream, after the shards'
+    replay = (DeltaReplay(Sizes(), np.random.SeedSequence(args.seed, spawn_key=(len(shards),)), args.delta_start)
+              if args.delta_days else None)
+    if sink is None:
+        os.makedirs(args.out, exist_ok=True)
+    writers = {}
+    blob_claims = []
+    t0 = time.time()
+    for i, tables in enumerate(generate_sharded(shards, Sizes(n_policies=args.policies), args.workers), 1):
+        # Geo features extract (unique combos) for reference
+        tables["geo_features"] = tables["customers"][GEO_COLUMNS].drop_duplicates()
+        if replay is not None:
+            replay.add(tables)
+        if sink is not None:
+            sink.put(tables)
+        else:
+            for name, df in tables.items():
+                if name not in writers:
+                    writers[name] = TableWriter(args.out, name, args.format)
+                writers[name].write(df)
+            blob_claims.extend(tables["claims"].claim_id[:200 - len(blob_claims)])
+        print(f"   shard {i}/{len(shards)}: {len(tables['policies'])} policies, {len(tables['claims'])} claims")
+
+    if sink is not None:
+        for name, rows in sink.close().items():
+            print(f"→ {sink.target(name)}: {rows} rows")
+        print(f"Done in {time.time() - t0:.1f}s. Refresh the marts (scripts/rebuild_analytics.py or "
+              f"POST /api/admin/refresh_marts) to see the new data.")
+    else:
+        files = {name: w.close() for name, w in writers.items()}
+        for info in files.values():
+            print(f"→ {info['file']}: {info['rows']} rows")
+
+        # Row counts and checksums of everything written
+        with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"seed": args.seed, "policies": args.policies, "shard_size": args.shard_size,
+                       "format": args.format, "files": files}, f, indent=2)
+
+        # Simple blob manifest (no files created, just a template for later uploads)
+        manifest = []
+        for claim_id in blob_claims:
+            manifest.append({
+                "claim_id": claim_id,
+                "blob_path": f"claims/{claim_id}/",
+                "expected_files": ["report.pdf","photo_1.jpg","photo_2.jpg"],
+                "ocr_text": ""
+            })
+        with open(os.path.join(args.out, "blob_manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        print("Done. Synthetic Romanian insurance dataset created.")
 
-    print("Done. Synthetic Romanian insurance dataset created.")
+    # Delta batches: one directory per replayed day, applied in name order with
+    # scripts/load_to_db.py --delta --path <dir>
+    if replay is not None:
+        delta_out = args.delta_out or os.path.join(args.out, "delta")
+        start = np.datetime64(args.delta_start, "D") if args.delta_start else replay.next_day
+        for i, (day, batch) in enumerate(replay.days(start, args.delta_days), 1):
+            batch_dir = os.path.join(delta_out, f"{i:04d}_{day}")
+            os.makedirs(batch_dir, exist_ok=True)
+            files = {}
+            for name, df in batch.items():
+                writer = TableWriter(batch_dir, name, args.format)
+                writer.write(df)
+                files[name] = writer.close()
+            with open(os.path.join(batch_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump({"sequence": i, "day": str(day), "files": files}, f, indent=2)
+            print(f"   delta {i:04d} {day}: " + ", ".join(f"{name} {info['rows']}" for name, info in files.items()))
+        print(f"→ {args.delta_days} delta batches in {delta_out}")